@@ -64,6 +64,7 @@ from .gao import GAO
 from .gao import GAOSet
 from .gao import GAODict
 from .gao import GAOSetMap
+from .gao import GAOShardedDict
 
 # Local dependencies
 # from .persistence import _GarqLite
@@ -83,11 +84,70 @@ __all__ = [
 ]
 
 
+# Root nodes start with a fixed-length manifest of ghids and master secrets,
+# followed by padding, and then a checksum. Sharded dicts keep their
+# directories in a separate slot, between the manifest and the padding, so
+# that accounts from before sharding (and the devices still using them) keep
+# their legacy, unsharded dicts in the manifest. The slot lists the
+# privateer_persistent, rolodex_pending, and dispatch_private directories, in
+# that order.
+_MANIFEST_LENGTH = 1298
+_SHARD_SLOT_MAGIC = b'\x00hgx.shards.v1\x00'
+_SHARD_SLOT_COUNT = 3
+# Ghid, then master secret
+_SHARD_SLOT_ENTRY = 65 + 53
+_SHARD_SLOT_LENGTH = (len(_SHARD_SLOT_MAGIC) +
+                      _SHARD_SLOT_COUNT * _SHARD_SLOT_ENTRY)
+
+
 # ###############################################
 # Library
 # ###############################################
 
 
+def _pack_shard_slot(entries):
+    ''' Serialize the (ghid, master secret) of each sharded directory
+    into a root node shard slot.
+    '''
+    return _SHARD_SLOT_MAGIC + b''.join(
+        bytes(ghid) + bytes(master_secret)
+        for ghid, master_secret in entries
+    )
+
+
+def _read_shard_slot(state):
+    ''' Get a list of (ghid, master secret) for every sharded directory
+    from the root node state, or None if it has no shard slot.
+    '''
+    offset = _MANIFEST_LENGTH + len(_SHARD_SLOT_MAGIC)
+    if state[_MANIFEST_LENGTH:offset] != _SHARD_SLOT_MAGIC:
+        return None
+    
+    entries = []
+    for __ in range(_SHARD_SLOT_COUNT):
+        entries.append((
+            Ghid.from_bytes(state[offset:offset + 65]),
+            Secret.from_bytes(state[offset + 65:offset + _SHARD_SLOT_ENTRY])
+        ))
+        offset += _SHARD_SLOT_ENTRY
+    
+    return entries
+
+
+def _write_shard_slot(state, entries):
+    ''' Return a copy of the root node state, with the shard slot set
+    to entries and the checksum updated to match.
+    '''
+    body = state[:-64]
+    if _read_shard_slot(state) is None:
+        padding = body[_MANIFEST_LENGTH:]
+    else:
+        padding = body[_MANIFEST_LENGTH + _SHARD_SLOT_LENGTH:]
+    
+    body = body[:_MANIFEST_LENGTH] + _pack_shard_slot(entries) + padding
+    return body + sha512(body).digest()
+
+
 class Account(metaclass=API):
     ''' Accounts settle all sorts of stuff.
     
@@ -98,6 +158,10 @@ class Account(metaclass=API):
     _identity = immortal_property('__identity')
     _user_id = immortal_property('__user_id')
     
+    # Defaults for the flush window, in seconds.
+    FLUSH_DELAY = .1
+    FLUSH_MAX_LATENCY = 1
+    
     _golcore = weak_property('__golcore')
     _ghidproxy = weak_property('__ghidproxy')
     _privateer = weak_property('__privateer')
@@ -109,9 +173,13 @@ class Account(metaclass=API):
     _salmonator = weak_property('__salmonator')
     
     @public_api
-    def __init__(self, user_id, root_secret, *args, hgxcore, **kwargs):
+    def __init__(self, user_id, root_secret, *args, hgxcore,
+                 flush_delay=None, flush_max_latency=None, **kwargs):
         ''' Gets everything ready for account bootstrapping.
         
+        flush_delay and flush_max_latency control the coalescing of
+        flush() calls; see flush().
+        
         +   user_id explicitly passed with None means create a new
             Account.
         +   identity explicitly passed with None means load an existing
@@ -146,6 +214,19 @@ class Account(metaclass=API):
         
         self._root_secret = root_secret
         
+        if flush_delay is None:
+            flush_delay = self.FLUSH_DELAY
+        if flush_max_latency is None:
+            flush_max_latency = self.FLUSH_MAX_LATENCY
+        
+        self._flush_delay = flush_delay
+        self._flush_max_latency = flush_max_latency
+        # The pending (debounced) flush, and the latest time it may run
+        self._flush_timer = None
+        self._flush_deadline = None
+        # Any coalesced flushes that are currently pushing
+        self._flushes = set()
+    
     @__init__.fixture
     def __init__(self, identity, *args, **kwargs):
         ''' Lulz just ignore errytang and skip calling super!
@@ -180,23 +261,123 @@ class Account(metaclass=API):
         gao._ctx = asyncio.Event()
         gao._ctx.set()
         self._oracle._lookup[gao.ghid] = gao
+        # These can't be reloaded through the oracle, so never evict them.
+        self._oracle.pin(gao.ghid)
             
+    @property
+    def _sharded_dicts(self):
+        ''' Every sharded dict, in root node shard slot order.
+        '''
+        return (
+            self.privateer_persistent,
+            self.rolodex_pending,
+            self.dispatch_private
+        )
+    
+    def _sharded_entries(self):
+        ''' The (ghid, master secret) of every sharded directory, in
+        root node shard slot order.
+        '''
+        return [
+            (sharded.ghid, sharded.directory._master_secret)
+            for sharded in self._sharded_dicts
+        ]
+    
+    async def _migrate_dict(self, sharded, ghid, master_secret):
+        ''' Allocate the sharded dict from the contents of a legacy,
+        unsharded one. The legacy dict is left untouched, so that
+        devices that haven't upgraded can keep using it.
+        '''
+        logger.info('Migrating GAODict ' + str(ghid) + ' into shards.')
+        legacy = GAODict(
+            ghid = ghid,
+            dynamic = True,
+            author = None,
+            legroom = 7,
+            golcore = self._golcore,
+            ghidproxy = self._ghidproxy,
+            privateer = self._privateer,
+            percore = self._percore,
+            librarian = self._librarian,
+            salmonator = self._salmonator,
+            master_secret = master_secret
+        )
+        await legacy._pull()
+        
+        sharded._inject_msec(self._privateer.new_secret())
+        await sharded.allocate(legacy.state)
+    
+    async def _allocate_legacy_dict(self):
+        ''' Create an empty, unsharded dict for one of the legacy root
+        node manifest slots, so that devices that haven't upgraded can
+        still read new accounts. Returns its (ghid, master secret).
+        '''
+        master_secret = self._identity.new_secret()
+        legacy = GAODict(
+            ghid = None,
+            dynamic = True,
+            author = None,
+            legroom = 7,
+            golcore = self._golcore,
+            ghidproxy = self._ghidproxy,
+            privateer = self._privateer,
+            percore = self._percore,
+            librarian = self._librarian,
+            salmonator = self._salmonator,
+            master_secret = master_secret
+        )
+        # Because this uses a master secret, it needs to be initialized, or
+        # the first frame will be unrecoverable.
+        await legacy._push(force=True)
+        await legacy._push(force=True)
+        return legacy.ghid, master_secret
+    
+    async def _record_shards(self, root_node):
+        ''' Add the shard slot to the root node, once every legacy dict
+        has been migrated. Another device may be migrating at the same
+        time, so check upstream both before writing and after, and if
+        its slot wins, adopt its sharded dicts instead of ours.
+        '''
+        await self._salmonator.attempt_pull(root_node.ghid, quiet=True)
+        await root_node._pull()
+        shard_slot = _read_shard_slot(root_node.state)
+        
+        if shard_slot is None:
+            logger.info('Recording sharded dicts in the root node.')
+            root_node.state = _write_shard_slot(
+                root_node.state,
+                self._sharded_entries()
+            )
+            await root_node._push()
+            
+            await self._salmonator.attempt_pull(root_node.ghid, quiet=True)
+            await root_node._pull()
+            shard_slot = _read_shard_slot(root_node.state)
+        
+        for sharded, (ghid, master_secret) in zip(self._sharded_dicts,
+                                                  shard_slot):
+            if sharded.ghid != ghid:
+                logger.info(
+                    'Sharded dict ' + str(sharded.ghid) + ' lost a ' +
+                    'concurrent migration. Adopting ' + str(ghid) + '.'
+                )
+                await sharded.adopt(ghid, master_secret)
+    
     async def bootstrap(self):
         ''' Used for account creation, to initialize the root node with
         its resource directory.
         '''
         # We need to pre-allocate the privateer stuff so we can bootstrap it
         # before pulling the root node when reloading.
-        self.privateer_persistent = GAODict(
+        self.privateer_persistent = GAOShardedDict(
             ghid = None,
-            dynamic = True,
-            author = None,
             legroom = 7,
             golcore = self._golcore,
             ghidproxy = self._ghidproxy,
             privateer = self._privateer,
             percore = self._percore,
-            librarian = self._librarian
+            librarian = self._librarian,
+            salmonator = self._salmonator
         )
         self.privateer_quarantine = GAODict(
             ghid = None,
@@ -207,7 +388,8 @@ class Account(metaclass=API):
             ghidproxy = self._ghidproxy,
             privateer = self._privateer,
             percore = self._percore,
-            librarian = self._librarian
+            librarian = self._librarian,
+            salmonator = self._salmonator
         )
         
         # Privateer can be bootstrapped with or without pulling. Even though it
@@ -229,6 +411,7 @@ class Account(metaclass=API):
                 privateer = self._privateer,
                 percore = self._percore,
                 librarian = self._librarian,
+                salmonator = self._salmonator,
                 master_secret = self._root_secret
             )
             # And now, remove the root secret from the parent namespace. This
@@ -310,6 +493,32 @@ class Account(metaclass=API):
                 root_node.state[1180: 1245])
             dispatch_orphan_naks_master = Secret.from_bytes(
                 root_node.state[1245: 1298])
+            
+            # Sharded dicts. If the root node predates them, the manifest
+            # entries are legacy, unsharded dicts, which we migrate into new
+            # sharded ones (with new master secrets) once we've loaded our
+            # identity.
+            shard_slot = _read_shard_slot(root_node.state)
+            if shard_slot is None:
+                legacy_dicts = (
+                    (privateer_persistent_ghid, privateer_persistent_master),
+                    (rolodex_pending_ghid, rolodex_pending_master),
+                    (dispatch_private_ghid, dispatch_private_master)
+                )
+                privateer_persistent_ghid = None
+                privateer_persistent_master = None
+                rolodex_pending_ghid = None
+                rolodex_pending_master = None
+                dispatch_private_ghid = None
+                dispatch_private_master = None
+            
+            else:
+                legacy_dicts = None
+                (
+                    (privateer_persistent_ghid, privateer_persistent_master),
+                    (rolodex_pending_ghid, rolodex_pending_master),
+                    (dispatch_private_ghid, dispatch_private_master)
+                ) = shard_slot
         
         else:
             # We need an identity at to golcore before we can do anything
@@ -337,6 +546,7 @@ class Account(metaclass=API):
                 privateer = self._privateer,
                 percore = self._percore,
                 librarian = self._librarian,
+                salmonator = self._salmonator,
                 master_secret = self._root_secret
             )
             # And now, remove the root secret from the parent namespace. This
@@ -392,6 +602,7 @@ class Account(metaclass=API):
             privateer = self._privateer,
             percore = self._percore,
             librarian = self._librarian,
+            salmonator = self._salmonator,
             master_secret = identity_master
         )
         
@@ -420,7 +631,13 @@ class Account(metaclass=API):
             await self._salmonator.bootstrap(self)
             
             logger.info('Loading persistent keystore.')
-            await self.privateer_persistent._pull()
+            if legacy_dicts is None:
+                await self.privateer_persistent.restore()
+            else:
+                await self._migrate_dict(
+                    self.privateer_persistent,
+                    *legacy_dicts[0]
+                )
 
             logger.info('Loading quarantined keystore.')
             await self.privateer_quarantine._pull()
@@ -446,32 +663,31 @@ class Account(metaclass=API):
             # Because these use a master secret, they need to be initialized,
             # or the first frame will be unrecoverable.
             logger.info('Allocating persistent keystore.')
-            await self.privateer_persistent._push(force=True)
-            await self.privateer_persistent._push(force=True)
+            await self.privateer_persistent.allocate()
             
             logger.info('Allocating quarantined keystore.')
             await self.privateer_quarantine._push(force=True)
             await self.privateer_quarantine._push(force=True)
             
-        # Establish the rest of the above at the various tracking agencies
+        # Establish the rest of the above at the various tracking agencies.
+        # Note that the persistent keystore waits until the end, since a
+        # migration may yet change its shards.
         logger.info('Reticulating keystores.')
-        await self._inject_gao(self.privateer_persistent)
         await self._inject_gao(self.privateer_quarantine)
         # We don't need to do this with the secondary manifest (unless we're
         # planning on adding things to it while already running, which would
         # imply an ad-hoc, on-the-fly upgrade process)
         
         # Rolodex gaos:
-        self.rolodex_pending = GAODict(
+        self.rolodex_pending = GAOShardedDict(
             ghid = rolodex_pending_ghid,
-            dynamic = True,
-            author = None,
             legroom = 7,
             golcore = self._golcore,
             ghidproxy = self._ghidproxy,
             privateer = self._privateer,
             percore = self._percore,
             librarian = self._librarian,
+            salmonator = self._salmonator,
             master_secret = rolodex_pending_master
         )
         self.rolodex_outstanding = GAOSetMap(
@@ -484,6 +700,7 @@ class Account(metaclass=API):
             privateer = self._privateer,
             percore = self._percore,
             librarian = self._librarian,
+            salmonator = self._salmonator,
             master_secret = rolodex_outstanding_master
         )
         
@@ -498,6 +715,7 @@ class Account(metaclass=API):
             privateer = self._privateer,
             percore = self._percore,
             librarian = self._librarian,
+            salmonator = self._salmonator,
             master_secret = dispatch_tokens_master
         )
         self.dispatch_startup = GAODict(
@@ -510,18 +728,18 @@ class Account(metaclass=API):
             privateer = self._privateer,
             percore = self._percore,
             librarian = self._librarian,
+            salmonator = self._salmonator,
             master_secret = dispatch_startup_master
         )
-        self.dispatch_private = GAODict(
+        self.dispatch_private = GAOShardedDict(
             ghid = dispatch_private_ghid,
-            dynamic = True,
-            author = None,
             legroom = 7,
             golcore = self._golcore,
             ghidproxy = self._ghidproxy,
             privateer = self._privateer,
             percore = self._percore,
             librarian = self._librarian,
+            salmonator = self._salmonator,
             master_secret = dispatch_private_master
         )
         self.dispatch_incoming = GAOSet(
@@ -534,6 +752,7 @@ class Account(metaclass=API):
             privateer = self._privateer,
             percore = self._percore,
             librarian = self._librarian,
+            salmonator = self._salmonator,
             master_secret = dispatch_incoming_master
         )
         self.dispatch_orphan_acks = GAOSetMap(
@@ -546,6 +765,7 @@ class Account(metaclass=API):
             privateer = self._privateer,
             percore = self._percore,
             librarian = self._librarian,
+            salmonator = self._salmonator,
             master_secret = dispatch_orphan_acks_master
         )
         self.dispatch_orphan_naks = GAOSetMap(
@@ -558,6 +778,7 @@ class Account(metaclass=API):
             privateer = self._privateer,
             percore = self._percore,
             librarian = self._librarian,
+            salmonator = self._salmonator,
             master_secret = dispatch_orphan_naks_master
         )
         
@@ -567,21 +788,35 @@ class Account(metaclass=API):
         
         if self._user_id is not None:
             logger.info('Restoring sharing subsystem.')
-            await self.rolodex_pending._pull()
+            if legacy_dicts is None:
+                await self.rolodex_pending.restore()
+            else:
+                await self._migrate_dict(
+                    self.rolodex_pending,
+                    *legacy_dicts[1]
+                )
             await self.rolodex_outstanding._pull()
             
             logger.info('Restoring object dispatch.')
             await self.dispatch_tokens._pull()
             await self.dispatch_startup._pull()
-            await self.dispatch_private._pull()
+            if legacy_dicts is None:
+                await self.dispatch_private.restore()
+            else:
+                await self._migrate_dict(
+                    self.dispatch_private,
+                    *legacy_dicts[2]
+                )
             await self.dispatch_incoming._pull()
             await self.dispatch_orphan_acks._pull()
             await self.dispatch_orphan_naks._pull()
+            
+            if legacy_dicts is not None:
+                await self._record_shards(root_node)
         
         else:
             logger.info('Building sharing subsystem.')
-            await self.rolodex_pending._push(force=True)
-            await self.rolodex_pending._push(force=True)
+            await self.rolodex_pending.allocate()
             await self.rolodex_outstanding._push(force=True)
             await self.rolodex_outstanding._push(force=True)
             
@@ -590,8 +825,7 @@ class Account(metaclass=API):
             await self.dispatch_tokens._push(force=True)
             await self.dispatch_startup._push(force=True)
             await self.dispatch_startup._push(force=True)
-            await self.dispatch_private._push(force=True)
-            await self.dispatch_private._push(force=True)
+            await self.dispatch_private.allocate()
             await self.dispatch_incoming._push(force=True)
             await self.dispatch_incoming._push(force=True)
             await self.dispatch_orphan_acks._push(force=True)
@@ -599,6 +833,16 @@ class Account(metaclass=API):
             await self.dispatch_orphan_naks._push(force=True)
             await self.dispatch_orphan_naks._push(force=True)
             
+            # The legacy manifest slots get their own empty dicts. The sharded
+            # dicts are only referenced from the shard slot, since older
+            # devices would otherwise mistake their directories for the flat
+            # dicts themselves.
+            logger.info('Building legacy dicts.')
+            legacy_slots = [
+                (await self._allocate_legacy_dict())
+                for __ in range(_SHARD_SLOT_COUNT)
+            ]
+            
             self._user_id = root_node.ghid
         
             logger.info('Building root node...')
@@ -623,26 +867,27 @@ class Account(metaclass=API):
             logger.info('    Serializing primary manifest.')
             root_node.state = (bytes(identity_container.ghid) +
                                bytes(identity_master) +
-                               bytes(self.privateer_persistent.ghid) +
-                               bytes(privateer_persistent_master) +
+                               bytes(legacy_slots[0][0]) +
+                               bytes(legacy_slots[0][1]) +
                                bytes(self.privateer_quarantine.ghid) +
                                bytes(privateer_quarantine_master) +
-                               bytes(self.rolodex_pending.ghid) +
-                               bytes(rolodex_pending_master) +
+                               bytes(legacy_slots[1][0]) +
+                               bytes(legacy_slots[1][1]) +
                                bytes(self.rolodex_outstanding.ghid) +
                                bytes(rolodex_outstanding_master) +
                                bytes(self.dispatch_tokens.ghid) +
                                bytes(dispatch_tokens_master) +
                                bytes(self.dispatch_startup.ghid) +
                                bytes(dispatch_startup_master) +
-                               bytes(self.dispatch_private.ghid) +
-                               bytes(dispatch_private_master) +
+                               bytes(legacy_slots[2][0]) +
+                               bytes(legacy_slots[2][1]) +
                                bytes(self.dispatch_incoming.ghid) +
                                bytes(dispatch_incoming_master) +
                                bytes(self.dispatch_orphan_acks.ghid) +
                                bytes(dispatch_orphan_acks_master) +
                                bytes(self.dispatch_orphan_naks.ghid) +
                                bytes(dispatch_orphan_naks_master) +
+                               _pack_shard_slot(self._sharded_entries()) +
                                padding)
             
             # We'll use this upon future logins to verify password correctness
@@ -660,14 +905,19 @@ class Account(metaclass=API):
         #######################################################################
         #######################################################################
         
+        for gao in self.privateer_persistent.gaos:
+            await self._inject_gao(gao)
+        
         logger.info('Reticulating sharing subsystem.')
-        await self._inject_gao(self.rolodex_pending)
+        for gao in self.rolodex_pending.gaos:
+            await self._inject_gao(gao)
         await self._inject_gao(self.rolodex_outstanding)
         
         logger.info('Reticulating object dispatch.')
         await self._inject_gao(self.dispatch_tokens)
         await self._inject_gao(self.dispatch_startup)
-        await self._inject_gao(self.dispatch_private)
+        for gao in self.dispatch_private.gaos:
+            await self._inject_gao(gao)
         await self._inject_gao(self.dispatch_incoming)
         await self._inject_gao(self.dispatch_orphan_acks)
         await self._inject_gao(self.dispatch_orphan_naks)
@@ -677,6 +927,57 @@ class Account(metaclass=API):
     @fixture_noop
     @public_api
     async def flush(self):
+        ''' Schedule a push of any modified account components. Calls
+        within flush_delay of one another are coalesced into a single
+        push per modified GAO, which happens no later than
+        flush_max_latency after the first of them. Use flush_now to
+        push synchronously (for example, during shutdown).
+        '''
+        loop = asyncio.get_event_loop()
+        now = loop.time()
+        
+        if self._flush_deadline is None:
+            self._flush_deadline = now + self._flush_max_latency
+        
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+        
+        self._flush_timer = loop.call_at(
+            min(now + self._flush_delay, self._flush_deadline),
+            self._fire_flush
+        )
+    
+    def _fire_flush(self):
+        ''' Timer callback for the coalesced flush.
+        '''
+        self._flush_timer = None
+        self._flush_deadline = None
+        
+        task = make_background_future(self._push_all())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+    
+    @fixture_noop
+    @public_api
+    async def flush_now(self):
+        ''' Immediately push any modified account components, including
+        anything waiting on a pending flush, and wait for completion.
+        '''
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+            self._flush_deadline = None
+        
+        # Make sure anything already pushing has finished, too.
+        in_progress = set(self._flushes)
+        await self._push_all()
+        if in_progress:
+            await asyncio.wait(
+                fs = in_progress,
+                return_when = asyncio.ALL_COMPLETED
+            )
+    
+    async def _push_all(self):
         ''' Push changes to any modified account components.
         '''
         tasks = {
@@ -54,6 +54,7 @@ from hypergolix.utils import weak_property
 
 from hypergolix.comms import BasicServer
 from hypergolix.comms import WSConnection
+from hypergolix.comms import UnixConnection
 
 from hypergolix.persistence import PersistenceCore
 from hypergolix.persistence import Doorman
@@ -73,6 +74,7 @@ from hypergolix.rolodex import Rolodex
 from hypergolix.dispatch import Dispatcher
 from hypergolix.ipc import IPCServerProtocol
 from hypergolix.privateer import Privateer
+from hypergolix.inquisition import Inquisitor
 
 
 # ###############################################
@@ -97,13 +99,22 @@ class HypergolixCore(loopa.TaskCommander, metaclass=API):
     ''' The core Hypergolix system.
     '''
     account = weak_property('_account')
+    # Max seconds to wait for the account to flush on close
+    FLUSH_TIMEOUT = 5
     
     @public_api
-    def __init__(self, cache_dir, ipc_port, *args, **kwargs):
+    def __init__(self, cache_dir, ipc_port, *args, ipc_socket=None,
+                 ipc_shm_threshold=None, **kwargs):
         ''' Create and assemble everything, readying it for a bootstrap
         (etc).
         
         user_id may be explicitly None to create a new account.
+        
+        If ipc_socket is defined, apps may also connect to IPC through a
+        Unix domain socket at that path.
+        
+        If ipc_shm_threshold is defined, object states at least that many
+        bytes long are sent to apps through shared memory.
         '''
         super().__init__(*args, **kwargs)
         # We also want to create an event so things can block on us being
@@ -132,12 +143,19 @@ class HypergolixCore(loopa.TaskCommander, metaclass=API):
         self.ghidproxy = GhidProxier()
         self.oracle = Oracle()
         self.privateer = Privateer()
+        self.inquisitor = Inquisitor()
         
         # Application engine stuff
         self.rolodex = Rolodex()
         self.dispatch = Dispatcher()
-        self.ipc_protocol = IPCServerProtocol()
+        self.ipc_protocol = IPCServerProtocol(
+            shm_threshold = ipc_shm_threshold
+        )
         self.ipc_server = BasicServer(connection_cls=WSConnection)
+        if ipc_socket is not None:
+            self.ipc_unix_server = BasicServer(connection_cls=UnixConnection)
+        else:
+            self.ipc_unix_server = None
         
         # Assembly!
         ######################################################################
@@ -200,6 +218,10 @@ class HypergolixCore(loopa.TaskCommander, metaclass=API):
             salmonator = self.salmonator
         )
         self.privateer.assemble(self.golcore)
+        self.inquisitor.assemble(
+            oracle = self.oracle,
+            dispatch = self.dispatch
+        )
         
         # App engine assembly
         self.dispatch.assemble(
@@ -230,12 +252,19 @@ class HypergolixCore(loopa.TaskCommander, metaclass=API):
         self.register_task(self.undertaker)
         self.register_task(self.postman)
         self.register_task(self.salmonator)
+        self.register_task(self.inquisitor)
         self.register_task(
             self.ipc_server,
             msg_handler = self.ipc_protocol,
             host = 'localhost',
             port = ipc_port
         )
+        if self.ipc_unix_server is not None:
+            self.register_task(
+                self.ipc_unix_server,
+                msg_handler = self.ipc_protocol,
+                path = ipc_socket
+            )
         
     @__init__.fixture
     def __init__(self, **kwargs):
@@ -266,8 +295,24 @@ class HypergolixCore(loopa.TaskCommander, metaclass=API):
     async def teardown(self):
         ''' Do all of the post-run-pre-close stuff.
         '''
-        # Hold off on this until we stop hanging on close
-        # await self.account.flush()
+        # The account may have expired, or never been set.
+        account = getattr(self, 'account', None)
+        
+        # Don't let an unreachable remote hang the close indefinitely.
+        if account is not None:
+            try:
+                await asyncio.wait_for(
+                    account.flush_now(),
+                    timeout = self.FLUSH_TIMEOUT
+                )
+            
+            except asyncio.TimeoutError:
+                logger.error('Timed out flushing the account on close.')
+            
+            except Exception:
+                logger.error(
+                    'Failed to flush the account on close.', exc_info=True
+                )
         
     async def await_startup(self):
         ''' Wait for startup to complete.
@@ -47,6 +47,8 @@ from hypergolix.daemon import stop as stop_app
 from hypergolix.config import handle_args as config
 from hypergolix.config import NAMED_REMOTES
 
+from hypergolix.compaction import handle_args as compact
+
 
 # ###############################################
 # Root parsers
@@ -87,6 +89,13 @@ config_parser = subparsers.add_parser(
 # config_subparsers = config_parser.add_subparsers()
 
 
+compact_parser = subparsers.add_parser(
+    'compact',
+    help = 'Remove unreachable objects from a stopped Hypergolix cache.',
+    prog = 'hypergolix compact'
+)
+
+
 # ###############################################
 # App start parser (hypergolix start app)
 # ###############################################
@@ -388,6 +397,42 @@ etc_group.add_argument(
 )
 
 
+# ###############################################
+# Compaction parser (hypergolix compact)
+# ###############################################
+
+
+compact_parser.set_defaults(entry_point=compact)
+
+compact_parser.add_argument(
+    'cachedir',
+    action = 'store',
+    type = str,
+    default = None,
+    nargs = '?',
+    help = 'The ghidcache directory to compact. Defaults to the server ' +
+           'cache from the current Hypergolix configuration.'
+)
+compact_parser.add_argument(
+    '--app',
+    action = 'store_true',
+    help = 'Compact the app cache from the current configuration instead ' +
+           'of the server cache. Ignored if cachedir is specified.'
+)
+compact_parser.add_argument(
+    '--dry-run', '-n',
+    action = 'store_true',
+    dest = 'dry_run',
+    help = 'Report reclaimable space without removing anything.'
+)
+compact_parser.add_argument(
+    '--force',
+    action = 'store_true',
+    help = 'Compact even if a PID file exists for the cache owner. Only ' +
+           'use this if the PID file is stale.'
+)
+
+
 # ###############################################
 # Master entry point (hypergolix)
 # ###############################################
@@ -35,6 +35,9 @@ import asyncio
 import websockets
 import traceback
 import weakref
+import os
+import stat
+import socket
 import base64
 import loopa
 import certifi
@@ -64,6 +67,8 @@ from .exceptions import ProtocolVersionError
 from .utils import _BijectDict
 from .utils import ensure_equal_len
 
+from .logutils import log_event
+
 
 # ###############################################
 # Boilerplate
@@ -162,7 +167,7 @@ class _ConnectionBase(metaclass=API):
             'utf-8'
         )
         # And log our creation.
-        logger.info('CONN ' + str(self) + ' CREATED.')
+        log_event(logger, logging.INFO, 'conn.created', conn=self)
         
     @__init__.fixture
     def __init__(self, msg_iterator=None, *args, **kwargs):
@@ -226,13 +231,12 @@ class _ConnectionBase(metaclass=API):
             msg = await self.recv()
         
         except ConnectionClosed:
-            logger.info(
-                'CONN ' + str(self) + ' closed at listener.'
-            )
+            log_event(logger, logging.INFO, 'conn.closed_at_listener',
+                      conn=self)
             raise
             
         else:
-            logger.debug('CONN ' + str(self) + ' message received.')
+            log_event(logger, logging.DEBUG, 'conn.received', conn=self)
             
             try:
                 # When we pass to the receiver, make sure we give them a strong
@@ -240,7 +244,8 @@ class _ConnectionBase(metaclass=API):
                 await receiver(self, msg)
                 
             except asyncio.CancelledError:
-                logger.debug('CONN ' + str(self) + ' receive cancelled.')
+                log_event(logger, logging.DEBUG, 'conn.receive_cancelled',
+                          conn=self)
                 raise
             
             except Exception:
@@ -263,7 +268,8 @@ class _ConnectionBase(metaclass=API):
         
         # Catch this so we don't log a huge traceback on it.
         except ConnectionClosed as exc:
-            logger.debug('CONN ' + str(self) + ' close message: ' + str(exc))
+            log_event(logger, logging.DEBUG, 'conn.closed', conn=self,
+                      reason=exc)
         
     @classmethod
     @fixture_api
@@ -524,7 +530,8 @@ class WSBeatingConn(WSConnection):
                 # We haven't gotten a message since the heartbeat_interval, so
                 # we need to send a keepalive
                 else:
-                    logger.debug('CONN ' + str(self) + ' sending heartbeat.')
+                    log_event(logger, logging.DEBUG, 'conn.heartbeat',
+                              conn=self)
                     # Don't want asyncio to yell at us for not collecting our
                     # debts / results
                     heartbeat.result()
@@ -534,9 +541,252 @@ class WSBeatingConn(WSConnection):
         
         # Catch this so we don't log a huge traceback on it.
         except ConnectionClosed as exc:
-            logger.debug('CONN ' + str(self) + ' close message: ' + str(exc))
+            log_event(logger, logging.DEBUG, 'conn.closed', conn=self,
+                      reason=exc)
+    
+    
+class _StreamConnection(_ConnectionBase):
+    ''' Base for connections over plain asyncio streams. Every message
+    is framed with a 4-byte big-endian length prefix, which is far
+    lighter than websockets, but (being unmasked and unauthenticated)
+    is only appropriate for local or otherwise trusted transports.
+    '''
+    _LEN_BYTES = 4
+    # Match the max incoming message size for websockets.
+    MAX_MSG_SIZE = 10 * (2 ** 20)
+    
+    def __init__(self, reader, writer, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        
+        self.reader = reader
+        self.writer = writer
+    
+    @classmethod
+    def _make_handler(cls, msg_handler):
+        ''' Create a client_connected_cb for asyncio.start_server (and
+        friends) that feeds the msg_handler actual connection objects.
+        '''
+        async def wrapped_msg_handler(reader, writer):
+            try:
+                # Make sure we don't take a strong reference to the
+                # connection!
+                self = weakref.proxy(cls(reader, writer))
+                await self.listen_forever(msg_handler)
+            
+            finally:
+                writer.close()
+        
+        return wrapped_msg_handler
+    
+    @classmethod
+    async def _serve(cls, server):
+        ''' Wait on an asyncio server until cancelled, closing it on the
+        way out.
+        '''
+        try:
+            await server.wait_closed()
+        
+        except asyncio.CancelledError:
+            # Don't log being cancelled; it's expected close behavior.
+            raise
+        
+        except Exception as exc:
+            logger.error(
+                'INTERNAL SERVER ERROR. Closing server w/ traceback:\n' +
+                ''.join(traceback.format_exc())
+            )
+            logger.debug('Error args:' + str(exc.args))
+        
+        finally:
+            # Stop listening immediately, regardless of why we're exiting.
+            server.close()
+    
+    async def close(self):
+        ''' Closes the stream and calls self.terminate().
+        '''
+        try:
+            # Closing the writer is idempotent.
+            self.writer.close()
+        
+        finally:
+            # And force us to be GC'd
+            self.terminate()
+    
+    async def send(self, msg):
+        ''' Write the length prefix and then the message itself. The
+        message is handed straight to the transport, without being
+        concatenated into a new buffer.
+        '''
+        if len(msg) > self.MAX_MSG_SIZE:
+            raise ValueError('Message exceeds maximum size.')
+        
+        try:
+            self.writer.write(len(msg).to_bytes(self._LEN_BYTES, 'big'))
+            self.writer.write(msg)
+            await self.writer.drain()
+        
+        # If the connection is closed, self-destruct
+        except ConnectionError as exc:
+            try:
+                raise ConnectionClosed(repr(exc)) from exc
+            
+            finally:
+                self.terminate()
+    
+    async def recv(self):
+        ''' Read a single length-prefixed message.
+        '''
+        try:
+            header = await self.reader.readexactly(self._LEN_BYTES)
+            length = int.from_bytes(header, 'big')
+            
+            if length <= self.MAX_MSG_SIZE:
+                return (await self.reader.readexactly(length))
+        
+        # If the connection is closed, self-destruct
+        except (asyncio.IncompleteReadError, ConnectionError) as exc:
+            try:
+                raise ConnectionClosed(repr(exc)) from exc
+            
+            finally:
+                self.terminate()
+        
+        # We can't resynchronize the stream after refusing a frame, so the
+        # connection is unusable.
+        try:
+            self.writer.close()
+            raise ConnectionClosed(
+                'Incoming frame of ' + str(length) + ' bytes exceeds ' +
+                'maximum size.'
+            )
+        
+        finally:
+            self.terminate()
+
+
+class UnixConnection(_StreamConnection):
+    ''' A length-prefixed connection over a Unix domain socket. Used
+    for IPC between the Hypergolix daemon and local applications,
+    where websockets framing is pure overhead.
+    '''
     
+    @classmethod
+    def desc_str(cls, path):
+        ''' Describe the socket we're connecting to.
+        '''
+        return cls.__name__ + '(' + str(path) + ')'
     
+    @classmethod
+    async def serve_forever(cls, msg_handler, path):
+        ''' Starts a server for this kind of connection. Should handle
+        its own return, and be cancellable via task cancellation.
+        '''
+        path = str(path)
+        
+        # Clean up any stale socket left behind by a previous (crashed) run,
+        # but don't clobber anything that isn't a socket.
+        try:
+            if stat.S_ISSOCK(os.stat(path).st_mode):
+                os.unlink(path)
+        except FileNotFoundError:
+            pass
+        
+        # Only the user running the server should be able to connect. The
+        # socket file's permissions come from the umask at bind time, so
+        # restrict it for the bind, or the socket would briefly be open to
+        # anyone allowed by the normal umask. The umask is process-wide,
+        # but while it's set, it can only make other new files stricter.
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            sock.bind(path)
+        except Exception:
+            sock.close()
+            raise
+        finally:
+            os.umask(old_umask)
+        
+        server = await asyncio.start_unix_server(
+            cls._make_handler(msg_handler),
+            sock = sock
+        )
+        
+        try:
+            await cls._serve(server)
+        
+        finally:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+    
+    @classmethod
+    async def new(cls, path):
+        ''' Creates and returns a new connection. Intended to be called
+        by clients; servers may call __init__ directly.
+        '''
+        reader, writer = await asyncio.open_unix_connection(str(path))
+        return cls(reader=reader, writer=writer)
+
+
+class TCPConnection(_StreamConnection):
+    ''' A length-prefixed connection over plain TCP, optionally wrapped
+    in TLS. Intended for persistence traffic between servers and clients
+    on trusted networks, where per-message websockets framing and
+    masking dominate the cost of small frames.
+    '''
+    
+    @classmethod
+    def desc_str(cls, host, port, tls):
+        ''' Describe where the connection is supposed to go.
+        '''
+        if tls:
+            scheme = 'tcp+tls://'
+        else:
+            scheme = 'tcp://'
+        
+        return cls.__name__ + '(' + scheme + str(host) + ':' + str(port) + ')'
+    
+    @classmethod
+    async def serve_forever(cls, msg_handler, host, port, tls=False,
+                            ssl_context=None):
+        ''' Starts a server for this kind of connection. Should handle
+        its own return, and be cancellable via task cancellation.
+        
+        Serving TLS requires an ssl_context loaded with the server's
+        certificate chain.
+        '''
+        if tls and ssl_context is None:
+            raise ValueError('TLS servers require an ssl_context.')
+        elif not tls:
+            ssl_context = None
+        
+        server = await asyncio.start_server(
+            cls._make_handler(msg_handler),
+            host,
+            int(port),
+            ssl = ssl_context
+        )
+        await cls._serve(server)
+    
+    @classmethod
+    async def new(cls, host, port, tls):
+        ''' Creates and returns a new connection. Intended to be called
+        by clients; servers may call __init__ directly.
+        '''
+        if tls:
+            reader, writer = await asyncio.open_connection(
+                host,
+                int(port),
+                ssl = SSL_VERIFICATION_CONTEXT
+            )
+        
+        else:
+            reader, writer = await asyncio.open_connection(host, int(port))
+        
+        return cls(reader=reader, writer=writer)
+
+
 class MsgBuffer(loopa.TaskLooper):
     ''' Buffers incoming messages, handling them as handlers become
     available. Intended to be put between a Listener and a ProtoDef.
@@ -647,7 +897,8 @@ class ConnectionManager(loopa.TaskLooper, metaclass=loopa.utils.Triplicate):
     MAX_RETRY_DELAY = 3600
     
     def __init__(self, connection_cls, msg_handler, conn_init=None,
-                 conn_close=None, *args, autoretry=True, **kwargs):
+                 conn_close=None, *args, autoretry=True, pool_size=1,
+                 pinned_requests=frozenset(), **kwargs):
         ''' We need to assign our connection class.
         
         conn_init, if defined, will be awaited (as a background task)
@@ -656,6 +907,13 @@ class ConnectionManager(loopa.TaskLooper, metaclass=loopa.utils.Triplicate):
         conn_close, if defined, will be awaited (but not as a background
         task) every time the connection itself has terminated -- AFTER
         the closure.
+        
+        If pool_size is greater than one, pool_size - 1 additional
+        connections will be maintained to the same remote. Requests are
+        then routed to whichever pooled connection has the fewest
+        outstanding requests, except for pinned_requests (by name),
+        which always use the primary connection (the one passed to
+        conn_init and conn_close).
         '''
         super().__init__(*args, **kwargs)
         
@@ -672,6 +930,14 @@ class ConnectionManager(loopa.TaskLooper, metaclass=loopa.utils.Triplicate):
         # connection.
         self.autoretry = autoretry
         
+        self.pool_size = pool_size
+        self.pinned_requests = frozenset(pinned_requests)
+        # Secondary connections. Does not include self._connection.
+        self._pool = []
+        self._pool_tasks = []
+        # Lookup for <connection>: <number of outstanding requests>
+        self._outstanding = {}
+        
         # Very quick and easy way of injecting all of the handler methods into
         # self. Short of having one queue per method, we need to wrap it
         # anyways to buffer the actual method call.
@@ -706,9 +972,24 @@ class ConnectionManager(loopa.TaskLooper, metaclass=loopa.utils.Triplicate):
         self._consecutive_attempts = 0
         self._connection = None
         
+        self._pool_tasks = [
+            asyncio.ensure_future(self._maintain_pooled())
+            for __ in range(self.pool_size - 1)
+        ]
+    
     async def loop_stop(self):
         ''' Reset whether or not we have a connection available.
         '''
+        for task in self._pool_tasks:
+            task.cancel()
+        
+        if self._pool_tasks:
+            await asyncio.wait(
+                fs = self._pool_tasks,
+                return_when = asyncio.ALL_COMPLETED
+            )
+        self._pool_tasks = []
+        
         self._send_q = None
         self._conn_available = None
         self._conn_args = None
@@ -744,9 +1025,7 @@ class ConnectionManager(loopa.TaskLooper, metaclass=loopa.utils.Triplicate):
             # Do this first, because otherwise randrange errors (and also
             # otherwise it isn't technically binary exponential backoff)
             self._consecutive_attempts += 1
-            backoff = random.randrange((2 ** self._consecutive_attempts) - 1)
-            backoff = max(self.MIN_RETRY_DELAY, backoff)
-            backoff = min(self.MAX_RETRY_DELAY, backoff)
+            backoff = self._backoff(self._consecutive_attempts)
             
             if self.autoretry:
                 await asyncio.sleep(backoff)
@@ -800,6 +1079,76 @@ class ConnectionManager(loopa.TaskLooper, metaclass=loopa.utils.Triplicate):
         '''
         return type(self).__name__ + '(' + self._conn_desc + ')'
             
+    def _backoff(self, attempts):
+        ''' Calculate the binary exponential backoff delay for the
+        number of consecutive failed connection attempts.
+        '''
+        backoff = random.randrange((2 ** attempts) - 1)
+        backoff = max(self.MIN_RETRY_DELAY, backoff)
+        return min(self.MAX_RETRY_DELAY, backoff)
+    
+    async def _maintain_pooled(self):
+        ''' Create (and, whenever necessary, re-create) a secondary
+        connection for the pool, listening to it forever.
+        '''
+        attempts = 0
+        while True:
+            try:
+                connection = await self.connection_cls.new(
+                    *self._conn_args,
+                    **self._conn_kwargs
+                )
+            
+            except asyncio.CancelledError:
+                raise
+            
+            except Exception:
+                logger.warning('Failed to establish pooled connection at ' +
+                               self._conn_desc)
+                attempts += 1
+                await asyncio.sleep(self._backoff(attempts))
+                continue
+            
+            logger.info('Pooled connection added to ' + self._conn_desc)
+            attempts = 0
+            self._pool.append(connection)
+            
+            try:
+                await connection.listen_forever(receiver=self.protocol_def)
+            
+            except asyncio.CancelledError:
+                raise
+            
+            # Whatever went wrong, the pool needs to recover from it, so log
+            # and reconnect (the primary connection is unaffected).
+            except Exception:
+                logger.warning('Pooled connection errored: ' +
+                               self._conn_desc + ' w/ traceback:\n' +
+                               ''.join(traceback.format_exc()))
+            
+            finally:
+                self._pool.remove(connection)
+                self._outstanding.pop(connection, None)
+                await connection.close()
+                logger.info('Pooled connection closed: ' + self._conn_desc)
+            
+            # Don't hammer the remote if it keeps dropping us.
+            attempts += 1
+            await asyncio.sleep(self._backoff(attempts))
+    
+    def _route(self, request_name):
+        ''' Pick the connection to use for the request: the primary
+        for pinned requests (or if there's no pool), otherwise the
+        pooled connection with the fewest outstanding requests.
+        '''
+        if request_name in self.pinned_requests or not self._pool:
+            return self._connection
+        
+        return min(
+            self._pool,
+            key = lambda connection: self._outstanding.get(connection, 0)
+        )
+    
     async def perform_request(self, request_name, args, kwargs):
         ''' Make the given request using the protocol_def, but wait
         until a connection exists.
@@ -807,7 +1156,19 @@ class ConnectionManager(loopa.TaskLooper, metaclass=loopa.utils.Triplicate):
         # Wait for the connection to be available.
         method = getattr(self.protocol_def, request_name)
         await self.await_connection()
-        return (await method(self._connection, *args, **kwargs))
+        
+        connection = self._route(request_name)
+        outstanding = self._outstanding.get(connection, 0)
+        self._outstanding[connection] = outstanding + 1
+        try:
+            return (await method(connection, *args, **kwargs))
+        
+        finally:
+            outstanding = self._outstanding.get(connection, 1) - 1
+            if outstanding:
+                self._outstanding[connection] = outstanding
+            else:
+                self._outstanding.pop(connection, None)
     
     @property
     def has_connection(self):
@@ -834,10 +1195,15 @@ class RequestResponseProtocol(type):
     
     def __new__(mcls, clsname, bases, namespace, *args, success_code=b'AK',
                 failure_code=b'NK', error_codes=tuple(), default_version=b'',
-                **kwargs):
+                wide_version=None, **kwargs):
         ''' Modify the existing namespace to include success codes,
         failure codes, the responders, etc. Ensure every request code
         has both a requestor and a request handler.
+        
+        If wide_version is defined, connections will negotiate wide
+        request tokens, which are sent under wide_version instead of
+        default_version. Peers that don't support them keep using
+        default_version.
         '''
     
         # Insert the mixin into the base classes, so that the user-defined
@@ -883,6 +1249,16 @@ class RequestResponseProtocol(type):
                 req_defs[name] = req_code
                 all_codes.add(req_code)
         
+        # Token width negotiation is defined by the mixin itself.
+        if wide_version is not None:
+            if len(wide_version) != len(default_version):
+                raise ValueError('Inconsistent version lengths.')
+            elif wide_version == default_version:
+                raise ValueError('Wide version must differ from default.')
+            
+            req_defs['negotiate_tokens'] = _ReqResMixin._NEGOTIATE_CODE
+            all_codes.add(_ReqResMixin._NEGOTIATE_CODE)
+        
         # All of the request/response codes need to be the same length
         msg_code_len = ensure_equal_len(
             all_codes,
@@ -902,6 +1278,7 @@ class RequestResponseProtocol(type):
         # Add a version identifier (or whatever else it could be)
         cls._VERSION_STR = default_version
         cls._VERSION_LEN = len(default_version)
+        cls._WIDE_VERSION_STR = wide_version
         
         # Add any and all error codes as a class attr
         cls._ERROR_CODES = error_codes
@@ -919,7 +1296,8 @@ class RequestResponseProtocol(type):
         return cls
         
     def __init__(self, *args, success_code=b'AK', failure_code=b'NK',
-                 error_codes=tuple(), default_version=b'', **kwargs):
+                 error_codes=tuple(), default_version=b'', wide_version=None,
+                 **kwargs):
         # Since we're doing everything in __new__, at least right now, don't
         # even bother with this.
         super().__init__(*args, **kwargs)
@@ -977,6 +1355,14 @@ class _RequestToken(int):
         return cls(plain_int)
         
         
+class _WideRequestToken(_RequestToken):
+    ''' A request token for connections that negotiated wide tokens.
+    '''
+    _PACK_LEN = 4
+    _MAX_VAL = (2 ** (8 * _PACK_LEN) - 1)
+    _STR_LEN = len(str(_MAX_VAL))
+
+
 class _BoundReq(namedtuple('_BoundReq', ('obj', 'requestor', 'request_handler',
                                          'response_handler', 'code'))):
     ''' Make the request definition callable, so that the descriptor
@@ -1074,14 +1460,70 @@ def request(code):
         
 class _ReqResMixin:
     ''' Extends req/res protocol definitions to support calling.
+    
+    Request bodies (and responses) may be returned from requestors and
+    request handlers as either a single bytes-like object, or a tuple or
+    list of them, which will be gathered into the message in one pass.
     '''
+    # If True, incoming bodies are passed to handlers as memoryviews into
+    # the received message, instead of being copied out of it. Protocols
+    # opting in must treat bodies as bytes-like, not bytes.
+    _BODY_VIEWS = False
+    # Request code for negotiating wide request tokens. Only used if the
+    # protocol defines a wide_version.
+    _NEGOTIATE_CODE = b'TW'
+    _NEGOTIATE_TIMEOUT = 30
     
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, max_in_flight=1024, **kwargs):
         ''' Add in a weakkeydictionary to track connection responses.
+        
+        max_in_flight limits the number of outstanding requests we will
+        make on any single connection; past that, new requests wait for
+        a slot.
         '''
-        # Lookup: connection -> {token1: queue1, token2: queue2...}
+        # Lookup: connection -> {token1: future1, token2: future2...}
         self._responses = weakref.WeakKeyDictionary()
+        # Lookup: connection -> last token issued
+        self._last_tokens = weakref.WeakKeyDictionary()
+        # Lookup: connection -> asyncio.Semaphore
+        self._in_flight = weakref.WeakKeyDictionary()
+        self._max_in_flight = max_in_flight
+        # Connections we've started negotiating token width with, and the
+        # ones that turned out to support wide tokens.
+        self._negotiated = weakref.WeakSet()
+        self._wide = weakref.WeakSet()
         super().__init__(*args, **kwargs)
+    
+    @request(_NEGOTIATE_CODE)
+    async def negotiate_tokens(self, connection):
+        ''' Ask the other end to use wide request tokens. Peers that
+        predate them will NAK the request as unknown.
+        '''
+        return self._WIDE_VERSION_STR
+    
+    @negotiate_tokens.request_handler
+    async def negotiate_tokens(self, connection, body):
+        ''' Agree to wide request tokens. The response still goes out
+        with the default version, since that's what the request used.
+        '''
+        if bytes(body) != self._WIDE_VERSION_STR:
+            raise ValueError('Unsupported wide token version.')
+        
+        self._negotiated.add(connection)
+        self._wide.add(connection)
+        return b''
+    
+    @negotiate_tokens.response_handler
+    async def negotiate_tokens(self, connection, response, exc):
+        ''' Switch to wide request tokens, if the other end agreed.
+        '''
+        if exc is None:
+            log_event(logger, logging.DEBUG, 'tokens.wide', conn=connection)
+            self._wide.add(connection)
+        
+        else:
+            log_event(logger, logging.DEBUG, 'tokens.narrow',
+                      conn=connection, exc=repr(exc))
         
     def _ensure_responseable(self, connection):
         ''' Make sure a connection is capable of receiving a response.
@@ -1097,34 +1539,32 @@ class _ReqResMixin:
         # First unpack the request. Catch bad version numbers and stuff.
         try:
             code, token, body = await self.unpackit(msg)
-            msg_id = 'CONN ' + str(connection) + ' REQ ' + str(token)
             
         # Log the bad request and then return, ignoring it.
         except ValueError:
             logger.error(
                 'CONN ' + str(connection) + ' FAILED w/ bad version: ' +
-                str(msg[:10])
+                str(bytes(msg[:10]))
             )
             return
             
         # This block dispatches the call. We handle **everything** within this
         # coroutine, so it could be an ACK or a NAK as well as a request.
         if code == self._SUCCESS_CODE:
-            logger.debug(
-                msg_id + ' SUCCESS received w/ partial body: ' + str(body[:10])
-            )
+            log_event(logger, logging.DEBUG, 'response.success',
+                      conn=connection, req=token, body=body[:10])
             response = (body, None)
             
         # For failures, result=None and failure=Exception()
         elif code == self._FAILURE_CODE:
-            logger.debug(
-                msg_id + ' FAILURE received w/ partial body: ' + str(body[:10])
-            )
-            response = (None, self._unpack_failure(body))
+            log_event(logger, logging.DEBUG, 'response.failure',
+                      conn=connection, req=token, body=body[:10])
+            response = (None, self._unpack_failure(bytes(body)))
             
         # Handle a new request then.
         else:
-            logger.debug(msg_id + ' starting.')
+            log_event(logger, logging.DEBUG, 'request.received',
+                      conn=connection, req=token, code=code)
             await self.handle_request(connection, code, token, body)
             # Important to avoid trying to awaken a pending response
             return
@@ -1137,49 +1577,67 @@ class _ReqResMixin:
         waiter = self._responses[connection].pop(token, None)
         
         if waiter is None:
-            logger.warning(msg_id + ' request token unknown.')
-            logger.debug(msg_id + ' code: ' + str(code))
-            logger.debug(msg_id + ' body: ' + str(body[:50]))
+            log_event(logger, logging.WARNING, 'response.unknown_token',
+                      conn=connection, req=token)
+            log_event(logger, logging.DEBUG, 'response.unknown_token',
+                      conn=connection, req=token, code=code, body=body[:50])
         
-        else:
-            logger.debug(msg_id + ' waking sender...')
-            await waiter.put(response)
+        # The sender may have given up (timeout or cancellation) already.
+        elif not waiter.done():
+            log_event(logger, logging.DEBUG, 'response.wake',
+                      conn=connection, req=token)
+            waiter.set_result(response)
         
     async def packit(self, code, token, body):
-        ''' Serialize a message.
+        ''' Serialize a message. Body may be bytes-like, or a tuple or
+        list of bytes-likes. Either way, the body is only copied once,
+        directly into the finished message.
         '''
+        # Wide tokens have their own version, so that either end can tell
+        # them apart. Responses use the same token as the request, and
+        # therefore the same version.
+        if isinstance(token, _WideRequestToken):
+            version = self._WIDE_VERSION_STR
+        else:
+            version = self._VERSION_STR
+        
         # Token is an actual int, so bytes()ing it tries to make that many
         # bytes instead of re-casting it (which is very inconvenient)
-        return self._VERSION_STR + code + bytes(token) + body
+        if isinstance(body, (tuple, list)):
+            return b''.join((version, code, bytes(token), *body))
+        else:
+            return b''.join((version, code, bytes(token), body))
         
     async def unpackit(self, msg):
-        ''' Deserialize a message.
+        ''' Deserialize a message. Everything is sliced out of a single
+        memoryview, so the body is never copied unless the protocol
+        requires actual bytes.
         '''
-        offset = 0
-        field_lengths = [
-            self._VERSION_LEN,
-            self._MSG_CODE_LEN,
-            _RequestToken._PACK_LEN
-        ]
-        
-        results = []
-        for field_length in field_lengths:
-            end = offset + field_length
-            results.append(msg[offset:end])
-            offset = end
-        # Don't forget the body
-        results.append(msg[offset:])
-        
-        # This method feels very inelegant and inefficient but, for now, meh.
-        version, code, token, body = results
-        
-        # Raise if bad version.
-        if version != self._VERSION_STR:
+        view = memoryview(msg)
+        code_start = self._VERSION_LEN
+        token_start = code_start + self._MSG_CODE_LEN
+        
+        # The version determines the token width. Raise if bad version.
+        version = view[:code_start]
+        if version == self._VERSION_STR:
+            token_cls = _RequestToken
+        elif (self._WIDE_VERSION_STR is not None and
+              version == self._WIDE_VERSION_STR):
+            token_cls = _WideRequestToken
+        else:
             raise ProtocolVersionError(type(self).__name__ +
                                        ' received unsupported version: ' +
-                                       str(version))
-            
-        token = _RequestToken.from_bytes(token)
+                                       str(bytes(version)))
+        
+        body_start = token_start + token_cls._PACK_LEN
+        # Codes are used for dict lookups, so keep them as actual bytes.
+        code = bytes(view[code_start:token_start])
+        token = token_cls.from_bytes(view[token_start:body_start])
+        
+        if self._BODY_VIEWS:
+            body = view[body_start:]
+        else:
+            body = msg[body_start:]
         
         return code, token, body
             
@@ -1187,9 +1645,6 @@ class _ReqResMixin:
         ''' Handles an incoming request, for which we need to send a
         response.
         '''
-        # Make a description of our request.
-        req_id = 'CONN ' + str(connection) + ' REQ ' + str(token)
-        
         # First make sure we have a responder for the sent code.
         try:
             req_code_attr = self._RESPONDERS[code]
@@ -1199,8 +1654,8 @@ class _ReqResMixin:
         except KeyError:
             result = self._pack_failure(RequestUnknown(repr(code)))
             logger.warning(
-                req_id + ' FAILED w/ traceback:\n' +
-                ''.join(traceback.format_exc())
+                'CONN %s REQ %s FAILED w/ traceback:', connection, token,
+                exc_info = True
             )
             response = await self.packit(
                 self._FAILURE_CODE,
@@ -1212,12 +1667,14 @@ class _ReqResMixin:
         else:
             # Attempt response
             try:
-                logger.debug(req_id + ' has handler ' + req_code_attr)
+                log_event(logger, logging.DEBUG, 'request.handling',
+                          conn=connection, req=token, handler=req_code_attr)
                 result = await handler.handle(connection, body)
                 response = await self.packit(self._SUCCESS_CODE, token, result)
                 
             except asyncio.CancelledError:
-                logger.debug(req_id + ' handler cancelled.')
+                log_event(logger, logging.DEBUG, 'request.cancelled',
+                          conn=connection, req=token)
                 raise
             
             # Response attempt failed. Pack a failed response with the
@@ -1225,8 +1682,8 @@ class _ReqResMixin:
             except Exception as exc:
                 result = self._pack_failure(exc)
                 logger.warning(
-                    req_id + ' FAILED w/ traceback:\n' +
-                    ''.join(traceback.format_exc())
+                    'CONN %s REQ %s FAILED w/ traceback:', connection, token,
+                    exc_info = True
                 )
                 response = await self.packit(
                     self._FAILURE_CODE,
@@ -1236,30 +1693,28 @@ class _ReqResMixin:
                 
             # Only log a success if we actually had one
             else:
-                logger.info(
-                    req_id + ' SUCCESSFULLY HANDLED w/ partial response ' +
-                    str(response[:10])
-                )
+                log_event(logger, logging.INFO, 'request.handled',
+                          conn=connection, req=token, response=response[:10])
             
         # Attempt to actually send the response
         try:
             await connection.send(response)
             
         except asyncio.CancelledError:
-            logger.debug(req_id + ' response sending cancelled.')
+            log_event(logger, logging.DEBUG, 'request.send_cancelled',
+                      conn=connection, req=token)
             raise
             
         # Unsuccessful. Log the failure.
         except Exception:
             logger.error(
-                req_id + ' FAILED TO SEND RESPONSE w/ traceback:\n' +
-                ''.join(traceback.format_exc())
+                'CONN %s REQ %s FAILED TO SEND RESPONSE w/ traceback:',
+                connection, token, exc_info=True
             )
         
         else:
-            logger.info(
-                req_id + ' completed.'
-            )
+            log_event(logger, logging.INFO, 'request.completed',
+                      conn=connection, req=token)
         
     def _pack_failure(self, exc):
         ''' Converts an exception into an error code and reply body
@@ -1332,58 +1787,89 @@ class _ReqResMixin:
         ''' Does anything necessary to turn a requestor into something
         that can actually perform the request.
         '''
+        # The first request on any connection kicks off token negotiation.
+        # Until it completes, keep using narrow tokens.
+        if (self._WIDE_VERSION_STR is not None and
+                connection not in self._negotiated):
+            self._negotiated.add(connection)
+            loopa.utils.make_background_future(self.negotiate_tokens(
+                connection,
+                timeout = self._NEGOTIATE_TIMEOUT
+            ))
+        
+        try:
+            in_flight = self._in_flight[connection]
+        except KeyError:
+            in_flight = asyncio.Semaphore(self._max_in_flight)
+            self._in_flight[connection] = in_flight
+        
+        async with in_flight:
+            return (await self._perform_request(
+                connection,
+                *args,
+                requestor = requestor,
+                response_handler = response_handler,
+                code = code,
+                timeout = timeout,
+                **kwargs
+            ))
+    
+    async def _perform_request(self, connection, *args, requestor,
+                               response_handler, code, timeout, **kwargs):
+        ''' Actually perform the request, once we have an in-flight
+        slot for it.
+        '''
         # We already have the code, just need the token and body
         # Note that this will automatically ensure we have a self._responses
         # key, so we don't need to call _ensure_responseable later.
         token = self._new_request_token(connection)
-        # Make a message ID for brevity later
-        msg_id = 'CONN ' + str(connection) + ' REQ ' + str(token)
-        # First log entry into wrap requestor.
-        logger.info(msg_id + ' starting request ' + str(code))
+        log_event(logger, logging.DEBUG, 'request.start', conn=connection,
+                  req=token, code=code)
         
-        # Note the use of an explicit self!
-        body = await requestor(self, connection, *args, **kwargs)
-        # Pack the request
-        request = await self.packit(code, token, body)
+        try:
+            # Note the use of an explicit self!
+            body = await requestor(self, connection, *args, **kwargs)
+            # Pack the request
+            request = await self.packit(code, token, body)
+        
+        # Don't leak the token reservation.
+        except BaseException:
+            self._responses[connection].pop(token, None)
+            raise
         
-        # With all of that successful, create a queue for the response, send
+        # With all of that successful, create a future for the response, send
         # the request, and then await the response.
-        waiter = asyncio.Queue(maxsize=1)
+        waiter = asyncio.get_event_loop().create_future()
         try:
             self._responses[connection][token] = waiter
             # For diagnostic purposes (and because it's negligently expensive),
             # time the duration of the request.
             start = time.monotonic()
             await connection.send(request)
-            logger.debug(msg_id + ' sent. Awaiting response.')
+            log_event(logger, logging.DEBUG, 'request.sent', conn=connection,
+                      req=token)
             
             # Wait for the response
             try:
-                response, exc = await asyncio.wait_for(waiter.get(), timeout)
+                response, exc = await asyncio.wait_for(waiter, timeout)
                 
             except asyncio.TimeoutError:
-                logger.warning(msg_id + ' timed out.')
-                # A timeout is the only situation where we remove the waiter
-                # *from the sender*. In all other cases, let the sender clean
-                # up the mess.
-                del self._responses[connection][token]
+                log_event(logger, logging.WARNING, 'request.timeout',
+                          conn=connection, req=token, code=code)
                 raise
             
             end = time.monotonic()
             
-            logger.info(
-                'CONN {!s} REQ {!s} response took {:.3f} seconds.'.format(
-                    connection, token, end - start
-                )
-            )
+            # This is the only per-request INFO line; everything else about
+            # the request's lifecycle is DEBUG.
+            log_event(logger, logging.INFO, 'request.response',
+                      conn=connection, req=token, code=code,
+                      seconds=round(end - start, 3))
             
             # If a response handler was defined, use it!
             if response_handler is not None:
-                logger.debug(
-                    'CONN {!s} REQ {!s} response using BYOB handler.'.format(
-                        connection, token
-                    )
-                )
+                log_event(logger, logging.DEBUG, 'request.byob_handler',
+                          conn=connection, req=token)
                 # Again, note use of explicit self.
                 return (
                     await response_handler(
@@ -1401,27 +1887,39 @@ class _ReqResMixin:
             # There's no define response handler, but the request succeeded.
             # Return the response without modification.
             else:
-                logger.debug(
-                    'CONN {!s} REQ {!s} response using stock handler.'.format(
-                        connection, token
-                    )
-                )
+                log_event(logger, logging.DEBUG, 'request.stock_handler',
+                          conn=connection, req=token)
                 return response
                 
         finally:
+            # Normally the response will have already removed the waiter, but
+            # for timeouts, cancellation, etc, we need to remove it ourselves.
+            self._responses[connection].pop(token, None)
             # Log exit from wrap requestor.
-            logger.info(msg_id + ' exiting request ' + str(code))
+            log_event(logger, logging.DEBUG, 'request.exit', conn=connection,
+                      req=token, code=code)
             
     def _new_request_token(self, connection):
-        ''' Generates a request token for the connection.
+        ''' Generates a request token for the connection. Tokens are
+        issued sequentially, wrapping around at the end of the token
+        space. Since the in-flight limit is far smaller than the token
+        space, the uniqueness check will essentially never loop.
         '''
         self._ensure_responseable(connection)
-        # Get a random-ish (no need for CSRNG) 16-bit token
-        token = random.getrandbits(16)
-        # Repeat until unique
-        while token in self._responses[connection]:
-            token = random.getrandbits(16)
-        token = _RequestToken(token)
+        token = self._last_tokens.get(connection, -1)
+        
+        if connection in self._wide:
+            token_cls = _WideRequestToken
+        else:
+            token_cls = _RequestToken
+        
+        while True:
+            token = (token + 1) % (token_cls._MAX_VAL + 1)
+            if token not in self._responses[connection]:
+                break
+        
+        self._last_tokens[connection] = token
+        token = token_cls(token)
         # Now create an empty entry in the _responses entry (to avoid a race
         # condition) and return the token
         self._responses[connection][token] = None
@@ -0,0 +1,302 @@
+'''
+LICENSING
+-------------------------------------------------
+
+hypergolix: A python Golix client.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the
+    Free Software Foundation, Inc.,
+    51 Franklin Street,
+    Fifth Floor,
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+'''
+
+# External dependencies
+import logging
+import pathlib
+
+from golix._getlow import GIDC
+from golix._getlow import GEOC
+from golix._getlow import GOBS
+from golix._getlow import GOBD
+from golix._getlow import GDXX
+from golix._getlow import GARQ
+
+# Internal dependencies
+from .persistence import _GidcLite
+from .persistence import _GeocLite
+from .persistence import _GobsLite
+from .persistence import _GobdLite
+from .persistence import _GdxxLite
+from .persistence import _GarqLite
+
+from .config import Config
+
+from .utils import SetMap
+
+
+# ###############################################
+# Boilerplate
+# ###############################################
+
+
+logger = logging.getLogger(__name__)
+
+
+# Control * imports.
+__all__ = [
+    'compact',
+]
+
+
+# Lookup for <magic>: (<golix class>, <lite class>)
+_LOADERS = {
+    b'GIDC': (GIDC, _GidcLite),
+    b'GEOC': (GEOC, _GeocLite),
+    b'GOBS': (GOBS, _GobsLite),
+    b'GOBD': (GOBD, _GobdLite),
+    b'GDXX': (GDXX, _GdxxLite),
+    b'GARQ': (GARQ, _GarqLite),
+}
+
+
+# ###############################################
+# Lib
+# ###############################################
+
+
+class CompactionReport:
+    ''' Summarizes the results of a compaction pass.
+    '''
+    
+    def __init__(self, cache_dir, dry_run):
+        self.cache_dir = cache_dir
+        self.dry_run = dry_run
+        
+        self.scanned = 0
+        self.scanned_bytes = 0
+        # Lists of (path, size)
+        self.unparseable = []
+        self.stale_frames = []
+        self.unreachable = []
+        # Number of files actually removed.
+        self.removed = 0
+    
+    @property
+    def reclaimable_bytes(self):
+        ''' Total size of all stale frames and unreachable objects.
+        '''
+        return sum(size for __, size in self.stale_frames + self.unreachable)
+    
+    def __str__(self):
+        if self.dry_run:
+            action = 'Reclaimable'
+        else:
+            action = 'Reclaimed'
+        
+        return '\n'.join((
+            'Cache directory:      ' + str(self.cache_dir),
+            'Objects scanned:      ' + str(self.scanned) + ' (' +
+            str(self.scanned_bytes) + ' bytes)',
+            'Unparseable files:    ' + str(len(self.unparseable)) +
+            ' (left untouched)',
+            'Stale dynamic frames: ' + str(len(self.stale_frames)),
+            'Unreachable objects:  ' + str(len(self.unreachable)),
+            action + ' bytes:' + ' ' * (16 - len(action)) +
+            str(self.reclaimable_bytes),
+        ))
+
+
+def _load(packed):
+    ''' Unpacks a cached object into its lightweight representation.
+    Note that this skips signature verification: everything in the
+    cache was already verified upon ingestion.
+    '''
+    golix_cls, lite_cls = _LOADERS[bytes(packed[:4])]
+    return lite_cls.from_golix(golix_cls.unpack(packed))
+
+
+def _scan(cache_dir, report):
+    ''' Loads every object in the cache directory. Returns a lookup of
+    <addressable ghid>: (<lite obj>, <path>, <size>), with dynamic
+    bindings indexed by their dynamic ghid (and only the most recent
+    frame retained; the rest are recorded as stale).
+    '''
+    objs = {}
+    
+    for path in sorted(cache_dir.iterdir()):
+        if not path.is_file() or path.suffix != '.ghid':
+            continue
+        
+        data = path.read_bytes()
+        report.scanned += 1
+        report.scanned_bytes += len(data)
+        
+        try:
+            obj = _load(data)
+        
+        except Exception:
+            logger.warning('Could not parse ' + str(path) + '; skipping.')
+            report.unparseable.append((path, len(data)))
+            continue
+        
+        entry = (obj, path, len(data))
+        
+        # Dynamic bindings are addressed by their dynamic ghid, so only the
+        # highest counter is actually reachable.
+        if isinstance(obj, _GobdLite) and obj.ghid in objs:
+            existing = objs[obj.ghid]
+            if existing[0].counter < obj.counter:
+                objs[obj.ghid] = entry
+                report.stale_frames.append(existing[1:])
+            else:
+                report.stale_frames.append(entry[1:])
+        
+        else:
+            objs[obj.ghid] = entry
+    
+    return objs
+
+
+def _index_debindings(objs):
+    ''' Returns a SetMap of <target ghid>: <debinding ghid> for all
+    debindings that are legal for their (locally known) targets. This
+    mirrors the author consistency checks performed by the lawyer.
+    '''
+    debindings = SetMap()
+    
+    for obj, __, __ in objs.values():
+        if not isinstance(obj, _GdxxLite) or obj.target not in objs:
+            continue
+        
+        target = objs[obj.target][0]
+        
+        if isinstance(target, _GarqLite):
+            legal = (target.recipient == obj.author)
+        elif isinstance(target, (_GobsLite, _GobdLite, _GdxxLite)):
+            legal = (target.author == obj.author)
+        # Identities and containers cannot be debound.
+        else:
+            legal = False
+        
+        if legal:
+            debindings.add(obj.target, obj.ghid)
+    
+    return debindings
+
+
+def _mark(objs):
+    ''' Returns the set of reachable ghids. Roots are identities, plus
+    any request, binding, or debinding that has not itself been debound.
+    Everything bound by a reachable binding is also reachable.
+    '''
+    debindings = _index_debindings(objs)
+    debound = {}
+    
+    def is_debound(ghid):
+        # Debindings can themselves be debound, so this must recurse. Since
+        # everything is content-addressed, there can be no cycles.
+        try:
+            return debound[ghid]
+        except KeyError:
+            result = any(not is_debound(debinding_ghid)
+                         for debinding_ghid in debindings.get_any(ghid))
+            debound[ghid] = result
+            return result
+    
+    worklist = []
+    for ghid, (obj, __, __) in objs.items():
+        if isinstance(obj, _GidcLite):
+            worklist.append(ghid)
+        elif isinstance(obj, _GeocLite):
+            continue
+        elif not is_debound(ghid):
+            worklist.append(ghid)
+    
+    reachable = set(worklist)
+    while worklist:
+        obj = objs[worklist.pop()][0]
+        
+        if isinstance(obj, (_GobsLite, _GobdLite)):
+            target = obj.target
+            if target in objs and target not in reachable:
+                reachable.add(target)
+                worklist.append(target)
+    
+    return reachable
+
+
+def compact(cache_dir, dry_run=False):
+    ''' Performs an offline mark-and-sweep of the librarian cache at
+    cache_dir, removing stale dynamic frames and anything unreachable.
+    Returns a CompactionReport.
+    
+    This MUST NOT be run against the cache of a running server or app;
+    the librarian assumes it is the only writer.
+    '''
+    cache_dir = pathlib.Path(cache_dir)
+    if not cache_dir.is_dir():
+        raise ValueError('Not a cache directory: ' + str(cache_dir))
+    
+    report = CompactionReport(cache_dir, dry_run)
+    objs = _scan(cache_dir, report)
+    reachable = _mark(objs)
+    
+    for ghid, (obj, path, size) in objs.items():
+        if ghid not in reachable:
+            report.unreachable.append((path, size))
+    
+    if not dry_run:
+        for path, __ in report.stale_frames + report.unreachable:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            else:
+                report.removed += 1
+    
+    return report
+
+
+def handle_args(namespace):
+    ''' Entry point for the CLI (hypergolix compact).
+    '''
+    if namespace.cachedir is not None:
+        cache_dir = pathlib.Path(namespace.cachedir)
+        pid_file = None
+    
+    else:
+        config = Config.find()
+        if namespace.app:
+            cache_dir = config.process.ghidcache
+            pid_file = config.process.pid_file
+        else:
+            cache_dir = config.server.ghidcache
+            pid_file = config.server.pid_file
+    
+    if pid_file is not None and pid_file.exists() and not namespace.force:
+        raise RuntimeError('Found PID file ' + str(pid_file) + '. Stop ' +
+                           'Hypergolix before compacting its cache, or ' +
+                           'pass --force if the PID file is stale.')
+    
+    report = compact(cache_dir, dry_run=namespace.dry_run)
+    print(report)
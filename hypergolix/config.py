@@ -437,6 +437,8 @@ class Process(metaclass=_AutoMapper):
     logdir = AutoField(decode=pathlib.Path, encode=str)
     pid_file = AutoField(decode=pathlib.Path, encode=str)
     ipc_port = AutoField()
+    ipc_socket = AutoField(decode=pathlib.Path, encode=str)
+    ipc_shm_threshold = AutoField()
     
     
 class Server(metaclass=_AutoMapper):
@@ -445,8 +447,10 @@ class Server(metaclass=_AutoMapper):
     pid_file = AutoField(decode=pathlib.Path, encode=str)
     host = AutoField()
     port = AutoField()
+    tcp_port = AutoField()
     verbosity = AutoField()
     debug = AutoField()
+    peers = AutoField(Remote, listed=True)
     
     
 class Config(metaclass=_AutoMapper):
@@ -35,6 +35,8 @@ Some notes:
 
 # External deps
 import logging
+import collections
+import time
 import weakref
 import threading
 import traceback
@@ -44,6 +46,7 @@ import asyncio
 from golix import FirstParty
 from golix import SecondParty
 from golix import Ghid
+from loopa.utils import make_background_future
 
 # Internal deps
 from .hypothetical import API
@@ -54,8 +57,11 @@ from .hypothetical import fixture_noop
 from .utils import NoContext
 from .utils import weak_property
 from .utils import readonly_property
+from .utils import SetMap
+from .utils import LatencyTracker
 
 from .persistence import _GeocLite
+from .persistence import _GobdLite
 
 from .exceptions import UnknownParty
 
@@ -101,11 +107,9 @@ class GolixCore(metaclass=API):
         _identity isinstance golix.FirstParty
         '''
         super().__init__(*args, **kwargs)
-        self._mutex_request = threading.Lock()
-        self._mutex_container = threading.Lock()
-        self._mutex_sbinding = threading.Lock()
-        self._mutex_dbinding = threading.Lock()
-        self._mutex_xbinding = threading.Lock()
+        # Golix identities aren't threadsafe, so instead of serializing all
+        # crypto behind locks, every thread gets its own copy of it.
+        self._thread_identities = threading.local()
         
         # Added during bootstrap
         self.__identity = None
@@ -153,6 +157,25 @@ class GolixCore(metaclass=API):
         '''
         self.__identity = identity
         
+    def _local_identity(self):
+        ''' Get the current thread's copy of our identity, creating it
+        if necessary. Copies are independent, so operations using them
+        can run concurrently across the executor.
+        '''
+        identity = self.__identity
+        if identity is None:
+            return FirstParty
+        
+        local = self._thread_identities
+        # Make a fresh copy if the identity changed since our last one.
+        if getattr(local, 'source', None) is not identity:
+            local.identity = type(identity)._from_serialized(
+                identity._serialize()
+            )
+            local.source = identity
+        
+        return local.identity
+    
     @property
     @public_api
     def whoami(self):
@@ -182,9 +205,7 @@ class GolixCore(metaclass=API):
         ''' Just like it says on the label...
         Note that the request is PACKED, not unpacked.
         '''
-        with self._mutex_request:
-            unpacked = self._identity.unpack_request(request)
-        return unpacked
+        return self._local_identity().unpack_request(request)
         
     @public_api
     async def open_request(self, unpacked):
@@ -222,7 +243,7 @@ class GolixCore(metaclass=API):
         ''' Just like it says on the label...
         Note that the request is UNPACKED, not packed.
         '''
-        return self._identity.receive_request(requestor, unpacked)
+        return self._local_identity().receive_request(requestor, unpacked)
     
     @public_api
     async def make_request(self, recipient, payload):
@@ -255,11 +276,34 @@ class GolixCore(metaclass=API):
         
     def _make_request(self, recipient, payload):
         # Just like it says on the label...
-        with self._mutex_request:
-            return self._identity.make_request(
-                recipient = recipient,
-                request = payload,
-            )
+        return self._local_identity().make_request(
+            recipient = recipient,
+            request = payload,
+        )
+    
+    @public_api
+    async def unpack_container(self, container):
+        ''' Just like it says on the label...
+        Note that the container is PACKED, and this doesn't open it.
+        '''
+        # Run the actual function in the executor
+        return (await self._loop.run_in_executor(
+            self._executor,
+            self._unpack_container,
+            container
+        ))
+    
+    @unpack_container.fixture
+    async def unpack_container(self, container):
+        ''' Bypass executor for the fixture.
+        '''
+        return self._unpack_container(container)
+    
+    def _unpack_container(self, container):
+        ''' Just like it says on the label...
+        Note that the container is PACKED, and this doesn't open it.
+        '''
+        return self._local_identity().unpack_container(container)
     
     @public_api
     async def open_container(self, container, secret):
@@ -289,12 +333,11 @@ class GolixCore(metaclass=API):
         
     def _open_container(self, container, secret, author):
         # Wrapper around golix.FirstParty.receive_container.
-        with self._mutex_container:
-            return self._identity.receive_container(
-                author = author,
-                secret = secret,
-                container = container
-            )
+        return self._local_identity().receive_container(
+            author = author,
+            secret = secret,
+            container = container
+        )
     
     @public_api
     async def make_container(self, data, secret):
@@ -315,11 +358,10 @@ class GolixCore(metaclass=API):
         
     def _make_container(self, data, secret):
         # Simple wrapper around golix.FirstParty.make_container
-        with self._mutex_container:
-            return self._identity.make_container(
-                secret = secret,
-                plaintext = data
-            )
+        return self._local_identity().make_container(
+            secret = secret,
+            plaintext = data
+        )
 
     @public_api
     async def make_binding_stat(self, target):
@@ -341,8 +383,7 @@ class GolixCore(metaclass=API):
     def _make_binding_stat(self, target):
         # Note that this requires no open() method, as bindings are verified by
         # the local persister.
-        with self._mutex_sbinding:
-            return self._identity.make_bind_static(target)
+        return self._local_identity().make_bind_static(target)
     
     @public_api
     async def make_binding_dyn(self, target, ghid=None, history=None):
@@ -393,12 +434,11 @@ class GolixCore(metaclass=API):
         else:
             target_vector = [target]
         
-        with self._mutex_dbinding:
-            return self._identity.make_bind_dynamic(
-                counter = counter,
-                target_vector = target_vector,
-                ghid_dynamic = ghid
-            )
+        return self._local_identity().make_bind_dynamic(
+            counter = counter,
+            target_vector = target_vector,
+            ghid_dynamic = ghid
+        )
     
     @public_api
     async def make_debinding(self, target):
@@ -418,20 +458,41 @@ class GolixCore(metaclass=API):
         
     def _make_debinding(self, target):
         # Simple wrapper around golix.FirstParty.make_debind
-        with self._mutex_xbinding:
-            return self._identity.make_debind(target)
+        return self._local_identity().make_debind(target)
 
 
 class GhidProxier(metaclass=API):
     ''' Resolve the base container GHID from any associated ghid. Uses
     all weak references, so should not interfere with GCing objects.
     '''
-    # Note that we can't really cache aliases, because their proxies will
-    # not update when we change things unless the proxy is also removed
-    # from the cache. Since the objects may (or may not) exist locally in
-    # memory anyways, we should just take advantage of that, and allow our
-    # inquisitor to more easily manage memory consumption as well.
+    # Resolutions are cached, so we need to know whenever one of the bindings
+    # along the way changes. The librarian tells us about that, whenever it
+    # stores or abandons a binding, through invalidate().
     _librarian = weak_property('__librarian')
+    # Default maximum number of cached resolutions
+    CACHE_SIZE = 4096
+    
+    def __init__(self, *args, cache_size=None, **kwargs):
+        ''' Set up the resolution cache. Once it holds cache_size
+        resolutions, the least recently used ones are dropped.
+        '''
+        super().__init__(*args, **kwargs)
+        
+        if cache_size is None:
+            self._cache_size = self.CACHE_SIZE
+        else:
+            self._cache_size = int(cache_size)
+        
+        # Lookup <ghid>: <resolved container ghid>, ordered from least to most
+        # recently used.
+        self._resolved = collections.OrderedDict()
+        # Lookup <ghid>: tuple(<binding ghids it was resolved through>)
+        self._chains = {}
+        # Lookup <binding ghid>: set(<ghids resolved through it>)
+        self._dependents = SetMap()
+        # Incremented on every invalidation, so that we don't cache anything
+        # that was invalidated while we were resolving it.
+        self._generation = 0
     
     @fixture_api
     def __init__(self, *args, **kwargs):
@@ -443,6 +504,23 @@ class GhidProxier(metaclass=API):
     def assemble(self, librarian):
         # Chicken, meet egg.
         self._librarian = librarian
+        librarian.add_binding_listener(self)
+    
+    def invalidate(self, ghid):
+        ''' Forget every cached resolution that went through the binding
+        at ghid (including a resolution of ghid itself). Idempotent.
+        '''
+        self._generation += 1
+        
+        for dependent in self._dependents.pop_any(ghid):
+            self._resolved.pop(dependent, None)
+            self._forget_chain(dependent)
+    
+    def _forget_chain(self, ghid):
+        ''' Stop tracking the bindings that ghid was resolved through.
+        '''
+        for link in self._chains.pop(ghid, ()):
+            self._dependents.discard(link, ghid)
         
     def __mklink(self, proxy, target):
         ''' Set, or update, a ghid proxy.
@@ -473,12 +551,40 @@ class GhidProxier(metaclass=API):
         '''
         if not isinstance(ghid, Ghid):
             raise TypeError('Can only resolve a ghid.')
+        
+        try:
+            result = self._resolved[ghid]
+        except KeyError:
+            pass
+        else:
+            self._resolved.move_to_end(ghid)
+            return result
+        
+        generation = self._generation
+        chain = []
+        result = await self._resolve(ghid, chain)
+        
+        # Don't cache misses (they'll be resolvable once the librarian has
+        # them), nor anything that may have changed while we were resolving.
+        if None not in chain and generation == self._generation:
+            # Concurrent resolutions of the same ghid may both get here.
+            self._forget_chain(ghid)
+            self._resolved[ghid] = result
+            self._resolved.move_to_end(ghid)
+            self._chains[ghid] = tuple(chain)
+            for link in chain:
+                self._dependents.add(link, ghid)
             
-        return (await self._resolve(ghid))
+            while len(self._resolved) > self._cache_size:
+                evicted, __ = self._resolved.popitem(last=False)
+                self._forget_chain(evicted)
+        
+        return result
         
-    async def _resolve(self, ghid):
+    async def _resolve(self, ghid, chain=None):
         ''' Recursively resolves the container ghid for a proxy (or a
-        container).
+        container). If passed, chain is extended with every binding we
+        go through, and with None if anything along the way was missing.
         '''
         try:
             obj = await self._librarian.summarize(ghid)
@@ -493,13 +599,17 @@ class GhidProxier(metaclass=API):
             )))
             
             result = ghid
+            if chain is not None:
+                chain.append(None)
         
         else:
             if isinstance(obj, _GeocLite):
                 result = ghid
                 
             else:
-                result = await self._resolve(obj.target)
+                if chain is not None:
+                    chain.append(ghid)
+                result = await self._resolve(obj.target, chain)
                 
         return result
         
@@ -535,13 +645,32 @@ class Oracle(metaclass=API):
         ''' Sets up internal tracking.
         '''
         super().__init__(*args, **kwargs)
-        self._lookup = {}
+        # Ordered from least to most recently used, for the inquisitor.
+        self._lookup = collections.OrderedDict()
+        # Evicted objects that may still be alive elsewhere. If so, we revive
+        # them instead of creating duplicates.
+        self._evicted = weakref.WeakValueDictionary()
+        # Ghids that must never be evicted
+        self._pinned = set()
+        # Salmonator deregistration finalizers, so eviction can run them early
+        self._finalizers = {}
         
+        # Metrics for loading objects that weren't in memory, by stage. Note
+        # that the first three stages run concurrently.
+        self.cold_pull_latency = LatencyTracker()
+        self.cold_subscribe_latency = LatencyTracker()
+        self.cold_prefetch_latency = LatencyTracker()
+        self.cold_unpack_latency = LatencyTracker()
+        self.cold_load_latency = LatencyTracker()
+    
     @fixture_api
     def RESET(self):
         ''' Simply re-call init.
         '''
         self._lookup.clear()
+        self._evicted.clear()
+        self._pinned.clear()
+        self._finalizers.clear()
         
     def assemble(self, golcore, ghidproxy, privateer, percore, librarian,
                  salmonator):
@@ -583,33 +712,48 @@ class Oracle(metaclass=API):
                     'GAO ' + str(ghid) + ' acceptable for ' + str(gaoclass)
                 )
                 
+            self._lookup.move_to_end(ghid)
             await obj._ctx.wait()
             if ghid not in self._lookup:
                 raise RuntimeError('Contentious delete while getting object.')
         
         else:
-            logger.info(
-                'GAO ' + str(ghid) +
-                ' not currently in Oracle memory. Attempting load as: ' +
-                str(gaoclass)
-            )
+            obj = self._evicted.pop(ghid, None)
             
-            # First create the actual GAO. We do not need to have the ghid
-            # downloaded to do this -- object creation is just making a Python
-            # object locally.
-            obj = gaoclass(
-                ghid,
-                None,   # dynamic
-                None,   # author
-                7,      # legroom (will be overwritten by pull)
-                *args,
-                golcore = self._golcore,
-                ghidproxy = self._ghidproxy,
-                privateer = self._privateer,
-                percore = self._percore,
-                librarian = self._librarian,
-                **kwargs
-            )
+            # The object was evicted, but something else kept it alive. It was
+            # unsubscribed upon eviction, so it just needs a refresh.
+            if isinstance(obj, gaoclass):
+                logger.info(
+                    'GAO ' + str(ghid) + ' was evicted but is still alive. '
+                    'Reviving as: ' + str(type(obj))
+                )
+                revived = True
+            
+            else:
+                logger.info(
+                    'GAO ' + str(ghid) +
+                    ' not currently in Oracle memory. Attempting load as: ' +
+                    str(gaoclass)
+                )
+                revived = False
+                
+                # First create the actual GAO. We do not need to have the ghid
+                # downloaded to do this -- object creation is just making a
+                # Python object locally.
+                obj = gaoclass(
+                    ghid,
+                    None,   # dynamic
+                    None,   # author
+                    7,      # legroom (will be overwritten by pull)
+                    *args,
+                    golcore = self._golcore,
+                    ghidproxy = self._ghidproxy,
+                    privateer = self._privateer,
+                    percore = self._percore,
+                    librarian = self._librarian,
+                    salmonator = self._salmonator,
+                    **kwargs
+                )
             
             # TODO: fix leaky abstraction
             obj._ctx = asyncio.Event()
@@ -618,30 +762,17 @@ class Oracle(metaclass=API):
             # in all subsequent calls, without a race condition.
             self._lookup[ghid] = obj
             
+            self._add_finalizer(ghid, obj)
+            
             try:
-                # Now immediately subscribe to the object upstream, so that there
-                # is no race condition getting updates
-                await self._salmonator.register(ghid)
-                # Add deregister as a finalizer, but don't call it atexit. TODO:
-                # fix leaky abstraction
-                finalizer = weakref.finalize(obj, self._salmonator._deregister,
-                                             ghid)
-                finalizer.atexit = False
-                # Explicitly pull the object from salmonator to ensure we have
-                # the newest version, and that it is available locally in
-                # librarian if also available anywhere else. Note that
-                # salmonator handles modal switching for dynamic/static. It
-                # will also (by default, with skip_refresh=False) pull in any
-                # updates that have accumulated in the meantime.
-                await self._salmonator.attempt_pull(ghid, quiet=True)
-                
-                # Now actually fetch the object. This may KeyError if the
-                # ghid is still unknown.
-                await obj._pull()
+                await self._cold_load(ghid, obj)
             
             # Got an exception? Revert the lookup and reraise
             except Exception:
                 del self._lookup[ghid]
+                if revived:
+                    self._evicted[ghid] = obj
+                    self._deregister_early(ghid)
                 raise
                 
             # We have to release other waiters regardless
@@ -651,6 +782,98 @@ class Oracle(metaclass=API):
             
         return obj
         
+    async def _cold_load(self, ghid, obj):
+        ''' Load an object that isn't in memory. Subscribing upstream,
+        pulling the newest version, and prefetching the container of any
+        binding we already have locally all happen concurrently. Then the
+        object itself is pulled from the librarian.
+        '''
+        start = time.monotonic()
+        
+        # Explicitly pull the object from salmonator to ensure we have the
+        # newest version, and that it is available locally in librarian if
+        # also available anywhere else. Note that salmonator handles modal
+        # switching for dynamic/static.
+        pull = asyncio.ensure_future(self._timed(
+            self.cold_pull_latency,
+            self._salmonator.attempt_pull(ghid, quiet=True)
+        ))
+        subscribe = asyncio.ensure_future(self._timed(
+            self.cold_subscribe_latency,
+            self._subscribe(ghid, pull)
+        ))
+        stages = {
+            pull,
+            subscribe,
+            asyncio.ensure_future(self._timed(
+                self.cold_prefetch_latency,
+                self._prefetch(ghid)
+            ))
+        }
+        
+        try:
+            await asyncio.gather(*stages)
+        
+        except Exception:
+            for stage in stages:
+                stage.cancel()
+            raise
+        
+        # Now actually fetch the object. This may KeyError if the ghid is
+        # still unknown.
+        await self._timed(self.cold_unpack_latency, obj._pull())
+        self.cold_load_latency.since(start)
+        
+        # If the subscription had to wait for the pull, anything that changed
+        # upstream in between would otherwise be missed. If there was
+        # anything, the postman will deliver it to the object like any other
+        # update. Otherwise, the subscription ran alongside the pull, and
+        # there's no gap to cover.
+        if obj.dynamic and subscribe.result():
+            make_background_future(
+                self._salmonator.attempt_pull(ghid, quiet=True)
+            )
+    
+    async def _subscribe(self, ghid, pull):
+        ''' Subscribe to the ghid upstream. The salmonator needs to know
+        what kind of object it is, so if we don't have it locally, wait
+        for the pull first. Returns True if we had to wait.
+        '''
+        waited = not (await self._librarian.contains(ghid))
+        if waited:
+            await asyncio.shield(pull)
+        
+        await self._salmonator.register(ghid)
+        return waited
+    
+    async def _prefetch(self, ghid):
+        ''' If we already have a binding for ghid, but not its target,
+        start fetching the target immediately, instead of waiting for
+        the newest binding to arrive first. Usually that's the same
+        target, and concurrent pulls for it are coalesced.
+        '''
+        try:
+            binding = await self._librarian.summarize(ghid)
+        except KeyError:
+            return
+        
+        if isinstance(binding, _GobdLite):
+            if not (await self._librarian.contains(binding.target)):
+                await self._salmonator.attempt_pull(
+                    binding.target,
+                    quiet = True
+                )
+    
+    @staticmethod
+    async def _timed(tracker, coro):
+        ''' Await the coro, recording how long it took with tracker.
+        '''
+        start = time.monotonic()
+        try:
+            return (await coro)
+        finally:
+            tracker.since(start)
+    
     @get_object.fixture
     async def get_object(self, gaoclass, ghid, *args, **kwargs):
         ''' Do the easy thing and just pull it out of lookup.
@@ -668,6 +891,7 @@ class Oracle(metaclass=API):
             privateer = self,   # It's not going to be used and may not exist
             percore = self,     # It's not going to be used and may not exist
             librarian = self,   # It's not going to be used and may not exist
+            salmonator = self,  # It's not going to be used and may not exist
             **kwargs
         )
             
@@ -690,6 +914,7 @@ class Oracle(metaclass=API):
             privateer = self._privateer,
             percore = self._percore,
             librarian = self._librarian,
+            salmonator = self._salmonator,
             **kwargs
         )
         await obj._push()
@@ -703,13 +928,27 @@ class Oracle(metaclass=API):
         # Finally, register to receive any concurrent updates from other
         # simultaneous sessions, and then return the object
         await self._salmonator.register(obj.ghid)
-        # Add deregister as a finalizer, but don't call it atexit. TODO: fix
-        # leaky abstraction
-        finalizer = weakref.finalize(obj, self._salmonator._deregister,
-                                     obj.ghid)
-        finalizer.atexit = False
+        self._add_finalizer(obj.ghid, obj)
         
         return obj
+    
+    def _add_finalizer(self, ghid, obj):
+        ''' Add deregister as a finalizer, but don't call it atexit. TODO:
+        fix leaky abstraction
+        '''
+        finalizer = weakref.finalize(obj, self._salmonator._deregister, ghid)
+        finalizer.atexit = False
+        self._finalizers[ghid] = finalizer
+    
+    def _deregister_early(self, ghid):
+        ''' Deregister ghid from the salmonator now, instead of waiting
+        for its finalizer.
+        '''
+        finalizer = self._finalizers.pop(ghid, None)
+        if finalizer is not None:
+            finalizer.detach()
+        
+        self._salmonator._deregister(ghid)
             
     @new_object.fixture
     async def new_object(self, gaoclass, dynamic, legroom, *args, **kwargs):
@@ -729,6 +968,7 @@ class Oracle(metaclass=API):
             privateer = self,   # It's not going to be used and may not exist
             percore = self,     # It's not going to be used and may not exist
             librarian = self,   # It's not going to be used and may not exist
+            salmonator = self,  # It's not going to be used and may not exist
             **kwargs
         )
         
@@ -742,11 +982,69 @@ class Oracle(metaclass=API):
         
         Indempotent; will not raise KeyError if called more than once.
         '''
+        # Don't revive it, either. Its finalizer stays attached, and will still
+        # deregister it once it's GC'd.
+        self._evicted.pop(ghid, None)
+        self._pinned.discard(ghid)
+        self._finalizers.pop(ghid, None)
+        
         try:
             del self._lookup[ghid]
         except KeyError:
             logger.debug(str(ghid) + ' unknown to oracle.')
             
+    def evict(self, ghid):
+        ''' Removes the object from the cache to free up memory. Unlike
+        forget, if something else is still using the object, the next
+        get_object will revive it instead of creating a duplicate. The
+        object is immediately deregistered from the salmonator, so that
+        updates aren't delivered to something the oracle doesn't track.
+        
+        Returns True if the object was evicted, False if unknown or
+        pinned.
+        '''
+        if ghid in self._pinned:
+            return False
+        
+        try:
+            obj = self._lookup.pop(ghid)
+        except KeyError:
+            return False
+        
+        self._evicted[ghid] = obj
+        self._deregister_early(ghid)
+        return True
+    
+    def pin(self, ghid):
+        ''' Prevent the object from ever being evicted. Used for objects
+        that can't be reloaded through get_object, like the account's
+        own GAOs.
+        '''
+        self._pinned.add(ghid)
+    
+    def is_pinned(self, ghid):
+        ''' Check if the object has been pinned.
+        '''
+        return ghid in self._pinned
+    
+    def by_recency(self):
+        ''' Returns a list of (ghid, obj) tuples, from the least to the
+        most recently used.
+        '''
+        return list(self._lookup.items())
+    
+    def lingering(self):
+        ''' Returns a list of (ghid, obj) tuples for evicted objects
+        that are still alive elsewhere.
+        '''
+        return list(self._evicted.items())
+    
+    def is_loaded(self, ghid):
+        ''' Check if the object is in memory, either in cache, or evicted
+        but still alive elsewhere.
+        '''
+        return ghid in self._lookup or ghid in self._evicted
+    
     def __contains__(self, ghid):
         ''' Checks for the ghid in cache (but does not check for global
         availability; that would require checking the persister for its
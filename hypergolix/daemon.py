@@ -556,6 +556,8 @@ def run_daemon(cfg_path, pid_file, parent_port, account_entity,
         )
         
         ipc_port = config.process.ipc_port
+        ipc_socket = config.process.ipc_socket
+        ipc_shm_threshold = config.process.ipc_shm_threshold
         remotes = config.remotes
         # Look to see if we have an existing user_id to determine behavior
         save_cfg = not bool(config.user.user_id)
@@ -563,6 +565,8 @@ def run_daemon(cfg_path, pid_file, parent_port, account_entity,
         hgxcore = _DaemonCore(
             cache_dir = cache_dir,
             ipc_port = ipc_port,
+            ipc_socket = ipc_socket,
+            ipc_shm_threshold = ipc_shm_threshold,
             reusable_loop = False,
             threaded = False,
             debug = debug,
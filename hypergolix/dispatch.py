@@ -52,6 +52,9 @@ from .hypothetical import fixture_api
 from .hypothetical import fixture_noop
 
 from .gao import GAOCore
+from .gao import _check_codec
+from .gao import _compress_payload
+from .gao import _decompress_payload
 
 from .utils import AppToken
 from .utils import ApiID
@@ -172,6 +175,9 @@ class Dispatcher(metaclass=API):
         # connections remain that have it
         self._obj_binding = WeakSetMap()
         
+        # Lookup <api ID>: <compression codec name>
+        self._compression_by_api = {}
+    
     @__init__.fixture
     def __init__(self, *args, **kwargs):
         ''' Create a dispatch fixture.
@@ -194,6 +200,12 @@ class Dispatcher(metaclass=API):
         # Reverse lookup <connection/session/conn>: <app token>
         self._token_from_conn = weakref.WeakKeyDictionary()
         
+        # Lookup <dispatchable>: set(<connection/session/conn>)
+        self._obj_binding = WeakSetMap()
+        
+        # Lookup <api ID>: <compression codec name>
+        self._compression_by_api = {}
+    
     @fixture_api
     def RESET(self):
         ''' Reset the fixture to a pristine state.
@@ -215,6 +227,28 @@ class Dispatcher(metaclass=API):
         self._oracle = oracle
         self._ipc_protocol = ipc_protocol
         
+    def set_compression(self, api_id, codec):
+        ''' Compress the state of all dispatchables with the api_id using
+        the named codec (ex: 'zlib'), or stop compressing them if codec
+        is None. Individual dispatchables may override this.
+        '''
+        _check_codec(codec)
+        
+        if codec is None:
+            self._compression_by_api.pop(api_id, None)
+        else:
+            self._compression_by_api[api_id] = codec
+    
+    def compression_lookup(self, api_id):
+        ''' Get the compression codec name for the api_id, or None.
+        '''
+        return self._compression_by_api.get(api_id)
+    
+    def is_tracked(self, obj):
+        ''' Check if any connections are currently tracking the object.
+        '''
+        return bool(self._obj_binding.get_any(obj))
+    
     @public_api
     def bootstrap(self, account):
         ''' Initialize distributed state.
@@ -722,6 +756,9 @@ class _Dispatchable(GAOCore, metaclass=API):
     _account = weak_property('__account')
     _ipc_protocol = weak_property('__ipc_protocol')
     api_id = immutable_property('_api_id')
+    # Codec name for compressing state. If None, defer to the dispatcher's
+    # setting for our api_id.
+    compression = None
     
     def __init__(self, *args, api_id, state, dispatch, ipc_protocol, account,
                  **kwargs):
@@ -771,8 +808,22 @@ class _Dispatchable(GAOCore, metaclass=API):
         to pack more complex objects. Should always be a staticmethod or
         classmethod.
         '''
-        version = b'\x00'
-        return b'hgxd' + version + bytes(self.api_id) + self.state
+        codec = self.compression
+        if codec is None:
+            codec = self._dispatch.compression_lookup(self.api_id)
+        
+        compressed = _compress_payload(self.state, codec)
+        
+        # Uncompressed states keep the original version, so that older
+        # clients can still read them.
+        if compressed is None:
+            version = b'\x00'
+            return b'hgxd' + version + bytes(self.api_id) + self.state
+        
+        else:
+            version = b'\x01'
+            ident, payload = compressed
+            return b'hgxd' + version + bytes(self.api_id) + ident + payload
         
     async def unpack_gao(self, packed):
         ''' Unpacks state from a bytes object. May be overwritten in
@@ -785,7 +836,7 @@ class _Dispatchable(GAOCore, metaclass=API):
         
         if magic != b'hgxd':
             raise DispatchError('Object does not appear to be dispatchable.')
-        elif version != b'\x00':
+        elif version not in (b'\x00', b'\x01'):
             raise DispatchError('Incompatible dispatchable version number.')
         elif getattr(self, 'api_id', None) is None:
             self.api_id = api_id
@@ -799,8 +850,11 @@ class _Dispatchable(GAOCore, metaclass=API):
         # I guess.
         # elif api_id != self.api_id:
         #     raise DispatchError('Cannot change API ID.')
-            
-        self.state = packed[70:]
+        
+        if version == b'\x01':
+            self.state = _decompress_payload(packed[70:71], packed[71:])
+        else:
+            self.state = packed[70:]
     
     @fixture_noop
     @public_api
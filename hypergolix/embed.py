@@ -65,6 +65,7 @@ from .exceptions import HGXLinkError
 
 from .comms import ConnectionManager
 from .comms import WSConnection
+from .comms import UnixConnection
 from .ipc import IPCClientProtocol
 
 # from .objproxy import ObjBase
@@ -107,9 +108,15 @@ class HGXLink(loopa.TaskCommander, metaclass=TriplicateAPI):
     
     @public_api
     def __init__(self, ipc_port=7772, autostart=True, *args, aengel=None,
-                 threaded=True, ipc_fixture=None, **kwargs):
+                 threaded=True, ipc_fixture=None, ipc_socket=None,
+                 ipc_shm_threshold=None, **kwargs):
         ''' Args:
         ipc_port    is self-explanatory
+        ipc_socket  if defined, connect to IPC through the Unix domain
+                    socket at this path instead of through ipc_port
+        ipc_shm_threshold
+                    if defined, send object states at least this many
+                    bytes long to the daemon through shared memory
         autostart   True -> immediately start the link
                     False -> app must explicitly start() the link
         debug       Sets debug mode for eg. asyncio
@@ -125,19 +132,25 @@ class HGXLink(loopa.TaskCommander, metaclass=TriplicateAPI):
         
         # Normally we'll need to define the protocol and the connection manager
         if ipc_fixture is None:
-            ipc_protocol = IPCClientProtocol()
+            ipc_protocol = IPCClientProtocol(
+                shm_threshold = ipc_shm_threshold
+            )
+            
+            if ipc_socket is None:
+                connection_cls = WSConnection
+                conn_kwargs = {'host': 'localhost', 'port': ipc_port,
+                               'tls': False}
+            else:
+                connection_cls = UnixConnection
+                conn_kwargs = {'path': ipc_socket}
+            
             ipc_manager = ConnectionManager(
-                connection_cls = WSConnection,
+                connection_cls = connection_cls,
                 msg_handler = ipc_protocol,
                 conn_init = self.conn_init,
                 conn_close = self.conn_close
             )
-            self.register_task(
-                ipc_manager,
-                host = 'localhost',
-                port = ipc_port,
-                tls = False
-            )
+            self.register_task(ipc_manager, **conn_kwargs)
             ipc_protocol.assemble(hgxlink=self)
             self._ipc_manager = ipc_manager
             self._ipc_protocol = ipc_protocol
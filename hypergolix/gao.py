@@ -36,12 +36,22 @@ import logging
 import asyncio
 import traceback
 import collections
+import collections.abc
 import functools
 import weakref
 import pickle
+import copy
+import time
+import zlib
 # Used to make random ghids for fixturing gao
 import random
 
+# Not every python build includes lzma.
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
 from golix import Ghid
 from golix import SecurityError
 from loopa.utils import await_coroutine_threadsafe
@@ -103,6 +113,135 @@ MUTATING_PROXY_CORO = object()
 MUTATING_PROXY_FUNC = object()
 
 
+# Frames for delta-encoded GAOs. Snapshots remain bare pickles (which always
+# start with the pickle PROTO opcode), so these can never be confused.
+_DELTA_MAGIC = b'hgxl'
+_DELTA_VERSION = b'\x00'
+
+
+# The snapshot that delta frames are applied against. Hold is the ghid of the
+# static binding keeping the snapshot container alive (if known), and length
+# is the size of the snapshot, used to decide when deltas stop being worth it.
+_DeltaBase = collections.namedtuple(
+    '_DeltaBase',
+    ('ghid', 'secret', 'hold', 'length')
+)
+
+
+# Compressed pickle-based GAOs are framed with this, followed by the codec id.
+# Uncompressed frames are untouched, so older clients can still read them.
+_COMPRESSED_MAGIC = b'hgxz'
+# Don't bother compressing anything smaller than this.
+COMPRESSION_MIN_SIZE = 512
+
+
+def _zlib_compress(data):
+    return zlib.compress(data, 6)
+
+
+# Lookup <codec name>: (<codec id>, <compress>, <decompress>)
+_CODECS = {
+    'zlib': (b'\x01', _zlib_compress, zlib.decompress),
+}
+if lzma is not None:
+    _CODECS['lzma'] = (b'\x02', lzma.compress, lzma.decompress)
+# Lookup <codec id>: <decompress>
+_DECOMPRESSORS = {ident: decompress for ident, __, decompress in
+                  _CODECS.values()}
+
+
+class _CompressionStats:
+    ''' Running totals for GAO payload compression, across all GAOs.
+    '''
+    
+    def __init__(self):
+        # Payloads we compressed, and payloads where we didn't bother (too
+        # small, or compression didn't help).
+        self.compressed = 0
+        self.skipped = 0
+        # Sizes before and after, for compressed payloads only
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.compress_seconds = 0
+        self.decompressed = 0
+        self.decompress_seconds = 0
+    
+    @property
+    def ratio(self):
+        ''' Compressed size over uncompressed size, or None if nothing
+        has been compressed.
+        '''
+        if self.bytes_in:
+            return self.bytes_out / self.bytes_in
+        else:
+            return None
+
+
+COMPRESSION_STATS = _CompressionStats()
+
+
+def _check_codec(codec):
+    ''' Raise ValueError if codec isn't None or a supported codec name.
+    '''
+    if codec is not None and codec not in _CODECS:
+        raise ValueError('Unsupported compression codec: ' + str(codec))
+
+
+def _compress_payload(data, codec):
+    ''' Compress data using the named codec. Returns a tuple of
+    (codec id, compressed), or None if the data should be stored
+    uncompressed.
+    '''
+    if codec is None:
+        return None
+    
+    _check_codec(codec)
+    ident, compress, __ = _CODECS[codec]
+    
+    if len(data) < COMPRESSION_MIN_SIZE:
+        COMPRESSION_STATS.skipped += 1
+        return None
+    
+    start = time.perf_counter()
+    compressed = compress(data)
+    COMPRESSION_STATS.compress_seconds += time.perf_counter() - start
+    
+    if len(compressed) >= len(data):
+        COMPRESSION_STATS.skipped += 1
+        return None
+    
+    COMPRESSION_STATS.compressed += 1
+    COMPRESSION_STATS.bytes_in += len(data)
+    COMPRESSION_STATS.bytes_out += len(compressed)
+    return ident, compressed
+
+
+def _decompress_payload(ident, data):
+    ''' Decompress data compressed with the codec id.
+    '''
+    try:
+        decompress = _DECOMPRESSORS[bytes(ident)]
+    except KeyError:
+        raise ValueError('Unsupported compression codec id.') from None
+    
+    start = time.perf_counter()
+    decompressed = decompress(data)
+    COMPRESSION_STATS.decompress_seconds += time.perf_counter() - start
+    COMPRESSION_STATS.decompressed += 1
+    return decompressed
+
+
+def _unwrap_compressed(packed):
+    ''' If the packed GAO frame is compressed, decompress it. Otherwise,
+    return it unchanged.
+    '''
+    if packed[:len(_COMPRESSED_MAGIC)] != _COMPRESSED_MAGIC:
+        return packed
+    
+    offset = len(_COMPRESSED_MAGIC)
+    return _decompress_payload(packed[offset:offset + 1], packed[offset + 1:])
+
+
 class Accountable(API):
     ''' Use this metaclass to construct GAOs that use deferred-action
     methods that can store deltas before flushing. To be used in account
@@ -124,8 +263,11 @@ class Accountable(API):
         every pull (like a rebase)
     +   That last one is probably the smartest way to do it
     
-    TODO: support this. Currently, it's just one big race condition
-    waiting for contention problems.
+    Currently, every mutating proxy call sets the "mutated" flag, and
+    (if the instance keeps a _delta_log list) also records the effect of
+    the call as a (name, args, kwargs) operation. _GAOPickleBase uses
+    that log to push deltas against a held snapshot, and to re-apply
+    unpushed local operations on top of anything it pulls.
     '''
     
     def __new__(mcls, clsname, bases, namespace, *args, **kwargs):
@@ -153,8 +295,11 @@ class Accountable(API):
             elif obj is MUTATING_PROXY_CORO:
                 async def prox(self, *args, __proxname=name, **kwargs):
                     self._mutated = True
+                    args, kwargs = _materialize(self, args, kwargs)
                     proxied = getattr(self.state, __proxname)
-                    return (await proxied(*args, **kwargs))
+                    result = await proxied(*args, **kwargs)
+                    _log_mutation(self, __proxname, args, kwargs, result)
+                    return result
                 
                 prox.__name__ = name
                 new_namespace[name] = prox
@@ -162,8 +307,11 @@ class Accountable(API):
             elif obj is MUTATING_PROXY_FUNC:
                 def prox(self, *args, __proxname=name, **kwargs):
                     self._mutated = True
+                    args, kwargs = _materialize(self, args, kwargs)
                     proxied = getattr(self.state, __proxname)
-                    return proxied(*args, **kwargs)
+                    result = proxied(*args, **kwargs)
+                    _log_mutation(self, __proxname, args, kwargs, result)
+                    return result
                         
                 prox.__name__ = name
                 new_namespace[name] = prox
@@ -191,11 +339,82 @@ class Accountable(API):
                 return
                 
         cls._mutated = False
+        cls._delta_log = None
         cls._push = _push
         
         return cls
 
 
+def _materialize(gao, args, kwargs):
+    ''' If the gao keeps a delta log, replace any iterator arguments
+    with lists, so that the call itself and the logged operation both
+    see the same values.
+    '''
+    if gao._delta_log is None:
+        return args, kwargs
+    
+    args = tuple(
+        list(arg) if isinstance(arg, collections.abc.Iterator) else arg
+        for arg in args
+    )
+    kwargs = {
+        key: list(value) if isinstance(value, collections.abc.Iterator)
+        else value
+        for key, value in kwargs.items()
+    }
+    return args, kwargs
+
+
+def _log_mutation(gao, name, args, kwargs, result):
+    ''' Record a successful mutating call in the gao's delta log, if it
+    keeps one. Once the log grows past the gao's limit, it's replaced
+    with None, which forces the next push to be a full snapshot.
+    
+    Operations whose effect depends upon the state (ex: popitem) are
+    rewritten into their actual effect, using the _DELTA_REWRITES of
+    the gao. Arguments are copied, so that later changes to them by the
+    caller won't leak into the log.
+    '''
+    log = gao._delta_log
+    if log is None:
+        return
+    
+    elif len(log) >= gao.DELTA_MAX_OPS:
+        gao._delta_log = None
+        return
+    
+    rewrite = getattr(gao, '_DELTA_REWRITES', {}).get(name)
+    if rewrite is not None:
+        name, args, kwargs = rewrite(result)
+    
+    try:
+        args, kwargs = copy.deepcopy((args, kwargs))
+    
+    # We can't safely record the operation, so the next push needs to be a
+    # snapshot.
+    except Exception:
+        logger.debug(
+            'GAO %s could not copy %s arguments; dropping delta log.',
+            gao.ghid, name, exc_info=True
+        )
+        gao._delta_log = None
+    
+    else:
+        log.append((name, args, kwargs))
+
+
+def _popped_item(result):
+    ''' Dict popitem() removes an arbitrary item. Record which one.
+    '''
+    return '__delitem__', (result[0],), {}
+
+
+def _popped_element(result):
+    ''' Set pop() removes an arbitrary element. Record which one.
+    '''
+    return 'discard', (result,), {}
+
+
 def mutating(func):
     ''' Decorator to mark a method as mutating, for use in delta
     tracking.
@@ -218,9 +437,10 @@ class DefermentTracker:
     call to push all changes.
     '''
     
-    def __init__(self):
+    def __init__(self, max_concurrency=16):
         # Create a set of all tracked objects.
         self.tracked = weakref.WeakSet()
+        self.max_concurrency = max_concurrency
         
     def add(self, gao):
         ''' Track a gao.
@@ -233,19 +453,41 @@ class DefermentTracker:
         self.tracked.remove(gao)
         
     async def flush(self):
-        ''' Push all of the tracked GAOs. Currently dumb (in that it
-        does not check for modifications, and simply always pushes.)
-        '''
-        tasks = set()
-        for gao in self.tracked:
-            tasks.add(make_background_future(gao.push()))
-            
-        # And wait for them all to complete. Note that make_background_future
-        # handles their exception and result handling.
-        await asyncio.wait(
-            fs = tasks,
-            return_when = asyncio.ALL_COMPLETED
+        ''' Push all of the tracked GAOs that have been modified (or
+        have never been pushed at all), with at most max_concurrency
+        pushes in flight at once. GAOs that don't track modification
+        (ie, aren't Accountable) are always pushed.
+        
+        Returns the number of GAOs that were skipped as unmodified.
+        '''
+        tracked = list(self.tracked)
+        dirty = [
+            gao for gao in tracked
+            if gao.ghid is None or getattr(gao, '_mutated', True)
+        ]
+        skipped = len(tracked) - len(dirty)
+        
+        logger.debug(
+            'Flushing %s of %s tracked GAOs.', len(dirty), len(tracked)
         )
+        
+        if dirty:
+            limiter = asyncio.Semaphore(self.max_concurrency)
+            
+            async def push(gao):
+                async with limiter:
+                    await gao.push()
+            
+            tasks = {make_background_future(push(gao)) for gao in dirty}
+            # And wait for them all to complete. Note that
+            # make_background_future handles their exception and result
+            # handling.
+            await asyncio.wait(
+                fs = tasks,
+                return_when = asyncio.ALL_COMPLETED
+            )
+        
+        return skipped
 
 
 # ###############################################
@@ -275,6 +517,9 @@ class GAOCore(metaclass=API):
     # Default a few things to prevent attributeerrors
     _legroom = None
     _target_history = tuple()
+    # Size of the most recently pushed or pulled state, used by the
+    # inquisitor to estimate memory use.
+    _packed_size = 0
     
     # Make weak properties for the various thingajobbers
     _golcore = weak_property('__golcore')
@@ -282,6 +527,8 @@ class GAOCore(metaclass=API):
     _privateer = weak_property('__privateer')
     _percore = weak_property('__percore')
     _librarian = weak_property('__librarian')
+    # Optional. Used to fetch anything we need that isn't available locally.
+    _salmonator = weak_property('__salmonator')
     
     # Make readonly properties for dynamic, ghid, and author. Note that the
     # author field is technically deprecated and pending removal, but is
@@ -335,7 +582,7 @@ class GAOCore(metaclass=API):
     
     def __init__(self, ghid, dynamic, author, legroom, *args, golcore,
                  ghidproxy, privateer, percore, librarian, master_secret=None,
-                 **kwargs):
+                 salmonator=None, **kwargs):
         ''' Init should be used only to create a representation of an
         EXISTING (or about to be existing) object. If any fields are
         unknown, they must be explicitly passed None.
@@ -354,6 +601,8 @@ class GAOCore(metaclass=API):
         self._privateer = privateer
         self._percore = percore
         self._librarian = librarian
+        if salmonator is not None:
+            self._salmonator = salmonator
         
         # Dynamic and author be explicitly None; ghid should always be defined
         self.ghid = ghid
@@ -371,6 +620,8 @@ class GAOCore(metaclass=API):
         # We will only ever be created from within an event loop, so this is
         # fine to do without an explicit loop.
         self._update_lock = asyncio.Lock()
+        # Pushes that are waiting for the lock or still running
+        self._pushes_pending = 0
         
     @fixture_noop
     @public_api
@@ -507,6 +758,7 @@ class GAOCore(metaclass=API):
         # We're alive. Don't do object creation here; do it in oracle. This is
         # strictly updating.
         elif self.dynamic:
+            self._pushes_pending += 1
             # We need to make sure we're not pushing and pulling at the same
             # time.
             async with self._update_lock:
@@ -526,7 +778,12 @@ class GAOCore(metaclass=API):
                     # object to the last known good state. Use _pull to avoid
                     # the lock, as well as any extra baggage in "normal" pull
                     await self._pull()
+                    # Restored, so there's nothing left unpushed.
+                    self._pushes_pending -= 1
                     raise
+                
+                else:
+                    self._pushes_pending -= 1
             
         else:
             raise TypeError('Static objects cannot be updated.')
@@ -537,12 +794,20 @@ class GAOCore(metaclass=API):
         '''
         await self._push()
     
+    @property
+    def push_pending(self):
+        ''' True if a push is waiting to run, still running, or failed
+        without restoring the last pushed state.
+        '''
+        return self._pushes_pending > 0
+    
     @public_api
     async def _push(self):
         ''' The actual "meat and bones" for pushing.
         '''
         secret = self._get_new_secret()
         packed = await self.pack_gao()
+        self._packed_size = len(packed)
         container = await self._golcore.make_container(packed, secret)
         
         # Dynamic object
@@ -621,6 +886,14 @@ class GAOCore(metaclass=API):
         
         if deferred_raise is not None:
             raise deferred_raise
+        
+        # Get the secret for our next frame ready ahead of time.
+        if self.dynamic:
+            self._privateer.prime_ratchet(
+                self.ghid,
+                container.ghid,
+                self._master_secret
+            )
             
     @_push.fixture
     async def _push(self):
@@ -758,6 +1031,7 @@ class GAOCore(metaclass=API):
                 # Finally, with all of the administrative stuff handled, unpack
                 # the actual payload.
                 await self.unpack_gao(packed_state)
+                self._packed_size = len(packed_state)
                 
             except asyncio.CancelledError:
                 raise
@@ -816,8 +1090,7 @@ class GAOCore(metaclass=API):
         packed = await self._librarian.retrieve(container_ghid)
         
         try:
-            # TODO: fix the leaky abstraction of jumping into the _identity
-            unpacked = self._golcore._identity.unpack_container(packed)
+            unpacked = await self._golcore.unpack_container(packed)
             packed_state = await self._golcore.open_container(
                 unpacked,
                 secret
@@ -1010,7 +1283,146 @@ class GAO(GAOCore):
             
 class _GAOPickleBase(GAOCore):
     ''' Golix-aware base object with pickle serialization.
+    
+    Dynamic objects are delta-encoded. Every so often, we push a full
+    snapshot of the state and hold its container with a static binding.
+    Subsequent frames then only carry the operations recorded (through
+    the Accountable proxies) since that snapshot, so the cost of a push
+    scales with the number of changes, not the size of the state. A new
+    snapshot is taken whenever the accumulated operations exceed
+    DELTA_MAX_OPS, or the delta frame would be larger than DELTA_MAX_RATIO
+    of the snapshot itself.
+    
+    Frames may also be compressed, by setting compression to a codec
+    name (per class or per instance).
     '''
+    DELTA_MAX_OPS = 256
+    DELTA_MAX_RATIO = .5
+    # Codec name for compressing packed frames, or None to disable.
+    compression = None
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        
+        # Operations recorded locally, but not yet pushed
+        self._delta_log = []
+        # Operations since the snapshot that are reflected in our state, not
+        # counting anything in the _delta_log
+        self._delta_ops = []
+        self._delta_base = None
+        # The (ops, packed delta frame) chosen by _push for pack_gao, so that
+        # the frame is only pickled once
+        self._staged_frame = None
+    
+    @public_api
+    async def _push(self):
+        ''' Extend GAOCore._push() to hold new snapshots, and remember
+        which operations the pushed delta frame contained. The log is
+        only handed over once the push succeeds; until then, a failed
+        push leaves everything in place for the next one.
+        '''
+        # Nothing between here and pack_gao yields to the event loop, so the
+        # staged frame still matches the state when it gets packed.
+        log = self._delta_log
+        if log is None:
+            count = None
+        else:
+            count = len(log)
+        
+        self._staged_frame = self._choose_frame()
+        ops, __ = self._staged_frame
+        try:
+            await super()._push()
+        finally:
+            self._staged_frame = None
+        
+        # Anything logged during the push wasn't part of the frame.
+        if count is not None and self._delta_log is not None:
+            self._delta_log = self._delta_log[count:]
+        # Overflowed before the push, and nothing has changed since.
+        elif count is None and not self._mutated:
+            self._delta_log = []
+        
+        if not self.dynamic:
+            return
+        
+        elif ops is not None:
+            self._delta_ops = ops
+        else:
+            await self._hold_snapshot(self._packed_size)
+    
+    @_push.fixture
+    async def _push(self):
+        ''' Call super() to FIXTURE super instead of pickle base.
+        '''
+        await super(_GAOPickleBase, self)._push()
+    
+    async def _hold_snapshot(self, length):
+        ''' We just pushed a full snapshot. Make a static binding for
+        it, so it survives as a base for subsequent deltas, and release
+        the hold on the previous one.
+        '''
+        container_ghid = self.target_history[0]
+        old_base = self._delta_base
+        self._delta_base = None
+        self._delta_ops = []
+        
+        try:
+            secret = self._privateer.get(container_ghid)
+            binding = await self._golcore.make_binding_stat(container_ghid)
+            await self._percore.direct_ingest(
+                obj = _GobsLite.from_golix(binding),
+                packed = binding.packed,
+                remotable = True
+            )
+        
+        # This only costs us the next push being a snapshot, too, so there's
+        # no reason to fail the push.
+        except Exception:
+            logger.warning(
+                'GAO %s failed to hold snapshot; next push will not use ' +
+                'deltas.', self.ghid, exc_info=True
+            )
+            return
+        
+        self._delta_base = _DeltaBase(
+            ghid = container_ghid,
+            secret = secret,
+            hold = binding.ghid,
+            length = length
+        )
+        await self._release_snapshot(old_base)
+    
+    async def _release_snapshot(self, base):
+        ''' Debind the static binding holding the passed snapshot, if we
+        know about it.
+        '''
+        if base is None or base.hold is None:
+            return
+        
+        try:
+            debinding = await self._golcore.make_debinding(base.hold)
+            await self._percore.direct_ingest(
+                obj = _GdxxLite.from_golix(debinding),
+                packed = debinding.packed,
+                remotable = True
+            )
+        
+        except Exception:
+            logger.warning(
+                'GAO %s failed to release snapshot %s.', self.ghid,
+                base.ghid, exc_info=True
+            )
+    
+    @fixture_noop
+    @public_api
+    async def delete(self):
+        ''' Extend GAOCore.delete() to also release our snapshot.
+        '''
+        await super().delete()
+        base = self._delta_base
+        self._delta_base = None
+        await self._release_snapshot(base)
         
     async def pack_gao(self):
         ''' Packs self into a bytes object. May be overwritten in subs
@@ -1020,8 +1432,17 @@ class _GAOPickleBase(GAOCore):
         May be used to implement, for example, packing self into a
         DispatchableState, etc etc.
         '''
+        # This doesn't change anything; _push hands over the log once the
+        # frame has actually been pushed.
+        staged = self._staged_frame
+        if staged is None:
+            staged = self._choose_frame()
+        
+        __, packed = staged
+        
         try:
-            return pickle.dumps(self.state, protocol=4)
+            if packed is None:
+                packed = pickle.dumps(self.state, protocol=4)
             
         except Exception:
             logger.error(
@@ -1030,6 +1451,57 @@ class _GAOPickleBase(GAOCore):
             )
             raise
         
+        compressed = _compress_payload(packed, self.compression)
+        if compressed is None:
+            return packed
+        else:
+            ident, payload = compressed
+            return _COMPRESSED_MAGIC + ident + payload
+    
+    def _choose_frame(self):
+        ''' Decide between a delta frame and a snapshot. Returns the
+        ops and packed delta frame, or (None, None) for a snapshot.
+        '''
+        if self._delta_log is None:
+            return None, None
+        
+        ops = self._delta_ops + self._delta_log
+        packed = self._pack_delta(ops)
+        if packed is None:
+            return None, None
+        else:
+            return ops, packed
+    
+    def _pack_delta(self, ops):
+        ''' Create a delta frame for the ops against our current base.
+        Returns None if a snapshot would be more appropriate.
+        '''
+        if not self.dynamic or self._delta_base is None or \
+           len(ops) > self.DELTA_MAX_OPS:
+            return None
+        
+        base = self._delta_base
+        try:
+            payload = pickle.dumps(
+                (base.ghid, base.secret, base.hold, base.length, ops),
+                protocol = 4
+            )
+        
+        # Some ops may have had arguments that can't be pickled on their own
+        # (generators, for example). A snapshot will still work.
+        except Exception:
+            logger.debug(
+                'GAO %s delta not picklable; using snapshot.', self.ghid,
+                exc_info = True
+            )
+            return None
+        
+        packed = _DELTA_MAGIC + _DELTA_VERSION + payload
+        if len(packed) > base.length * self.DELTA_MAX_RATIO:
+            return None
+        
+        return packed
+        
     async def unpack_gao(self, packed):
         ''' Unpacks state from a bytes object and applies state to self.
         May be overwritten in subs to unpack more complex objects.
@@ -1038,12 +1510,19 @@ class _GAOPickleBase(GAOCore):
         clear() operation before an update() instead of just reassigning
         the object.
         '''
-        ''' Unpacks state from a bytes object. May be overwritten in
-        subs to unpack more complex objects. Should always be a
-        staticmethod or classmethod.
-        '''
+        packed = _unwrap_compressed(packed)
+        
         try:
-            self.state = pickle.loads(packed)
+            if packed[:len(_DELTA_MAGIC)] == _DELTA_MAGIC:
+                await self._unpack_delta(packed)
+            
+            else:
+                self.state = pickle.loads(packed)
+                self._delta_ops = []
+                # A snapshot is only usable as a base if it's the one we hold.
+                if self._delta_base is not None and \
+                   self._delta_base.ghid != self.target_history[0]:
+                    self._delta_base = None
             
         except Exception:
             logger.error(
@@ -1051,6 +1530,100 @@ class _GAOPickleBase(GAOCore):
                 ''.join(traceback.format_exc())
             )
             raise
+        
+        self._rebase()
+    
+    async def _unpack_delta(self, packed):
+        ''' Apply a delta frame. If our state already reflects a prefix
+        of its operations, only apply the rest; otherwise, rebuild from
+        the snapshot.
+        '''
+        offset = len(_DELTA_MAGIC)
+        version = packed[offset:offset + len(_DELTA_VERSION)]
+        if version != _DELTA_VERSION:
+            raise ValueError('Incompatible delta frame version.')
+        
+        ghid, secret, hold, length, ops = pickle.loads(
+            packed[offset + len(_DELTA_VERSION):]
+        )
+        base = _DeltaBase(ghid, secret, hold, length)
+        known = self._delta_ops
+        
+        # If local ops have been applied on top of the state, we can't just
+        # apply the remainder.
+        fast = (
+            not self._delta_log and
+            self._delta_base is not None and
+            self._delta_base.ghid == ghid and
+            ops[:len(known)] == known
+        )
+        
+        if fast:
+            self._replay(ops[len(known):])
+        
+        else:
+            snapshot = await self._recover_snapshot(ghid, secret, hold)
+            self.state = pickle.loads(_unwrap_compressed(snapshot))
+            self._replay(ops)
+        
+        self._delta_base = base
+        self._delta_ops = ops
+    
+    async def _recover_snapshot(self, container_ghid, secret, hold):
+        ''' Retrieve the packed state of a snapshot, using the secret
+        from the delta frame (the snapshot may well be outside of our
+        ratchet history). If we don't have it locally, pull it, along
+        with the static binding holding it, so that it isn't collected
+        out from under us.
+        '''
+        try:
+            packed = await self._librarian.retrieve(container_ghid)
+        
+        except KeyError:
+            if not hasattr(self, '_salmonator'):
+                raise
+            
+            await self._salmonator.pull(container_ghid)
+            await self._salmonator.attempt_pull(hold, quiet=True)
+            packed = await self._librarian.retrieve(container_ghid)
+        
+        unpacked = await self._golcore.unpack_container(packed)
+        return (await self._golcore.open_container(unpacked, secret))
+    
+    def _replay(self, ops):
+        ''' Apply the operations directly to the state, bypassing the
+        proxies (and therefore the mutation log).
+        '''
+        for name, args, kwargs in ops:
+            getattr(self.state, name)(*args, **kwargs)
+    
+    def _rebase(self):
+        ''' Re-apply any local, not-yet-pushed operations on top of the
+        state we just unpacked. Operations that no longer apply (ex: a
+        remove for something already removed upstream) are dropped.
+        '''
+        log = self._delta_log
+        
+        # The log overflowed, so we can't rebase; local changes are lost.
+        if log is None:
+            self._delta_log = []
+            return
+        
+        kept = []
+        for op in log:
+            try:
+                self._replay((op,))
+            
+            except Exception:
+                logger.warning(
+                    'GAO %s dropped local %s during rebase.', self.ghid,
+                    op[0], exc_info=True
+                )
+            
+            else:
+                kept.append(op)
+        
+        self._delta_log = kept
             
     __eq__ = GAO.__eq__
             
@@ -1105,6 +1678,8 @@ class _DictMixin(metaclass=Accountable):
     clear = MUTATING_PROXY_FUNC
     # Note: this is lazy; what if nothing changes?
     update = MUTATING_PROXY_FUNC
+    
+    _DELTA_REWRITES = {'popitem': _popped_item}
         
     # def __len__(self):
     #     # Straight pass-through
@@ -1223,6 +1798,8 @@ class _SetMixin(metaclass=Accountable):
     # Note: this is lazy; what if nothing changes?
     update = MUTATING_PROXY_FUNC
     
+    _DELTA_REWRITES = {'pop': _popped_element}
+    
     # @property
     # def state(self):
     #     ''' Pass through to self._state
@@ -1455,3 +2032,233 @@ class GAOSetMap(_GAOPickleBase, _SetMapMixin):
     ''' Combine GAO setmaps with pickle serialization.
     '''
     pass
+
+
+class GAOShardedDict(collections.abc.MutableMapping):
+    ''' A dict-like collection of GAODicts, hash-partitioned by key, so
+    that any single mutation only re-encrypts and re-uploads the (much
+    smaller) shard it touched. Keys must be ghids, or anything else with
+    a stable bytes() representation.
+    
+    The directory is itself a GAODict, which (once allocated) lists the
+    ghid and master secret of every shard. Legacy, unsharded dicts are
+    migrated by allocating a new sharded dict from their contents; the
+    legacy dict itself is never rewritten, so devices that haven't
+    upgraded can still read it.
+    '''
+    SHARD_COUNT = 16
+    _SHARDS_KEY = 'hgx.shards'
+    
+    def __init__(self, ghid, legroom, *args, master_secret=None,
+                 shard_count=None, **kwargs):
+        ''' Kwargs (golcore, privateer, etc) are passed to the GAODict
+        directory, and from there reused for every shard.
+        '''
+        super().__init__(*args)
+        
+        self._legroom = legroom
+        if shard_count is None:
+            self._shard_count = self.SHARD_COUNT
+        else:
+            self._shard_count = int(shard_count)
+        
+        self.directory = GAODict(
+            ghid = ghid,
+            dynamic = True,
+            author = None,
+            legroom = legroom,
+            master_secret = master_secret,
+            **kwargs
+        )
+        self.shards = []
+        # Anything mutated before the shards are loaded goes here, and is
+        # then folded into the shards.
+        self._early = {}
+    
+    @property
+    def ghid(self):
+        ''' The ghid of the directory.
+        '''
+        return self.directory.ghid
+    
+    @ghid.setter
+    def ghid(self, ghid):
+        ''' Pass through to the directory.
+        '''
+        self.directory.ghid = ghid
+    
+    def _inject_msec(self, msec):
+        ''' Pass through to the directory. See GAOCore._inject_msec.
+        '''
+        self.directory._inject_msec(msec)
+    
+    @property
+    def gaos(self):
+        ''' All of the GAOs backing the dict, directory first.
+        '''
+        return (self.directory, *self.shards)
+    
+    def _make_dict(self, ghid, master_secret):
+        ''' Create (but do not pull or push) a shard or directory.
+        '''
+        shard = GAODict(
+            ghid = ghid,
+            dynamic = True,
+            author = None,
+            legroom = self._legroom,
+            golcore = self.directory._golcore,
+            ghidproxy = self.directory._ghidproxy,
+            privateer = self.directory._privateer,
+            percore = self.directory._percore,
+            librarian = self.directory._librarian,
+            master_secret = master_secret
+        )
+        if hasattr(self.directory, '_salmonator'):
+            shard._salmonator = self.directory._salmonator
+        return shard
+    
+    async def allocate(self, entries=None):
+        ''' Create the directory and all of the shards upstream. If
+        passed, entries (ex: the state of a legacy dict being migrated)
+        are copied into the shards.
+        '''
+        # Because these use a master secret, they need to be initialized, or
+        # the first frame will be unrecoverable.
+        await self.directory._push(force=True)
+        await self.directory._push(force=True)
+        
+        if entries is None:
+            entries = {}
+        await self._allocate_shards(dict(entries))
+    
+    async def _allocate_shards(self, entries):
+        ''' Create and initialize new shards, fill them with entries,
+        and only then record them in the directory.
+        '''
+        async def initialize(shard):
+            await shard._push(force=True)
+            await shard._push(force=True)
+        
+        privateer = self.directory._privateer
+        shards = [
+            self._make_dict(None, privateer.new_secret())
+            for __ in range(self._shard_count)
+        ]
+        await asyncio.gather(*[initialize(shard) for shard in shards])
+        
+        self.shards = shards
+        self._fold_early()
+        self.update(entries)
+        await asyncio.gather(*[shard._push() for shard in shards])
+        
+        self.directory.clear()
+        self.directory[self._SHARDS_KEY] = [
+            (shard.ghid, shard._master_secret) for shard in shards
+        ]
+        await self.directory._push()
+    
+    async def restore(self):
+        ''' Pull the directory and every shard.
+        '''
+        await self.directory._pull()
+        listing = self.directory.get(self._SHARDS_KEY)
+        
+        if listing is None:
+            raise UnrecoverableState(
+                'GAO ' + str(self.directory.ghid) + ' is not a sharded ' +
+                'directory.'
+            )
+        
+        shards = [
+            self._make_dict(ghid, master_secret)
+            for ghid, master_secret in listing
+        ]
+        await asyncio.gather(*[shard._pull() for shard in shards])
+        self.shards = shards
+        self._fold_early()
+    
+    async def adopt(self, ghid, master_secret):
+        ''' Switch to another, already-allocated directory. Used when
+        another device concurrently migrated the same legacy dict, and
+        its directory won. Anything missing from the adopted dict is
+        copied over, and our own directory and shards are deleted.
+        '''
+        entries = dict(self)
+        abandoned = self.gaos
+        
+        self.directory = self._make_dict(ghid, master_secret)
+        self.shards = []
+        await self.restore()
+        
+        for key, value in entries.items():
+            if key not in self:
+                self[key] = value
+        await self.push()
+        
+        results = await asyncio.gather(
+            *[gao.delete() for gao in abandoned],
+            return_exceptions = True
+        )
+        for gao, result in zip(abandoned, results):
+            if isinstance(result, Exception):
+                logger.warning(
+                    'Failed to delete abandoned shard %s.', gao.ghid,
+                    exc_info = (type(result), result, result.__traceback__)
+                )
+    
+    def _fold_early(self):
+        ''' Move anything set before the shards existed into the shards.
+        '''
+        early = self._early
+        self._early = {}
+        self.update(early)
+    
+    async def push(self):
+        ''' Push every GAO that has been mutated. Like Account.flush,
+        this handles exceptions in the background.
+        '''
+        tasks = {make_background_future(gao.push()) for gao in self.gaos}
+        await asyncio.wait(fs=tasks, return_when=asyncio.ALL_COMPLETED)
+    
+    def _shard_for(self, key):
+        ''' Get the shard responsible for the key. Ghids end with a
+        hash digest, so their trailing bytes are uniformly distributed.
+        '''
+        shards = self.shards
+        if not shards:
+            return self._early
+        
+        index = int.from_bytes(bytes(key)[-4:], 'big') % len(shards)
+        return shards[index]
+    
+    def __getitem__(self, key):
+        return self._shard_for(key)[key]
+    
+    def __setitem__(self, key, value):
+        self._shard_for(key)[key] = value
+    
+    def __delitem__(self, key):
+        del self._shard_for(key)[key]
+    
+    def __contains__(self, key):
+        return key in self._shard_for(key)
+    
+    def __iter__(self):
+        yield from self._early
+        for shard in self.shards:
+            yield from shard
+    
+    def __len__(self):
+        return len(self._early) + sum(len(shard) for shard in self.shards)
+    
+    def pop(self, key, *args):
+        ''' Overridden to make a single (logged) mutation on the shard.
+        '''
+        return self._shard_for(key).pop(key, *args)
+    
+    def clear(self):
+        ''' Overridden to clear shards wholesale.
+        '''
+        self._early.clear()
+        for shard in self.shards:
+            shard.clear()
@@ -31,16 +31,16 @@ hypergolix: A python Golix client.
 '''
 
 # Global dependencies
-# import weakref
-# import traceback
-# import threading
-
-# from golix import SecondParty
-from golix import Ghid
+import time
+import asyncio
+import weakref
+import loopa
 
 # Local dependencies
-# from .persistence import _GarqLite
-# from .persistence import _GdxxLite
+from .hypothetical import API
+
+from .utils import weak_property
+from .utils import LatencyTracker
 
 
 # ###############################################
@@ -62,14 +62,122 @@ __all__ = [
 # ###############################################
 
 
-class Inquisitor:
+class Inquisitor(loopa.TaskLooper, metaclass=API):
     ''' The inquisitor handles resource utilization, locally removing
     GAOs from memory when they are no longer sufficiently used to 
     justify their overhead.
+    
+    Every interval seconds, if the estimated size of the GAOs in the
+    oracle exceeds budget bytes, the least recently used are evicted
+    until it doesn't. Objects pinned in the oracle, tracked by an
+    application connection, or still being loaded, are never evicted.
+    Evicted GAOs are unsubscribed upstream right away, but still count
+    against the budget until they're actually GC'd.
     '''
-    pass
     # Note: you're probably not going to want to use the _GAO to maintain the
     # librarian retention directly, because not all _GAO have a librarian 
     # counterpart. For example, debindings will basically never be associated
     # with a live GAO, so, if you decided to let GAO live-ness dictate the
-    # librarian caching of "lite"weight objects, you would never cache a GDXX.
\ No newline at end of file
+    # librarian caching of "lite"weight objects, you would never cache a GDXX.
+    _oracle = weak_property('__oracle')
+    _dispatch = weak_property('__dispatch')
+    
+    def __init__(self, *args, budget=64 * 1024 * 1024, interval=30,
+                 overhead=1024, **kwargs):
+        ''' budget is the approximate number of bytes live GAOs may use.
+        Each GAO is assumed to use overhead bytes, plus the size of its
+        packed state.
+        '''
+        super().__init__(*args, **kwargs)
+        self.budget = budget
+        self.interval = interval
+        self.overhead = overhead
+        
+        # Metrics
+        self.sweep_latency = LatencyTracker()
+        self.evictions = 0
+        # Only counted once evicted GAOs are actually collected
+        self.bytes_freed = 0
+    
+    def assemble(self, oracle, dispatch):
+        # Chicken, meet egg.
+        self._oracle = oracle
+        self._dispatch = dispatch
+    
+    def estimate(self, obj):
+        ''' Approximate the memory used by a GAO, in bytes.
+        '''
+        return self.overhead + getattr(obj, '_packed_size', 0)
+    
+    def evictable(self, obj):
+        ''' Check if the GAO can be evicted.
+        '''
+        # Still being loaded by the oracle.
+        ctx = getattr(obj, '_ctx', None)
+        if ctx is not None and not ctx.is_set():
+            return False
+        
+        # Changes that haven't been pushed yet.
+        if obj.push_pending:
+            return False
+        
+        try:
+            return not self._dispatch.is_tracked(obj)
+        
+        # Unhashable objects can't have been tracked.
+        except TypeError:
+            return True
+    
+    def sweep(self):
+        ''' Evict the least recently used GAOs until we're within
+        budget (or run out of evictable GAOs). Returns the estimated
+        usage afterwards.
+        '''
+        start = time.monotonic()
+        
+        try:
+            candidates = self._oracle.by_recency()
+            usage = sum(self.estimate(obj) for __, obj in candidates)
+            # Anything evicted that's still alive is still using memory.
+            usage += sum(
+                self.estimate(obj) for __, obj in self._oracle.lingering()
+            )
+            
+            for ghid, obj in candidates:
+                if usage <= self.budget:
+                    break
+                
+                elif self._oracle.is_pinned(ghid) or not self.evictable(obj):
+                    continue
+                
+                size = self.estimate(obj)
+                if self._oracle.evict(ghid):
+                    logger.debug('GAO %s evicted (~%d bytes).', ghid, size)
+                    # Assume it will be collected. If not, the next sweep will
+                    # count it again.
+                    usage -= size
+                    self.evictions += 1
+                    finalizer = weakref.finalize(obj, self._freed, size)
+                    finalizer.atexit = False
+            
+            if usage > self.budget:
+                logger.info(
+                    'Live GAOs over budget after sweep: ~%d of %d bytes.',
+                    usage, self.budget
+                )
+            
+            return usage
+        
+        finally:
+            self.sweep_latency.since(start)
+    
+    def _freed(self, size):
+        ''' Finalizer for evicted GAOs.
+        '''
+        self.bytes_freed += size
+    
+    async def loop_run(self):
+        ''' Periodically sweep the oracle.
+        '''
+        await asyncio.sleep(self.interval)
+        self.sweep()
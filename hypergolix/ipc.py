@@ -65,6 +65,18 @@ IPC Apps should not have access to objects that are not _Dispatchable.
 import logging
 import collections
 import traceback
+import asyncio
+import time
+import re
+import os
+
+try:
+    from multiprocessing import shared_memory
+    from multiprocessing import resource_tracker
+# Python < 3.8
+except ImportError:
+    shared_memory = None
+    resource_tracker = None
 
 from golix import Ghid
 
@@ -149,12 +161,169 @@ ERROR_CODES = {
 }
 
 
+# Names of shared memory segments we've created in this process, so that
+# we don't untrack them when attaching to them as a receiver.
+_LOCAL_SEGMENTS = set()
+
+
 class _IPCSerializer:
     ''' This helper class defines the IPC serialization process.
+    
+    Object states at least shm_threshold bytes long are, if possible,
+    passed through a POSIX shared memory segment instead of inline. The
+    sender keeps ownership of the segment until the receiver releases
+    it (with a release_shm request) once it's been read, or until
+    shm_ttl seconds have passed, whichever comes first. Anything still
+    outstanding when the sender exits is cleaned up by its resource
+    tracker.
+    
+    Shared memory is marked per object definition, and doesn't change
+    the protocol version. Peers that predate it can't read those
+    definitions, so only set shm_threshold if both ends support it.
     '''
+    # Every segment we create is named with this prefix followed by 32
+    # hex digits. We refuse to touch anything else.
+    _SHM_PREFIX = 'hgx_'
+    _SHM_NAME = re.compile(r'^hgx_[0-9a-f]{32}$')
+    
+    def __init__(self, *args, shm_threshold=None, shm_ttl=60, **kwargs):
+        super().__init__(*args, **kwargs)
+        
+        if shm_threshold is not None:
+            if shared_memory is None or os.name != 'posix':
+                logger.warning('Shared memory IPC is unavailable on this ' +
+                               'platform. Sending object states inline.')
+                shm_threshold = None
+            else:
+                # Zero-length segments are invalid.
+                shm_threshold = max(1, int(shm_threshold))
+        
+        self._shm_threshold = shm_threshold
+        self._shm_ttl = shm_ttl
+        # Lookup for <segment name>: (<connection>, <segment>, <expiry>)
+        self._shm_exports = {}
+        # Count how many states we've sent through shared memory.
+        self.shm_transfers = 0
+    
+    def _export_state(self, connection, state):
+        ''' Copy state into a new shared memory segment, and return
+        a handle for it to send in its place.
+        '''
+        self._reap_shm()
+        
+        length = len(state)
+        name = self._SHM_PREFIX + os.urandom(16).hex()
+        segment = shared_memory.SharedMemory(
+            name = name,
+            create = True,
+            size = length
+        )
+        
+        try:
+            segment.buf[:length] = state
+        
+        except Exception:
+            segment.close()
+            segment.unlink()
+            raise
+        
+        _LOCAL_SEGMENTS.add(name)
+        self._shm_exports[name] = (
+            connection,
+            segment,
+            time.monotonic() + self._shm_ttl
+        )
+        self.shm_transfers += 1
+        return length.to_bytes(8, 'big') + name.encode('utf-8')
+    
+    def _release_shm(self, name, connection=None):
+        ''' Unlink a segment we exported. If connection is passed, the
+        segment must have been sent over that connection. Returns True
+        if the segment was released.
+        '''
+        try:
+            owner, segment, __ = self._shm_exports[name]
+        except KeyError:
+            return False
+        
+        if connection is not None and owner is not connection:
+            return False
+        
+        del self._shm_exports[name]
+        _LOCAL_SEGMENTS.discard(name)
+        segment.close()
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+        
+        return True
+    
+    def _reap_shm(self):
+        ''' Release any segments the receiver never released, for
+        example because the request failed or the connection dropped.
+        '''
+        now = time.monotonic()
+        expired = [
+            name for name, (__, __, expiry) in self._shm_exports.items()
+            if expiry <= now
+        ]
+        for name in expired:
+            logger.info('Reaping unreleased shared memory segment ' + name)
+            self._release_shm(name)
+    
+    def _import_state(self, connection, handle):
+        ''' Read the state out of a shared memory segment created by
+        _export_state, and then tell the sender we're done with it.
+        '''
+        if shared_memory is None:
+            raise IPCError('Shared memory IPC is unavailable.')
+        
+        length = int.from_bytes(handle[:8], 'big')
+        name = str(handle[8:], 'utf-8')
+        
+        # Never open anything but our own segments.
+        if not self._SHM_NAME.match(name):
+            raise IPCError('Invalid shared memory segment name.')
+        
+        try:
+            segment = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            raise IPCError('Missing shared memory segment.') from None
+        
+        # Attaching registers the segment with our own resource tracker,
+        # which would unlink it out from under the sender when we exit.
+        if name not in _LOCAL_SEGMENTS:
+            resource_tracker.unregister('/' + name, 'shared_memory')
+        
+        try:
+            if segment.size < length:
+                raise IPCError('Truncated shared memory segment.')
+            return bytes(segment.buf[:length])
+        
+        finally:
+            segment.close()
+            if connection is not None:
+                make_background_future(self._ack_shm(connection, name))
+    
+    async def _ack_shm(self, connection, name):
+        ''' Release the segment back to its sender.
+        '''
+        try:
+            await self.release_shm(connection, name)
         
-    def _pack_object_def(self, address, author, state, is_link, api_id,
-                         private, dynamic, _legroom):
+        except asyncio.CancelledError:
+            raise
+        
+        # The sender will reap it eventually.
+        except Exception:
+            logger.info(
+                'Failed to release shared memory segment %s w/ traceback:',
+                name, exc_info=True
+            )
+    
+    def _pack_object_def(self, connection, address, author, state, is_link,
+                         api_id, private, dynamic, _legroom):
         ''' Serializes an object definition.
         
         This is crude, but it's getting the job done for now. Also, for
@@ -171,8 +340,16 @@ class _IPCSerializer:
         api_id      65B     bytes
         is_link     1B      bool
         state       ?B      bytes (implicit length)
+        
+        Version 0 sends the state inline. Version 1 replaces it with a
+        shared memory handle: 8B length, followed by the segment name.
         '''
-        version = b'\x00'
+        if (self._shm_threshold is not None and
+                len(state) >= self._shm_threshold):
+            version = b'\x01'
+            state = self._export_state(connection, state)
+        else:
+            version = b'\x00'
             
         if address is None:
             address = bytes(65)
@@ -205,7 +382,7 @@ class _IPCSerializer:
                 is_link +
                 state)
         
-    def _unpack_object_def(self, data):
+    def _unpack_object_def(self, connection, data):
         ''' Deserializes an object from bytes.
         
         General format:
@@ -220,7 +397,7 @@ class _IPCSerializer:
         state       ?B      bytes (implicit length)
         '''
         try:
-            # version = data[0:1]
+            version = data[0:1]
             address = data[1:66]
             author = data[66:131]
             private = data[131:132]
@@ -237,7 +414,9 @@ class _IPCSerializer:
             )
             raise
             
-        # Version stays unmodified (unused)
+        if version == b'\x01':
+            state = self._import_state(connection, state)
+        
         if address == bytes(65):
             address = None
         else:
@@ -265,7 +444,8 @@ class _IPCSerializer:
 
 
 class IPCServerProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
-                        error_codes=ERROR_CODES, default_version=b'\x00\x00'):
+                        error_codes=ERROR_CODES, default_version=b'\x00\x00',
+                        wide_version=b'\x00\x01'):
     ''' Defines the protocol for IPC, with handlers specific to servers.
     '''
     _dispatch = weak_property('__dispatch')
@@ -476,6 +656,7 @@ class IPCServerProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
         private = bool(self._dispatch.private_parent_lookup(obj.ghid))
         
         return self._pack_object_def(
+            connection,
             obj.ghid,
             obj.author,
             state,
@@ -506,7 +687,7 @@ class IPCServerProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
          api_id,
          private,
          dynamic,
-         legroom) = self._unpack_object_def(body)
+         legroom) = self._unpack_object_def(connection, body)
         
         if is_link:
             raise NotImplementedError('Linked objects are not yet supported.')
@@ -557,6 +738,7 @@ class IPCServerProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
             
         else:
             return self._pack_object_def(
+                connection,
                 obj.ghid,
                 obj.author,
                 obj.state,
@@ -587,7 +769,7 @@ class IPCServerProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
          private,   # TODO: use this.
          dynamic,   # Unused and set to None.
          legroom   # TODO: use this.
-         ) = self._unpack_object_def(body)
+         ) = self._unpack_object_def(connection, body)
         
         if is_link:
             raise NotImplementedError('Linked objects are not yet supported.')
@@ -832,10 +1014,35 @@ class IPCServerProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
         # back
         await obj.delete()
         return b'\x01'
+    
+    @request(b'XS')
+    async def release_shm(self, connection, name):
+        ''' Tell the sender of a shared memory segment that we're done
+        with it, so that it can be unlinked.
+        '''
+        return name.encode('utf-8')
+    
+    @release_shm.request_handler
+    async def release_shm(self, connection, body):
+        ''' Handles shared memory release requests. We only release
+        segments that we sent over the same connection.
+        '''
+        self._release_shm(str(body, 'utf-8'), connection)
+        return b'\x01'
+    
+    @release_shm.response_handler
+    async def release_shm(self, connection, response, exc):
+        ''' Handles responses to shared memory release requests.
+        '''
+        if exc is not None:
+            raise exc
+        else:
+            return True
 
 
 class IPCClientProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
-                        error_codes=ERROR_CODES, default_version=b'\x00\x00'):
+                        error_codes=ERROR_CODES, default_version=b'\x00\x00',
+                        wide_version=b'\x00\x01'):
     ''' Defines the protocol for IPC, with handlers specific to clients.
     '''
     _hgxlink = weak_property('__hgxlink')
@@ -1126,7 +1333,7 @@ class IPCClientProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
         if exc is not None:
             raise exc
             
-        return self._unpack_object_def(response)
+        return self._unpack_object_def(connection, response)
         
     @get_ghid.fixture
     async def get_ghid(self, ghid):
@@ -1149,6 +1356,7 @@ class IPCClientProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
             is_link = False
         
         return self._pack_object_def(
+            connection,
             None,               # address
             None,               # author
             state,              # state
@@ -1203,6 +1411,7 @@ class IPCClientProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
             is_link = False
             
         return self._pack_object_def(
+            connection,
             ghid,       # ghid
             None,       # Author
             state,      # state
@@ -1225,7 +1434,7 @@ class IPCClientProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
          private,   # Will be unused and set to None
          dynamic,   # Will be unused and set to None
          _legroom   # Will be unused and set to None
-         ) = self._unpack_object_def(body)
+         ) = self._unpack_object_def(connection, body)
         
         if is_link:
             state = Ghid.from_bytes(state)
@@ -1477,3 +1686,27 @@ class IPCClientProtocol(_IPCSerializer, metaclass=RequestResponseAPI,
     async def delete_ghid(self, ghid):
         # mmmmhmmm
         self.deleted.add(ghid)
+    
+    @request(b'XS')
+    async def release_shm(self, connection, name):
+        ''' Tell the sender of a shared memory segment that we're done
+        with it, so that it can be unlinked.
+        '''
+        return name.encode('utf-8')
+    
+    @release_shm.request_handler
+    async def release_shm(self, connection, body):
+        ''' Handles shared memory release requests. We only release
+        segments that we sent over the same connection.
+        '''
+        self._release_shm(str(body, 'utf-8'), connection)
+        return b'\x01'
+    
+    @release_shm.response_handler
+    async def release_shm(self, connection, response, exc):
+        ''' Handles responses to shared memory release requests.
+        '''
+        if exc is not None:
+            raise exc
+        else:
+            return True
@@ -40,6 +40,7 @@ import traceback
 import asyncio
 import loopa
 import pathlib
+import json
 
 from golix import ThirdParty
 from golix import SecondParty
@@ -148,6 +149,15 @@ class LibrarianCore(metaclass=API):
         # This may be GC'd by the python process.
         self._catalog = FiniteDict(maxlen=memory_cache)
         
+        # Lookup for <remote description>: OrderedDict(<ghid awaiting upload>)
+        # Each ghid is only queued once per remote, since the data is
+        # retrieved from the cache when it's sent.
+        self._outbox = {}
+        
+        # Anything caching binding resolutions (ex: the ghidproxy), to be told
+        # when a binding changes. Must have an invalidate(ghid) method.
+        self._binding_listeners = weakref.WeakSet()
+    
     @__init__.fixture
     def __init__(self, *args, **kwargs):
         ''' Construct an in-memory-only version of librarian.
@@ -179,6 +189,7 @@ class LibrarianCore(metaclass=API):
         self._bound_by_ghid.clear_all()
         self._debound_by_ghid.clear_all()
         self._requests_for_recipient.clear_all()
+        self._outbox.clear()
         
     def assemble(self, enforcer, lawyer, percore):
         ''' Assign stuff hereto avoid circuitous problems.
@@ -190,6 +201,25 @@ class LibrarianCore(metaclass=API):
         # And we need to be able to load things back up from the cache
         self._percore = percore
     
+    def add_binding_listener(self, listener):
+        ''' Register something that caches the targets of bindings, so
+        that we can tell it when they change. Weakly referenced.
+        '''
+        self._binding_listeners.add(listener)
+    
+    def _notify_binding_listeners(self, ghid):
+        ''' Tell any binding listeners that the binding at ghid was
+        updated or removed.
+        '''
+        for listener in list(self._binding_listeners):
+            try:
+                listener.invalidate(ghid)
+            except Exception:
+                logger.error(
+                    'Binding listener failed to invalidate %s.', ghid,
+                    exc_info = True
+                )
+    
     @public_api
     async def is_bound(self, obj):
         ''' Check to see if the object has been bound.
@@ -281,6 +311,11 @@ class LibrarianCore(metaclass=API):
             # We need the None regardless of bugs, in case the old frame is
             # "stale" enough to have been released from memory
             self._catalog.pop(old_ghid, None)
+        
+        # Dynamic bindings can change their target, so anything caching it
+        # needs to know.
+        if isinstance(obj, _GobdLite):
+            self._notify_binding_listeners(obj.ghid)
     
     @public_api
     async def retrieve(self, ghid):
@@ -331,6 +366,9 @@ class LibrarianCore(metaclass=API):
         
         # Delete it from the catalog (if it exists there)
         self._catalog.pop(ghid, None)
+        
+        if isinstance(obj, (_GobsLite, _GobdLite)):
+            self._notify_binding_listeners(obj.ghid)
     
     # Subclasses MAY define this, but are not required to do so.
     @fixture_api
@@ -354,6 +392,82 @@ class LibrarianCore(metaclass=API):
         # Catalog may only be accurate locally. Shelf is accurate globally.
         return ghid in self._shelf
     
+    @public_api
+    async def outbox_append(self, key, ghid):
+        ''' Queue the ghid for upload to the remote described by key,
+        once it becomes available. Only the ghid is stored; the data
+        itself is retrieved from the cache when it's sent, so queueing
+        an already-queued ghid just moves it to the back of the queue.
+        '''
+        self._enqueue_outbox(self._outbox, key, ghid)
+        await self._log_outbox(True, key, ghid)
+    
+    @public_api
+    async def outbox_peek(self, key):
+        ''' Return all queued ghids for the key, oldest first. They
+        stay queued until they're removed with outbox_remove.
+        '''
+        return list(self._outbox.get(key, ()))
+    
+    @public_api
+    async def outbox_remove(self, key, ghid):
+        ''' Remove the queued ghid for the key, once it's been
+        uploaded (or there's nothing left to upload).
+        '''
+        if self._dequeue_outbox(self._outbox, key, ghid):
+            await self._log_outbox(False, key, ghid)
+    
+    @public_api
+    def outbox_depth(self):
+        ''' Returns the total number of ghids awaiting upload.
+        '''
+        return sum(len(ghids) for ghids in self._outbox.values())
+    
+    @staticmethod
+    def _enqueue_outbox(outbox, key, ghid):
+        ''' Add the ghid to the back of the outbox queue for the key.
+        '''
+        try:
+            ghids = outbox[key]
+        except KeyError:
+            ghids = outbox[key] = collections.OrderedDict()
+        
+        ghids[ghid] = None
+        ghids.move_to_end(ghid)
+    
+    @staticmethod
+    def _dequeue_outbox(outbox, key, ghid):
+        ''' Remove the ghid from the outbox queue for the key. Returns
+        False if it wasn't queued.
+        '''
+        ghids = outbox.get(key)
+        try:
+            del ghids[ghid]
+        except (TypeError, KeyError):
+            return False
+        
+        if not ghids:
+            del outbox[key]
+        
+        return True
+    
+    # Subclasses MUST define this to work!
+    # @abc.abstractmethod
+    @fixture_api
+    async def _log_outbox(self, added, key, ghid):
+        ''' Persists a single change to the outbox. In-memory librarians
+        needn't do anything.
+        '''
+    
+    # Subclasses MUST define this to work!
+    # @abc.abstractmethod
+    @fixture_api
+    async def inventory(self):
+        ''' Return a list of every ghid in the cache. Dynamic bindings
+        are listed by their frame ghids.
+        '''
+        return list(self._shelf)
+    
     # Subclasses MUST define this to work!
     # @abc.abstractmethod
     @fixture_api
@@ -489,6 +603,11 @@ class DiskLibrarian(LibrarianCore):
     in memory.
     '''
     
+    _OUTBOX_FNAME = 'outbox.log'
+    # Number of stale lines the outbox log may accumulate (on top of twice
+    # the number of pending ghids) before it gets rewritten.
+    _OUTBOX_SLACK = 1000
+    
     def __init__(self, cache_dir, executor, loop, *args, **kwargs):
         ''' cache_dir should be relative to current.
         '''
@@ -509,6 +628,12 @@ class DiskLibrarian(LibrarianCore):
         # disk data
         self._restoration_flag = False
         
+        # Outbox log lines not yet written, whether they should replace the
+        # existing log, and the number of lines in the log.
+        self._outbox_buffer = []
+        self._outbox_rewrite = False
+        self._outbox_lines = 0
+        
         # Lookup for dynamic ghid -> frame ghid
         self._dyn_resolver = {}
         
@@ -651,6 +776,112 @@ class DiskLibrarian(LibrarianCore):
         fpath = self._make_path(ghid)
         return (await self._loop.run_in_executor(self._executor, fpath.exists))
     
+    async def inventory(self):
+        ''' Return a list of every ghid in the cache. Dynamic bindings
+        are listed by their frame ghids.
+        '''
+        return (await self._loop.run_in_executor(
+            self._executor,
+            self.__list_disk
+        ))
+    
+    async def _log_outbox(self, added, key, ghid):
+        ''' Persist the change to the outbox, so that pending uploads
+        survive restarts. The outbox is stored as an append-only log,
+        which is rewritten with only the pending ghids once it's mostly
+        made up of removals. Concurrent changes are written together.
+        '''
+        self._outbox_lines += 1
+        if self._outbox_lines > (2 * self.outbox_depth() +
+                                 self._OUTBOX_SLACK):
+            # This already includes anything still in the buffer.
+            self._outbox_buffer = [
+                self.__encode_outbox(True, pending_key, pending)
+                for pending_key, pendings in self._outbox.items()
+                for pending in pendings
+            ]
+            self._outbox_rewrite = True
+            self._outbox_lines = len(self._outbox_buffer)
+        
+        else:
+            self._outbox_buffer.append(self.__encode_outbox(added, key, ghid))
+        
+        async with self._cache_lock(self._OUTBOX_FNAME):
+            # Someone else may have already written our change for us.
+            if not self._outbox_buffer and not self._outbox_rewrite:
+                return
+            
+            lines = self._outbox_buffer
+            rewrite = self._outbox_rewrite
+            self._outbox_buffer = []
+            self._outbox_rewrite = False
+            await self._loop.run_in_executor(
+                self._executor,
+                self.__write_outbox,
+                lines,
+                rewrite
+            )
+    
+    @staticmethod
+    def __encode_outbox(added, key, ghid):
+        ''' Encode a single outbox change as a line for the log.
+        '''
+        return json.dumps(['+' if added else '-', key, ghid.as_str()]) + '\n'
+    
+    def __write_outbox(self, lines, rewrite):
+        ''' Append the lines to the outbox log, or atomically replace it
+        with them.
+        '''
+        fpath = self._cachedir / self._OUTBOX_FNAME
+        if rewrite:
+            tmp = fpath.with_suffix('.tmp')
+            tmp.write_text(''.join(lines))
+            tmp.replace(fpath)
+        
+        else:
+            with fpath.open('a') as f:
+                f.write(''.join(lines))
+    
+    def __read_outbox(self):
+        ''' Replay the outbox log, if it exists. Returns the outbox and
+        the number of lines in the log.
+        '''
+        outbox = {}
+        fpath = self._cachedir / self._OUTBOX_FNAME
+        try:
+            lines = fpath.read_text().splitlines()
+        except FileNotFoundError:
+            return outbox, 0
+        
+        for line in lines:
+            # A crash mid-write can leave a partial line at the end.
+            try:
+                op, key, ghid = json.loads(line)
+                ghid = Ghid.from_str(ghid)
+            except Exception:
+                logger.warning('Ignoring corrupted outbox line.')
+                continue
+            
+            if op == '+':
+                self._enqueue_outbox(outbox, key, ghid)
+            
+            else:
+                self._dequeue_outbox(outbox, key, ghid)
+        
+        return outbox, len(lines)
+    
+    def __list_disk(self):
+        ''' Lists all of the ghids in the disk cache.
+        '''
+        inventory = []
+        for child in self._cachedir.glob('*.ghid'):
+            try:
+                inventory.append(Ghid.from_str(child.stem))
+            except Exception:
+                logger.warning('Ignoring unparseable cache file: ' +
+                               child.name)
+        return inventory
+    
     async def resolve_frame(self, ghid):
         ''' Get the current frame ghid from the dynamic ghid.
         '''
@@ -698,7 +929,8 @@ class DiskLibrarian(LibrarianCore):
             # Iterate over each file within the cache. We're doing this one
             # time only, so don't bother doing the iterdir in an executor
             for child in self._cachedir.iterdir():
-                if child.is_file():
+                # Skip anything that isn't a ghid, like the outbox.
+                if child.is_file() and child.suffix == '.ghid':
                     data = await self._loop.run_in_executor(self._executor,
                                                             child.read_bytes)
                     obj = await self._percore.attempt_load(data)
@@ -710,6 +942,12 @@ class DiskLibrarian(LibrarianCore):
         finally:
             self._restoration_flag = False
         
+        outbox, self._outbox_lines = await self._loop.run_in_executor(
+            self._executor,
+            self.__read_outbox
+        )
+        self._outbox.update(outbox)
+        
     def _make_path(self, ghid):
         ''' Converts the ghid to a file path.
         '''
@@ -42,6 +42,44 @@ import datetime
 import time
 
 
+class _Event:
+    ''' A structured log message that defers all string formatting
+    until a handler actually emits it.
+    '''
+    __slots__ = ('event', 'fields')
+    
+    def __init__(self, event, fields):
+        self.event = event
+        self.fields = fields
+    
+    def __str__(self):
+        parts = [self.event]
+        for key, value in self.fields.items():
+            # Bodies are frequently memoryviews, which don't str usefully
+            if isinstance(value, memoryview):
+                value = bytes(value)
+            parts.append(key + '=' + str(value))
+        return ' '.join(parts)
+
+
+def log_event(logger, level, event, **fields):
+    ''' Log a structured event, ex:
+    
+    log_event(logger, logging.DEBUG, 'request.sent', conn=conn, req=token)
+    
+    If the logger isn't enabled for level, this returns immediately,
+    without formatting anything. Otherwise, the event name and fields
+    are also attached to the log record (as record.event and
+    record.event_fields), for any handlers that want them as data.
+    '''
+    if logger.isEnabledFor(level):
+        logger.log(
+            level,
+            _Event(event, fields),
+            extra = {'event': event, 'event_fields': fields}
+        )
+
+
 def _make_logpath(root, prefix, name, suffix, ext):
     ''' Creates a logname using the passed prefix, suffix, ext, etc.
     Returns a path.
@@ -76,6 +76,8 @@ from .utils import weak_property
 from .utils import readonly_property
 from .utils import KeyedAsyncioLock
 
+from .logutils import log_event
+
 
 # ###############################################
 # Boilerplate
@@ -423,19 +425,18 @@ class PersistenceCore(metaclass=API):
         
         async with self._ingestion_mutex(check_ghid):
             if (await self._librarian.contains(check_ghid)):
-                logger.debug(
-                    str(check_ghid) + ' not ingested: already exists.'
-                )
+                log_event(logger, logging.DEBUG, 'ingest.exists',
+                          ghid=check_ghid)
                 return False
             
             else:
-                logger.info(
-                    'Ingesting ' + str(obj) +
-                    (
-                        ' frame ' + str(counter) + ': ' + str(check_ghid) +
-                        ', target: ' + str(target)
-                    ) * log_frame + '...'
-                )
+                if log_frame:
+                    log_event(logger, logging.INFO, 'ingest.start', obj=obj,
+                              frame=check_ghid, counter=counter,
+                              target=target)
+                else:
+                    log_event(logger, logging.INFO, 'ingest.start', obj=obj)
+                
                 # Calculate "gidc", etc
                 suffix = self._ATTR_LOOKUP[type(obj)]
                 validation_method = 'validate_' + suffix
@@ -549,10 +550,12 @@ class PersistenceCore(metaclass=API):
         # will return None.
         if ingested:
             await self._postman.schedule(obj, skip_conn=skip_conn)
+            # This is a noop unless we have peered persistence servers.
+            self._salmonator.replicate(obj, skip_conn=skip_conn)
             
         else:
-            logger.debug(str(obj.ghid) + ' postal scheduling aborted on ' +
-                         'unchanged object.')
+            log_event(logger, logging.DEBUG, 'ingest.unchanged',
+                      ghid=obj.ghid)
         
         # Note: this is not the place for salmonator pushing! Locally
         # created/updated objects call the individual ingest methods
@@ -878,8 +881,8 @@ class Enforcer(metaclass=API):
         # appropriately to raise a DoesNotExist instead of a KeyError.
         # This could be more specific and say DoesNotExist
         except KeyError:
-            logger.debug(str(obj) + ' target missing from librarian: ' +
-                         str(obj.target))
+            log_event(logger, logging.DEBUG, 'validate.target_missing',
+                      obj=obj, target=obj.target)
         else:
             for forbidden in (_GidcLite, _GobsLite, _GdxxLite, _GarqLite):
                 if isinstance(target, forbidden):
@@ -895,8 +898,8 @@ class Enforcer(metaclass=API):
         try:
             target = await self._librarian.summarize(obj.target)
         except KeyError:
-            logger.debug(str(obj) + ' target missing from librarian: ' +
-                         str(obj.target))
+            log_event(logger, logging.DEBUG, 'validate.target_missing',
+                      obj=obj, target=obj.target)
         else:
             for forbidden in (_GidcLite, _GobsLite, _GdxxLite, _GarqLite):
                 if isinstance(target, forbidden):
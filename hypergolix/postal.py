@@ -37,7 +37,6 @@ import collections
 import weakref
 import queue
 import threading
-import traceback
 import asyncio
 import loopa
 
@@ -64,6 +63,8 @@ from .hypothetical import fixture_api
 from .hypothetical import fixture_noop
 from .hypothetical import fixture_return
 
+from .logutils import log_event
+
 
 # ###############################################
 # Boilerplate
@@ -150,7 +151,8 @@ class PostalCore(loopa.TaskLooper, metaclass=API):
         subscription, notification, skip_conn = await self._scheduled.get()
         
         try:
-            logger.info(str(subscription) + ' subscription out for delivery.')
+            log_event(logger, logging.INFO, 'postal.delivering',
+                      subscription=subscription)
             # We can't spin this out into a thread because some of our
             # delivery mechanisms want this to have an event loop.
             await self._deliver(subscription, notification, skip_conn)
@@ -160,10 +162,9 @@ class PostalCore(loopa.TaskLooper, metaclass=API):
             raise
         
         except Exception:
-            logger.error(str(subscription) + ' subscription FAILED for ' +
-                         'notification ' + str(notification) +
-                         ' w/ traceback:\n' +
-                         ''.join(traceback.format_exc()))
+            logger.error('%s subscription FAILED for notification %s ' +
+                         'w/ traceback:', subscription, notification,
+                         exc_info=True)
             
         finally:
             self._scheduled.task_done()
@@ -234,16 +235,14 @@ class PostalCore(loopa.TaskLooper, metaclass=API):
         else:
             notifier = _SubsUpdate(obj.ghid, obj.frame_ghid, skip_conn)
             if (await self._librarian.contains(obj.target)):
-                logger.debug(str(obj) +
-                             ' subscription notification scheduled for: ' +
-                             str(obj.target))
+                log_event(logger, logging.DEBUG, 'postal.scheduled', obj=obj,
+                          target=obj.target)
                 await self._scheduled.put(notifier)
             
             else:
                 self._deferred.add(obj.target, notifier)
-                logger.debug(str(obj) +
-                             ' subscription notification deferred for: ' +
-                             str(obj.target))
+                log_event(logger, logging.DEBUG, 'postal.deferred', obj=obj,
+                          target=obj.target)
         
     async def _schedule_gdxx(self, obj, removed, skip_conn):
         # GDXX will never directly trigger a subscription. If they are removing
@@ -311,18 +310,23 @@ class MrPostman(PostalCore, metaclass=API):
         '''
         # We just got a garq for our identity. Rolodex handles these.
         if subscription == self._golcore.whoami:
-            logger.debug(str(subscription) +
-                         'subscription notification handed off to rolodex...')
+            log_event(logger, logging.DEBUG, 'postal.to_rolodex',
+                      subscription=subscription)
             await self._rolodex.notification_handler(
                 subscription,
                 notification
             )
         
         # Anything else is an object subscription. Handle those by directly,
-        # but only if we have them in memory.
-        # elif subscription in self._oracle:
-        # Note: that was causing issues so I'm holding off on it as premature
-        # optimization / feature creep
+        # but only if we have them in memory. Otherwise, this would load it as
+        # a bare GAOCore, and the next typed get_object would fail. It's
+        # probably an eviction or GC racing the subscription update.
+        elif not self._oracle.is_loaded(subscription):
+            log_event(logger, logging.DEBUG, 'postal.not_loaded',
+                      subscription=subscription,
+                      notification=notification)
+            await self._salmonator.deregister(subscription)
+        
         else:
             # The ingestion pipeline will already have applied any new updates
             # to the ghidproxy.
@@ -330,14 +334,15 @@ class MrPostman(PostalCore, metaclass=API):
                 obj = await self._oracle.get_object(GAOCore, subscription)
             
             except KeyError:
-                logger.debug(str(subscription) + ' subscription delivery ' +
-                             'ignored: unavailable at oracle: ' +
-                             str(notification))
+                log_event(logger, logging.DEBUG, 'postal.not_at_oracle',
+                          subscription=subscription,
+                          notification=notification)
                 await self._salmonator.deregister(subscription)
                 
             else:
-                logger.debug(str(subscription) + ' subscription delivery ' +
-                             'starting for ' + str(notification))
+                log_event(logger, logging.DEBUG, 'postal.pulling',
+                          subscription=subscription,
+                          notification=notification)
                 await obj.pull(notification)
         
         
@@ -352,6 +357,8 @@ class PostOffice(PostalCore, metaclass=API):
         # Lookup <subscribed ghid>: set(<subscribed callbacks>)
         self._connections = WeakSetMap()
         self._subscriptions = WeakKeySetMap()
+        # Connections that want targets bundled with their binding updates
+        self._bundled = weakref.WeakSet()
         
         self._subs_timeout = subs_timeout
         
@@ -365,7 +372,8 @@ class PostOffice(PostalCore, metaclass=API):
         ''' Tells the postman that the connection would like to be
         updated about ghid.
         '''
-        logger.debug('CONN ' + str(connection) + ' subscribed to ' + str(ghid))
+        log_event(logger, logging.DEBUG, 'postal.subscribed',
+                  conn=connection, ghid=ghid)
         
         # First add the subscription listeners
         self._connections.add(ghid, connection)
@@ -377,6 +385,20 @@ class PostOffice(PostalCore, metaclass=API):
             obj = await self._librarian.summarize(existing_mail)
             await self.schedule(obj)
     
+    @fixture_noop
+    @public_api
+    async def set_bundling(self, connection, enabled):
+        ''' Tells the postman whether or not the connection would like
+        target containers bundled with dynamic binding updates.
+        '''
+        log_event(logger, logging.DEBUG, 'postal.bundling', conn=connection,
+                  enabled=enabled)
+        
+        if enabled:
+            self._bundled.add(connection)
+        else:
+            self._bundled.discard(connection)
+    
     @fixture_noop
     @public_api
     async def unsubscribe(self, connection, ghid):
@@ -390,13 +412,13 @@ class PostOffice(PostalCore, metaclass=API):
             self._connections.remove(ghid, connection)
             
         except KeyError:
-            logger.debug('CONN ' + str(connection) + ' never subscribed to ' +
-                         str(ghid))
+            log_event(logger, logging.DEBUG, 'postal.never_subscribed',
+                      conn=connection, ghid=ghid)
             return False
             
         else:
-            logger.debug('CONN ' + str(connection) + ' unsubscribed to ' +
-                         str(ghid))
+            log_event(logger, logging.DEBUG, 'postal.unsubscribed',
+                      conn=connection, ghid=ghid)
             return True
             
     async def _deliver(self, subscription, notification, skip_conn):
@@ -404,16 +426,14 @@ class PostOffice(PostalCore, metaclass=API):
         
         NOTE THAT SKIP_CONN is a weakref.ref.
         '''
-        pkg_label = (str(subscription) + ' subscription, notification ' +
-                     str(notification))
         # We need to freeze the listeners before we operate on them, but we
         # don't need to lock them while we go through all of the callbacks.
         # Instead, just sacrifice any subs being added concurrently to the
         # current delivery run.
         connections = self._connections.get_any(subscription)
-        logger.debug(
-            pkg_label + ' has ' + str(len(connections)) + ' listeners.'
-        )
+        log_event(logger, logging.DEBUG, 'postal.listeners',
+                  subscription=subscription, notification=notification,
+                  listeners=len(connections))
         
         # Resolve the weak reference to the connection
         if skip_conn is not None:
@@ -422,10 +442,15 @@ class PostOffice(PostalCore, metaclass=API):
             
         for connection in connections:
             if connection is not skip_conn:
+                if connection in self._bundled:
+                    updater = self._remote_protocol.bundled_update
+                else:
+                    updater = self._remote_protocol.subscription_update
+                
                 # Make this a background task, or one blocking connection can
                 # hold up the entire subscription queue
                 make_background_future(
-                    self._remote_protocol.subscription_update(
+                    updater(
                         connection,
                         subscription,
                         notification,
@@ -433,7 +458,9 @@ class PostOffice(PostalCore, metaclass=API):
                     )
                 )
             else:
-                logger.debug(pkg_label + ' skipped one connection.')
+                log_event(logger, logging.DEBUG, 'postal.skipped',
+                          subscription=subscription,
+                          notification=notification)
     
     @fixture_return(frozenset())
     @public_api
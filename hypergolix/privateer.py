@@ -101,12 +101,30 @@ class Privateer(metaclass=API):
     _golcore = weak_property('__golcore')
     
     @public_api
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, ratchet_cache=1000, **kwargs):
         ''' Temporarily invalidate (but init) the various secrets
         lookups.
+        
+        ratchet_cache is the number of ratchet results to remember, or
+        None to always recalculate them.
         '''
         super().__init__(*args, **kwargs)
         
+        # Lookup (<proxy>, <salt ghid>): (<source secret>, <ratcheted secret>)
+        if ratchet_cache is None:
+            self._ratchet_cache = None
+        else:
+            self._ratchet_cache = FiniteDict(maxlen=ratchet_cache)
+        self._ratchet_maxlen = ratchet_cache
+        # Indices into the ratchet cache, so that abandoning doesn't need to
+        # scan it. These may hold keys the cache has since dropped.
+        # Lookup <salt ghid>: set(<cache key>)
+        self._ratchets_by_salt = {}
+        # Lookup <ratcheted secret>: <cache key>
+        self._ratchets_by_output = {}
+        self.ratchet_hits = 0
+        self.ratchet_misses = 0
+        
         # These must be bootstrapped.
         self._secrets_persistent = None
         self._secrets_quarantine = None
@@ -391,12 +409,58 @@ class Privateer(metaclass=API):
         # Short circuit any tests if quiet is enabled
         if not quiet and ghid not in self._secrets:
             raise UnknownSecret('Secret not found for ' + str(ghid))
-            
+        
+        secret = self._secrets.get(ghid)
         self._secrets_persistent.pop(ghid, None)
         self._secrets_local.pop(ghid, None)
         self._secrets_quarantine.pop(ghid, None)
         self._secrets_staging.pop(ghid, None)
         self._secrets_deprecated.pop(ghid, None)
+        self._forget_ratchets(ghid, secret)
+    
+    def _forget_ratchets(self, ghid, secret):
+        ''' Remove any cached ratchets from (or to) the ghid, so that we
+        don't keep its secret around after it's been abandoned.
+        '''
+        if self._ratchet_cache is None:
+            return
+        
+        stale = self._ratchets_by_salt.pop(ghid, set())
+        if secret is not None:
+            key = self._ratchets_by_output.pop(secret, None)
+            if key is not None:
+                stale.add(key)
+        
+        for key in stale:
+            try:
+                source, ratcheted = self._ratchet_cache.pop(key)
+            
+            # Already dropped from the cache.
+            except KeyError:
+                continue
+            
+            self._ratchets_by_output.pop(ratcheted, None)
+            salted = self._ratchets_by_salt.get(key[1])
+            if salted is not None:
+                salted.discard(key)
+                if not salted:
+                    del self._ratchets_by_salt[key[1]]
+    
+    def _index_ratchet(self, key, ratcheted):
+        ''' Add a newly-cached ratchet to the indices, rebuilding them
+        if they've accumulated too many keys the cache has dropped.
+        '''
+        if len(self._ratchets_by_output) >= 2 * self._ratchet_maxlen:
+            self._ratchets_by_salt.clear()
+            self._ratchets_by_output.clear()
+            for cached_key, (__, cached) in self._ratchet_cache.items():
+                self._ratchets_by_salt.setdefault(
+                    cached_key[1], set()
+                ).add(cached_key)
+                self._ratchets_by_output[cached] = cached_key
+        
+        self._ratchets_by_salt.setdefault(key[1], set()).add(key)
+        self._ratchets_by_output[ratcheted] = key
         
     @fixture_noop
     @public_api
@@ -430,7 +494,7 @@ class Privateer(metaclass=API):
             # secret for the current target.
             if master_secret is None:
                 existing_secret = self.get(current_target)
-                ratcheted = self._ratchet(
+                ratcheted = self._cached_ratchet(
                     secret = existing_secret,
                     proxy = proxy,
                     salt_ghid = current_target
@@ -440,7 +504,7 @@ class Privateer(metaclass=API):
             # static "seed" secret.
             else:
                 existing_secret = None
-                ratcheted = self._ratchet(
+                ratcheted = self._cached_ratchet(
                     secret = master_secret,
                     proxy = proxy,
                     salt_ghid = current_target
@@ -515,6 +579,81 @@ class Privateer(metaclass=API):
                 )
                 self.stage(target, secret)
         
+        # The next frame will need to be healed from this one.
+        self.prime_ratchet(proxy, target_vector[0], master_secret)
+    
+    def prime_ratchet(self, proxy, current_target, master_secret=None):
+        ''' Precompute (soon, but not now) the ratchet from the current
+        target, so that the next push or heal for the proxy won't need
+        to wait for it.
+        '''
+        if self._ratchet_cache is None:
+            return
+        
+        # This may be called from outside the event loop (ex: while healing
+        # from within the persistence executor), so use the golcore's loop.
+        try:
+            loop = self._golcore._loop
+        except AttributeError:
+            loop = None
+        
+        # No event loop (ex: golcore fixtures); don't bother.
+        if loop is None:
+            return
+        
+        try:
+            loop.call_soon_threadsafe(
+                self._prime_ratchet,
+                proxy,
+                current_target,
+                master_secret
+            )
+        
+        # The loop has already closed.
+        except RuntimeError:
+            logger.debug('Failed to schedule ratchet priming for %s.', proxy)
+    
+    def _prime_ratchet(self, proxy, current_target, master_secret):
+        ''' Callback for prime_ratchet.
+        '''
+        try:
+            self.ratchet_chain(proxy, current_target, master_secret)
+        
+        # Something changed in the meantime (ex: the secret was abandoned).
+        # Whoever needs the ratchet will find out for themselves, and nobody
+        # is waiting on this anyways, so don't let anything escape.
+        except Exception:
+            logger.debug(
+                'Failed to prime ratchet for %s from %s.', proxy,
+                current_target, exc_info = True
+            )
+    
+    def _cached_ratchet(self, secret, proxy, salt_ghid):
+        ''' Ratchet the secret, reusing the result if we've already done
+        so for the proxy and salt_ghid.
+        '''
+        if self._ratchet_cache is None:
+            return self._ratchet(secret, proxy, salt_ghid)
+        
+        key = (proxy, salt_ghid)
+        try:
+            source, ratcheted = self._ratchet_cache[key]
+        
+        except KeyError:
+            pass
+        
+        else:
+            # A different source secret (ex: master vs frame) can't reuse it.
+            if source == secret:
+                self.ratchet_hits += 1
+                return ratcheted
+        
+        self.ratchet_misses += 1
+        ratcheted = self._ratchet(secret, proxy, salt_ghid)
+        self._ratchet_cache[key] = (secret, ratcheted)
+        self._index_ratchet(key, ratcheted)
+        return ratcheted
+    
     @staticmethod
     def _ratchet(secret, proxy, salt_ghid):
         ''' Ratchets a key using HKDF-SHA512, using the associated
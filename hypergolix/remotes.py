@@ -47,11 +47,14 @@ RemoteNak status code conventions:
 '''
 
 # Global dependencies
+import os
 import logging
 import weakref
 import collections
 import traceback
 import asyncio
+import functools
+import time
 import loopa
 
 from loopa.utils import make_background_future
@@ -96,7 +99,10 @@ from .exceptions import IPCError
 
 from .utils import weak_property
 from .utils import readonly_property
-from .utils import ListMap
+from .utils import FiniteDict
+from .utils import LatencyTracker
+
+from .logutils import log_event
 
 from .comms import RequestResponseAPI
 from .comms import request
@@ -145,9 +151,14 @@ ERROR_CODES = {
 
 class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
                                 error_codes=ERROR_CODES,
-                                default_version=b'\x00\x00'):
+                                default_version=b'\x00\x00',
+                                wide_version=b'\x00\x01'):
     ''' Defines the protocol for remote persisters.
     '''
+    # Objects can be large, so pass them along without copying them out of
+    # the incoming messages.
+    _BODY_VIEWS = True
+    
     _percore = weak_property('__percore')
     _librarian = weak_property('__librarian')
     _postman = weak_property('__postman')
@@ -254,7 +265,7 @@ class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
     async def get(self, connection, body):
         ''' Handle get requests.
         '''
-        ghid = Ghid.from_bytes(body)
+        ghid = Ghid.from_bytes(bytes(body))
         return (await self._librarian.retrieve(ghid))
     
     @public_api
@@ -273,7 +284,7 @@ class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
     async def subscribe(self, connection, body):
         ''' Handle subscription requests.
         '''
-        ghid = Ghid.from_bytes(body)
+        ghid = Ghid.from_bytes(bytes(body))
         await self._postman.subscribe(connection, ghid)
         return b'\x01'
         
@@ -287,7 +298,7 @@ class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
     async def unsubscribe(self, connection, body):
         ''' Handle unsubscription requests.
         '''
-        ghid = Ghid.from_bytes(body)
+        ghid = Ghid.from_bytes(bytes(body))
         had_subscription = await self._postman.unsubscribe(connection, ghid)
         
         if had_subscription:
@@ -315,7 +326,7 @@ class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
         ''' Send a subscription update to the connection.
         '''
         payload = await self._librarian.retrieve(notification_ghid)
-        return bytes(subscription_ghid) + payload
+        return (bytes(subscription_ghid), payload)
         
     @subscription_update.fixture
     async def subscription_update(self, connection, subscription_ghid,
@@ -329,9 +340,95 @@ class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
     async def subscription_update(self, connection, body):
         ''' Handles an incoming subscription update.
         '''
-        subscribed_ghid = Ghid.from_bytes(body[0:65])
+        subscribed_ghid = Ghid.from_bytes(bytes(body[0:65]))
         notification = body[65:]
+        await self._ingest_update(connection, subscribed_ghid, notification)
+        return b'\x01'
+    
+    @public_api
+    @request(b'!B')
+    async def bundled_update(self, connection, subscription_ghid,
+                             notification_ghid):
+        ''' Send a subscription update to the connection, bundling the
+        target container along with any dynamic binding frame. Only to
+        be used for connections that have requested bundling.
+        '''
+        payload = await self._librarian.retrieve(notification_ghid)
         
+        obj = await self._librarian.summarize(notification_ghid)
+        if (isinstance(obj, _GobdLite) and
+                (await self._librarian.contains(obj.target))):
+            target = await self._librarian.retrieve(obj.target)
+        else:
+            target = b''
+        
+        return (
+            bytes(subscription_ghid),
+            len(payload).to_bytes(4, 'big'),
+            payload,
+            target
+        )
+    
+    @bundled_update.fixture
+    async def bundled_update(self, connection, subscription_ghid,
+                             notification_ghid, timeout=None):
+        ''' Make a manual no-op fixture; see subscription_update.
+        '''
+    
+    @bundled_update.request_handler
+    async def bundled_update(self, connection, body):
+        ''' Handles an incoming bundled subscription update.
+        '''
+        subscribed_ghid = Ghid.from_bytes(bytes(body[0:65]))
+        length = int.from_bytes(body[65:69], 'big')
+        notification = body[69:69 + length]
+        target = body[69 + length:]
+        
+        await self._ingest_update(
+            connection,
+            subscribed_ghid,
+            notification,
+            target or None
+        )
+        return b'\x01'
+    
+    @public_api
+    @request(b'+B')
+    async def request_bundling(self, connection, enabled=True):
+        ''' Ask the remote to bundle target containers with dynamic
+        binding frames in all subscription updates on this connection.
+        '''
+        if enabled:
+            return b'\x01'
+        else:
+            return b'\x00'
+    
+    @request_bundling.fixture
+    async def request_bundling(self, connection, enabled=True):
+        ''' Manual noop.
+        '''
+    
+    @request_bundling.request_handler
+    async def request_bundling(self, connection, body):
+        ''' Handle bundling requests.
+        '''
+        await self._postman.set_bundling(connection, body == b'\x01')
+        return b'\x01'
+    
+    @request_bundling.response_handler
+    async def request_bundling(self, connection, response, exc):
+        ''' Handle responses to bundling requests.
+        '''
+        if exc is not None:
+            raise exc
+        else:
+            return True
+        
+    async def _ingest_update(self, connection, subscribed_ghid, notification,
+                             target=None):
+        ''' Ingest a subscription update (and, if bundled, its target),
+        notifying the salmonator as needed.
+        '''
         try:
             # Note that this handles postman scheduling as well.
             ingested = await self._percore.ingest(
@@ -354,15 +451,123 @@ class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
             )
             
         else:
+            if not ingested:
+                return
+            
+            # The target must be ingested after the binding, or it would be
+            # rejected as unbound. Do it before notifying the salmonator,
+            # so that it doesn't need to go back upstream for it.
+            if target is not None:
+                try:
+                    await self._percore.ingest(
+                        target,
+                        remotable = False,
+                        skip_conn = connection
+                    )
+                
+                # The salmonator will just fall back to pulling it.
+                except Exception:
+                    logger.info('%s bundled update target not ingested ' +
+                                'w/ traceback:', subscribed_ghid,
+                                exc_info=True)
+            
             # But, if ingested, we need to notify the salmonator, so it can (if
             # needed) also acquire the target
-            if ingested:
-                make_background_future(
-                    self._salmonator.notify(subscribed_ghid)
-                )
+            make_background_future(
+                self._salmonator.notify(subscribed_ghid)
+            )
         
-        return b'\x01'
+    @public_api
+    @request(b'RS')
+    async def resync(self, connection, cursors):
+        ''' Resubscribe to a batch of dynamic ghids, getting back any
+        updates we missed while disconnected. cursors is an iterable of
+        (<dynamic ghid>, <last known counter>), with a counter of -1 if
+        the ghid is entirely unknown locally.
+        '''
+        return b''.join(
+            bytes(ghid) + counter.to_bytes(8, 'big', signed=True)
+            for ghid, counter in cursors
+        )
+    
+    @resync.fixture
+    async def resync(self, connection, cursors):
+        ''' Skip subscriptions and go straight to the librarian.
+        '''
+        return (await self._resync_payloads(cursors))
+    
+    @resync.request_handler
+    async def resync(self, connection, body):
+        ''' Handle resync requests: subscribe to everything, and return
+        (length-prefixed) payloads for anything that has changed.
+        '''
+        if len(body) % 73:
+            raise ValueError('Malformed resync request.')
+        
+        cursors = []
+        for offset in range(0, len(body), 73):
+            ghid = Ghid.from_bytes(bytes(body[offset:offset + 65]))
+            counter = int.from_bytes(
+                body[offset + 65:offset + 73],
+                'big',
+                signed = True
+            )
+            await self._postman.subscribe(connection, ghid)
+            cursors.append((ghid, counter))
+        
+        payloads = await self._resync_payloads(cursors)
+        parts = []
+        for payload in payloads:
+            parts.append(len(payload).to_bytes(4, 'big'))
+            parts.append(payload)
+        return parts
+    
+    @resync.response_handler
+    async def resync(self, connection, response, exc):
+        ''' Unpack the resync payloads into a list, in the order they
+        should be ingested.
+        '''
+        if exc is not None:
+            raise exc
+        
+        payloads = []
+        offset = 0
+        while offset < len(response):
+            length = int.from_bytes(response[offset:offset + 4], 'big')
+            offset += 4
+            payloads.append(response[offset:offset + length])
+            offset += length
         
+        return payloads
+    
+    async def _resync_payloads(self, cursors):
+        ''' Collect payloads for everything in cursors that's newer at
+        the librarian. For each, this is any debindings, or the current
+        frame followed by its target (if available). Bindings must come
+        before their targets, or the targets would be rejected as unbound.
+        '''
+        payloads = []
+        for ghid, counter in cursors:
+            debindings = await self._librarian.debind_status(ghid)
+            if debindings:
+                for debinding in debindings:
+                    payloads.append(await self._librarian.retrieve(debinding))
+                continue
+            
+            try:
+                obj = await self._librarian.summarize(ghid)
+            except KeyError:
+                continue
+            
+            if not isinstance(obj, _GobdLite) or obj.counter <= counter:
+                continue
+            
+            payloads.append(await self._librarian.retrieve(ghid))
+            if (await self._librarian.contains(obj.target)):
+                payloads.append(await self._librarian.retrieve(obj.target))
+        
+        return payloads
+    
     @request(b'?S')
     async def query_subscriptions(self, connection):
         ''' Request a list of all currently subscribed ghids.
@@ -385,19 +590,26 @@ class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
             raise exc
         
         parser = generate_ghidlist_parser()
-        return set(parser.unpack(response))
+        return set(parser.unpack(bytes(response)))
         
+    @public_api
     @request(b'?B')
     async def query_bindings(self, connection, ghid):
         ''' Get a list of all bindings for the ghid.
         '''
         return bytes(ghid)
         
+    @query_bindings.fixture
+    async def query_bindings(self, connection, ghid):
+        ''' Go straight to the librarian.
+        '''
+        return set(await self._librarian.bind_status(ghid))
+    
     @query_bindings.request_handler
     async def query_bindings(self, connection, body):
         ''' Handle binding query requests.
         '''
-        ghid = Ghid.from_bytes(body)
+        ghid = Ghid.from_bytes(bytes(body))
         ghidlist = await self._librarian.bind_status(ghid)
         parser = generate_ghidlist_parser()
         return parser.pack(list(ghidlist))
@@ -410,7 +622,7 @@ class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
             raise exc
             
         parser = generate_ghidlist_parser()
-        return set(parser.unpack(response))
+        return set(parser.unpack(bytes(response)))
         
     @request(b'?D')
     async def query_debindings(self, connection, ghid):
@@ -422,7 +634,7 @@ class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
     async def query_debindings(self, connection, body):
         ''' Handles debinding query requests.
         '''
-        ghid = Ghid.from_bytes(body)
+        ghid = Ghid.from_bytes(bytes(body))
         ghidlist = await self._librarian.debind_status(ghid)
         parser = generate_ghidlist_parser()
         return parser.pack(list(ghidlist))
@@ -435,7 +647,7 @@ class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
             raise exc
             
         parser = generate_ghidlist_parser()
-        return set(parser.unpack(response))
+        return set(parser.unpack(bytes(response)))
     
     @public_api
     @request(b'?E')
@@ -454,7 +666,7 @@ class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
     async def query_existence(self, connection, body):
         ''' Handle existence queries.
         '''
-        ghid = Ghid.from_bytes(body)
+        ghid = Ghid.from_bytes(bytes(body))
         if (await self._librarian.contains(ghid)):
             return b'\x01'
         else:
@@ -470,7 +682,109 @@ class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
             return False
         else:
             return True
+    
+    @public_api
+    @request(b'?M')
+    async def query_missing(self, connection, cursors):
+        ''' Check which of a batch of objects the remote is missing.
+        cursors is an iterable of (<ghid>, <counter>); for dynamic
+        bindings, ghid is the dynamic ghid and counter is our current
+        counter. Everything else uses a counter of -1.
+        '''
+        return b''.join(
+            bytes(ghid) + counter.to_bytes(8, 'big', signed=True)
+            for ghid, counter in cursors
+        )
+    
+    @query_missing.fixture
+    async def query_missing(self, connection, cursors):
+        ''' Go straight to the librarian.
+        '''
+        return [(await self._is_missing(ghid, counter))
+                for ghid, counter in cursors]
+    
+    @query_missing.request_handler
+    async def query_missing(self, connection, body):
+        ''' Handle missing object queries, returning one byte per
+        cursor.
+        '''
+        if len(body) % 73:
+            raise ValueError('Malformed missing object query.')
+        
+        flags = bytearray()
+        for offset in range(0, len(body), 73):
+            ghid = Ghid.from_bytes(bytes(body[offset:offset + 65]))
+            counter = int.from_bytes(
+                body[offset + 65:offset + 73],
+                'big',
+                signed = True
+            )
+            flags.append(await self._is_missing(ghid, counter))
+        
+        return bytes(flags)
+    
+    @query_missing.response_handler
+    async def query_missing(self, connection, response, exc):
+        ''' Unpack the missing flags into a list of bools.
+        '''
+        if exc is not None:
+            raise exc
+        else:
+            return [bool(flag) for flag in bytes(response)]
+    
+    async def _is_missing(self, ghid, counter):
+        ''' Check if the librarian is missing the object. Dynamic
+        bindings are missing if we have an older frame (or none at all),
+        unless they've already been debound here.
+        '''
+        if counter < 0:
+            return not (await self._librarian.contains(ghid))
+        
+        elif (await self._librarian.debind_status(ghid)):
+            return False
+        
+        try:
+            obj = await self._librarian.summarize(ghid)
+        except KeyError:
+            return True
+        else:
+            return obj.counter < counter
         
+    @public_api
+    @request(b'PH')
+    async def peer_hello(self, connection, peer_id):
+        ''' Identify ourselves to a peered persistence server, so that
+        it won't replicate our own objects back to us.
+        '''
+        return peer_id
+    
+    @peer_hello.fixture
+    async def peer_hello(self, connection, peer_id):
+        ''' Register the peer directly with the salmonator.
+        '''
+        self._salmonator.add_peer_origin(connection, peer_id)
+        return self._salmonator.peer_id
+    
+    @peer_hello.request_handler
+    async def peer_hello(self, connection, body):
+        ''' Record the connection as coming from a peer, and return our
+        own peer id.
+        '''
+        if len(body) != 16:
+            raise ValueError('Malformed peer id.')
+        
+        self._salmonator.add_peer_origin(connection, bytes(body))
+        return self._salmonator.peer_id
+    
+    @peer_hello.response_handler
+    async def peer_hello(self, connection, response, exc):
+        ''' Return the remote's peer id.
+        '''
+        if exc is not None:
+            raise exc
+        else:
+            return bytes(response)
+    
     @request(b'XX')
     async def disconnect(self, connection):
         ''' Terminates all subscriptions and requests.
@@ -485,6 +799,107 @@ class RemotePersistenceProtocol(metaclass=RequestResponseAPI,
         return b'\x01'
 
 
+class _RemoteStats:
+    ''' Tracks request latency and success rate for a single upstream
+    remote.
+    '''
+    
+    def __init__(self, window=100):
+        self.latency = LatencyTracker(window=window)
+        self.successes = 0
+        self.failures = 0
+    
+    def record_success(self, duration):
+        self.successes += 1
+        self.latency.record(duration)
+    
+    def record_failure(self):
+        self.failures += 1
+    
+    @property
+    def success_rate(self):
+        ''' Laplace-smoothed, so that a single early failure doesn't
+        permanently bury a remote.
+        '''
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+    
+    @property
+    def score(self):
+        ''' Expected cost of asking this remote first; lower is
+        better. Remotes we know nothing about score zero, so that they
+        get tried (and we learn something about them).
+        '''
+        mean = self.latency.mean
+        if mean is None:
+            return 0
+        else:
+            return mean / self.success_rate
+
+
+class _PeerStats:
+    ''' Tracks replication state for a single downstream peer.
+    '''
+    
+    def __init__(self, maxlen=10000, window=100):
+        # The id the peer reported at peer_hello.
+        self.peer_id = None
+        # Ordered queue of (<reference ghid>, <time.monotonic() enqueued>)
+        self.backlog = collections.deque()
+        self.maxlen = maxlen
+        # Set if we ever drop anything from the backlog, in which case we
+        # need a full anti-entropy pass to catch back up.
+        self.overflowed = False
+        # These are created once we have a connection and a loop.
+        self.wakeup = None
+        self.pump = None
+        # Set of every ghid currently waiting in the backlog
+        self.queued = set()
+        # Cleared if the peer doesn't understand batched missing queries.
+        self.batch_queries = True
+        
+        self.lag = LatencyTracker(window=window)
+        self.replicated = 0
+        self.superseded = 0
+        self.failed = 0
+        self.caught_up = 0
+        self.last_sync = None
+    
+    def enqueue(self, ghid):
+        # Dynamic bindings are always sent at their current frame, so if
+        # one is already waiting, there's no need to queue it again.
+        if ghid in self.queued:
+            return
+        
+        if len(self.backlog) >= self.maxlen:
+            dropped, __ = self.backlog.popleft()
+            self.queued.discard(dropped)
+            self.overflowed = True
+        
+        self.backlog.append((ghid, time.monotonic()))
+        self.queued.add(ghid)
+        if self.wakeup is not None:
+            self.wakeup.set()
+    
+    def clear(self):
+        self.backlog.clear()
+        self.queued.clear()
+        self.overflowed = False
+    
+    @property
+    def pending(self):
+        return len(self.backlog)
+    
+    @property
+    def behind(self):
+        ''' How long, in seconds, the oldest unreplicated object has
+        been waiting.
+        '''
+        if self.backlog:
+            return time.monotonic() - self.backlog[0][1]
+        else:
+            return 0
+
+
 class Salmonator(loopa.TaskLooper, metaclass=API):
     ''' Responsible for disseminating Golix objects upstream and
     downstream. Handles all comms with them as well.
@@ -494,20 +909,100 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
     _librarian = weak_property('__librarian')
     _remote_protocol = weak_property('__remote_protocol')
     
+    # Requests that must go over the same connection as our subscriptions.
+    # Disconnecting is what clears the subscriptions at the remote. Publishing
+    # is pinned too, since the remote only skips echoing a publish back to us
+    # when it arrives on the connection we subscribed with.
+    _PINNED_REQUESTS = frozenset({
+        'publish',
+        'subscribe',
+        'unsubscribe',
+        'resync',
+        'request_bundling',
+        'query_subscriptions',
+        'disconnect',
+    })
+    
+    # Push order for anti-entropy: identities first, then bindings, then
+    # their targets, and debindings last.
+    _ANTIENTROPY_ORDER = {
+        _GidcLite: 0,
+        _GobsLite: 1,
+        _GobdLite: 1,
+        _GarqLite: 2,
+        _GeocLite: 3,
+        _GdxxLite: 4,
+    }
+    
     @public_api
-    def __init__(self, *args, **kwargs):
-        ''' Yarp.
+    def __init__(self, *args, negative_ttl=2, negative_maxlen=1000,
+                 hedge_percentile=95, hedge_default=.5, hedge_min_samples=10,
+                 resync_batch=250, peer_backlog=10000,
+                 antientropy_batch=250, bundle_updates=True, pool_size=1,
+                 **kwargs):
+        ''' negative_ttl is the number of seconds for which a ghid that
+        was unavailable at every upstream remote will be reported as
+        unavailable without asking the remotes again.
+        
+        Pulls go to the best remote first, and are hedged to the next
+        remote once the hedge_percentile latency of the first one has
+        elapsed (or hedge_default seconds, until hedge_min_samples pulls
+        have been timed).
+        
+        Each downstream peer buffers up to peer_backlog objects for
+        replication; beyond that, we fall back to a full anti-entropy
+        pass, checking antientropy_batch objects at a time.
+        
+        If bundle_updates is True, we ask upstream remotes to include
+        target containers with subscription updates, saving a pull.
+        
+        If pool_size is greater than one, downloads from each upstream
+        remote are spread across that many connections, with publishes
+        and subscription traffic kept to the primary connection.
         '''
         super().__init__(*args, **kwargs)
         
-        self._deferred = ListMap()
+        # Lookup for <upstream remote>: <outbox key>
+        self._remote_keys = {}
+        
+        # Lookup for <remote>: <_RemoteStats>
+        self._remote_stats = {}
+        # Max number of subscriptions to resync per request
+        self._resync_batch = resync_batch
+        self._bundle_updates = bundle_updates
+        self._pool_size = pool_size
+        self.resync_updates = 0
+        self._hedge_percentile = hedge_percentile
+        self._hedge_default = hedge_default
+        self._hedge_min_samples = hedge_min_samples
+        
+        # Lookup for <ghid>: <shared pull future>, so that concurrent pulls
+        # for the same ghid only hit the remotes once.
+        self._pulls_in_flight = {}
+        # Lookup for <ghid>: <time.monotonic() expiry>
+        self._negative_ttl = negative_ttl
+        self._unavailable = FiniteDict(maxlen=negative_maxlen)
+        
+        # Metrics
+        self.pulls_coalesced = 0
+        self.pulls_negative_cached = 0
         self._clear_q = None
         
         self._upstream_remotes = set()
         self._downstream_remotes = set()
         
+        # Lookup for <downstream remote>: <_PeerStats>
+        self._peer_stats = {}
+        self._peer_backlog = peer_backlog
+        self._antientropy_batch = antientropy_batch
+        # Lookup for <inbound peer connection>: <peer id>
+        self._peer_origins = weakref.WeakKeyDictionary()
+        self.peer_id = os.urandom(16)
+        
         # Lookup for <registered ghid>
         self._registered = set()
+        # Ghids queued for deregistration that haven't since been registered
+        self._clearing = set()
         
         self._bootstrapped = False
         
@@ -517,10 +1012,20 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
         '''
         self._upstream_remotes.clear()
         self._downstream_remotes.clear()
+        self._remote_keys.clear()
         self._registered.clear()
+        self._clearing.clear()
+        self._remote_stats.clear()
+        self._pulls_in_flight.clear()
+        self._unavailable.clear()
+        self._peer_stats.clear()
+        self._peer_origins.clear()
         
     def assemble(self, golcore, percore, librarian, remote_protocol):
-        self._golcore = golcore
+        # Persistence servers don't have a golcore, and only use us for
+        # peering.
+        if golcore is not None:
+            self._golcore = golcore
         self._percore = percore
         self._librarian = librarian
         self._remote_protocol = remote_protocol
@@ -536,25 +1041,331 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
             connection_cls = connection_cls,
             msg_handler = self._remote_protocol,
             conn_init = self.restore_connection,
+            pool_size = self._pool_size,
+            # Subscription updates are delivered on whichever connection we
+            # subscribed with, so keep them on the primary.
+            pinned_requests = self._PINNED_REQUESTS
         )
         # We have to insert the remote before us at the commander, or shutdown
         # will kill the connections before we can clean them up.
         task_commander.register_task(remote, *args, before_task=self, **kwargs)
         self._upstream_remotes.add(remote)
+        self._remote_stats[remote] = _RemoteStats()
+        # This needs to be stable across restarts, so that we can resume any
+        # pending uploads.
+        self._remote_keys[remote] = connection_cls.desc_str(*args, **kwargs)
+    
+    def _outbox_key(self, remote):
+        ''' Get the librarian outbox key for the remote.
+        '''
+        try:
+            return self._remote_keys[remote]
+        except KeyError:
+            return remote._conn_desc
+    
+    @property
+    def outbox_depth(self):
+        ''' The number of pushes waiting for an upstream remote to come
+        back online.
+        '''
+        return self._librarian.outbox_depth()
+    
+    def _get_remote_stats(self, remote):
+        ''' Get (or create) the stats for the remote.
+        '''
+        try:
+            return self._remote_stats[remote]
+        except KeyError:
+            stats = _RemoteStats()
+            self._remote_stats[remote] = stats
+            return stats
+    
+    def _rank_remotes(self):
+        ''' Returns a list of all currently-connected upstream remotes,
+        best first.
+        '''
+        return sorted(
+            (remote for remote in self._upstream_remotes
+             if remote.has_connection),
+            key = lambda remote: self._get_remote_stats(remote).score
+        )
+    
+    def _hedge_delay(self, remote):
+        ''' Determine how long to wait on the remote before also asking
+        the next best remote.
+        '''
+        latency = self._get_remote_stats(remote).latency
+        if len(latency) < self._hedge_min_samples:
+            return self._hedge_default
+        else:
+            return latency.percentile(self._hedge_percentile)
         
-    def add_downstream_remote(self, persister):
-        ''' Adds a downstream persister.
+    @fixture_noop
+    @public_api
+    def add_downstream_remote(self, task_commander, connection_cls, *args,
+                              **kwargs):
+        ''' Adds a downstream persister, ie a peered persistence server.
+        *args and **kwargs will be passed to the task_commander task.
         
-        PersistenceCore will not attempt to keep a consistent state with
-        downstream persisters. Instead, it will simply push updates to
-        local objects downstream. It will not, however, look to them for
-        updates.
+        Everything newly ingested will be (asynchronously) replicated to
+        downstream persisters. We will not, however, look to them for
+        updates. Therefore, to create synchronization **between**
+        persistence servers, each should add the other as a downstream
+        remote.
+        '''
+        remote = ConnectionManager(
+            connection_cls = connection_cls,
+            msg_handler = self._remote_protocol,
+            conn_init = self.restore_peer,
+            conn_close = self._close_peer
+        )
+        task_commander.register_task(remote, *args, before_task=self, **kwargs)
+        self._downstream_remotes.add(remote)
+        self._peer_stats[remote] = _PeerStats(maxlen=self._peer_backlog)
+        
+    def add_peer_origin(self, connection, peer_id):
+        ''' Record that an inbound connection belongs to a peered
+        persistence server, so that we don't replicate its objects back
+        to it.
+        '''
+        logger.info('Peer connection established: ' + peer_id.hex())
+        self._peer_origins[connection] = peer_id
+    
+    @fixture_noop
+    @public_api
+    def replicate(self, obj, skip_conn=None):
+        ''' Schedule a newly-ingested object for replication to all
+        downstream peers, except the one it came from. Non-blocking.
+        
+        skip_conn may be a connection or a weakref.ref to one.
+        '''
+        if not self._downstream_remotes:
+            return
+        
+        if isinstance(skip_conn, weakref.ref):
+            skip_conn = skip_conn()
+        
+        if skip_conn is None:
+            origin = None
+        else:
+            origin = self._peer_origins.get(skip_conn)
+        
+        # Dynamic bindings are queued by their dynamic ghid, and the pump
+        # sends whichever frame is current once it gets to them. Queueing
+        # exact frames doesn't work, because the librarian removes them as
+        # soon as they're superseded.
+        ghid = obj.ghid
+        
+        for remote, stats in self._peer_stats.items():
+            if origin is not None and stats.peer_id == origin:
+                continue
+            elif skip_conn is not None and remote._connection is skip_conn:
+                continue
+            
+            stats.enqueue(ghid)
+    
+    def replication_lag(self):
+        ''' Returns a dict of <peer description>: <seconds behind> for
+        all downstream peers.
+        '''
+        return {
+            remote._conn_desc: stats.behind
+            for remote, stats in self._peer_stats.items()
+        }
+    
+    async def restore_peer(self, remote, connection):
+        ''' Start or re-start a connection to a downstream peer:
+        introduce ourselves, catch the peer up with anything it missed,
+        and then start replicating.
+        '''
+        stats = self._peer_stats[remote]
+        stats.peer_id = await self._remote_protocol.peer_hello(
+            connection,
+            self.peer_id
+        )
+        
+        # Anything in the backlog will be covered by the anti-entropy pass,
+        # so don't bother sending it twice.
+        stats.clear()
+        stats.wakeup = asyncio.Event()
+        await self._antientropy(remote, connection, stats)
+        
+        stats.pump = make_background_future(
+            self._pump_peer(remote, connection, stats)
+        )
+    
+    async def _close_peer(self, remote, connection):
+        ''' Stop replicating to the peer until it reconnects.
+        '''
+        stats = self._peer_stats[remote]
+        if stats.pump is not None:
+            stats.pump.cancel()
+        
+        stats.pump = None
+        stats.wakeup = None
+    
+    async def _pump_peer(self, remote, connection, stats):
+        ''' Replicate everything in the peer's backlog, in order, for
+        as long as the connection lasts.
+        '''
+        while True:
+            if stats.overflowed:
+                logger.warning(
+                    'Replication backlog overflowed for ' + remote._conn_desc +
+                    '; falling back to anti-entropy.'
+                )
+                stats.clear()
+                await self._antientropy(remote, connection, stats)
+            
+            if not stats.backlog:
+                stats.wakeup.clear()
+                await stats.wakeup.wait()
+                continue
+            
+            ghid, enqueued = stats.backlog[0]
+            # Anything updated from here on needs to be queued again, or
+            # we might miss a frame that arrives after the retrieval.
+            stats.queued.discard(ghid)
+            try:
+                data = await self._librarian.retrieve(ghid)
+            
+            # Debound or GC'd in the meantime, so there's nothing left to
+            # replicate. Any debinding has its own place in the queue.
+            except KeyError:
+                data = None
+                stats.superseded += 1
+            
+            if data is not None:
+                try:
+                    await self._remote_protocol.publish(connection, data)
+                
+                except asyncio.CancelledError:
+                    raise
+                
+                # The peer may not want it (eg. it was debound there already).
+                # Retrying won't help; if the connection itself went down,
+                # the anti-entropy pass on reconnect will catch the peer back
+                # up.
+                except Exception:
+                    stats.failed += 1
+                    logger.info(
+                        'Replication of %s to %s failed w/ traceback:', ghid,
+                        remote._conn_desc, exc_info=True
+                    )
+                
+                else:
+                    stats.replicated += 1
+                    stats.lag.since(enqueued)
+            
+            # Don't pop until we're done, so that anything we don't get to
+            # before a disconnect is still counted as lag.
+            if stats.backlog and stats.backlog[0][0] == ghid:
+                stats.backlog.popleft()
+    
+    async def _antientropy(self, remote, connection, stats):
+        ''' Push anything we have that the peer doesn't. Objects are
+        sent in dependency order, so that the peer never sees (for
+        example) a container before its binding. Each object is only
+        summarized once; they're checked with the peer a batch at a time.
+        '''
+        ranked = collections.defaultdict(list)
+        for ghid in (await self._librarian.inventory()):
+            try:
+                obj = await self._librarian.summarize(ghid)
+            except KeyError:
+                continue
+            ranked[self._ANTIENTROPY_ORDER[type(obj)]].append(obj)
+        
+        checked = 0
+        sent = 0
+        for rank in sorted(ranked):
+            objs = ranked.pop(rank)
+            for start in range(0, len(objs), self._antientropy_batch):
+                batch = objs[start:start + self._antientropy_batch]
+                
+                checked += len(batch)
+                missing = await self._batch_missing(connection, batch, stats)
+                
+                for obj, is_missing in zip(batch, missing):
+                    if not is_missing:
+                        continue
+                    
+                    # Dynamic bindings are sent at their current frame.
+                    try:
+                        data = await self._librarian.retrieve(obj.ghid)
+                        await self._remote_protocol.publish(connection, data)
+                    
+                    except asyncio.CancelledError:
+                        raise
+                    
+                    # Debound or GC'd since we took the inventory.
+                    except KeyError:
+                        continue
+                    
+                    except Exception:
+                        logger.info(
+                            'Anti-entropy for %s at %s failed w/ traceback:',
+                            obj.ghid, remote._conn_desc, exc_info=True
+                        )
+                    
+                    else:
+                        sent += 1
+        
+        stats.caught_up += sent
+        stats.last_sync = time.monotonic()
+        logger.info(
+            'Anti-entropy with ' + remote._conn_desc + ' checked ' +
+            str(checked) + ' objects and sent ' + str(sent) + '.'
+        )
+    
+    async def _batch_missing(self, connection, batch, stats):
+        ''' Check which objects in the batch the peer is missing, with
+        a single query if the peer supports it.
+        '''
+        if stats.batch_queries:
+            cursors = [
+                (obj.ghid, obj.counter if isinstance(obj, _GobdLite) else -1)
+                for obj in batch
+            ]
+            try:
+                return (await self._remote_protocol.query_missing(
+                    connection,
+                    cursors
+                ))
+            
+            except asyncio.CancelledError:
+                raise
+            
+            # Older peers don't support batched queries, so don't bother
+            # asking them again.
+            except Exception:
+                stats.batch_queries = False
+                logger.info(
+                    'Batched queries unavailable at peer; falling back to ' +
+                    'per-object queries w/ traceback:', exc_info=True
+                )
         
-        Therefore, to create synchronization **between** multiple
-        upstream remotes, also add them as downstream remotes.
+        return (await asyncio.gather(
+            *(self._peer_missing(connection, obj) for obj in batch)
+        ))
+    
+    async def _peer_missing(self, connection, obj):
+        ''' Check if the peer is missing the object. For dynamic
+        bindings, the peer is up-to-date if its current frame binds the
+        same target as ours.
         '''
-        raise NotImplementedError()
-        self._downstream_remotes.add(persister)
+        if isinstance(obj, _GobdLite):
+            bindings = await self._remote_protocol.query_bindings(
+                connection,
+                obj.target
+            )
+            return obj.ghid not in bindings
+        
+        else:
+            return not (await self._remote_protocol.query_existence(
+                connection,
+                obj.ghid
+            ))
         
     async def loop_init(self, *args, **kwargs):
         ''' On top of the usual stuff, set up our queues.
@@ -593,7 +1404,10 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
         remotes when the objects are removed from memory.
         '''
         to_clear = await self._clear_q.get()
-        await self.deregister(to_clear)
+        # If it was registered again in the meantime, leave it be.
+        if to_clear in self._clearing:
+            self._clearing.discard(to_clear)
+            await self.deregister(to_clear)
         
     @fixture_noop
     @public_api
@@ -605,6 +1419,9 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
         obj = await self._librarian.summarize(ghid)
         if isinstance(obj, _GobdLite):
             if not (await self._librarian.contains(obj.target)):
+                # The new frame tells us the target now exists upstream, even
+                # if it didn't a moment ago.
+                self._unavailable.pop(obj.target, None)
                 await self.pull(obj.target)
     
     @fixture_noop
@@ -616,12 +1433,13 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
         subscription when the object leaves local memory. TODO: fix that
         leaky abstraction.
         '''
+        # Supersede any pending deregistration.
+        self._clearing.discard(ghid)
         obj = await self._librarian.summarize(ghid)
         
         if isinstance(obj, _GobdLite):
-            logger.info(
-                'GAO ' + str(obj.ghid) + ' upstream registration starting.'
-            )
+            log_event(logger, logging.INFO, 'salmonator.register',
+                      ghid=obj.ghid)
             self._registered.add(obj.ghid)
     
             subscriptions = set()
@@ -639,10 +1457,8 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
                 )
         
         else:
-            logger.debug(
-                'GAO ' + str(obj.ghid) + ' cannot be registered upstream: ' +
-                'invalid object type: ' + str(type(obj))
-            )
+            log_event(logger, logging.DEBUG, 'salmonator.unregisterable',
+                      ghid=obj.ghid, type=type(obj))
     
     @fixture_noop
     @public_api
@@ -652,8 +1468,9 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
         thread, which it should be (finalizers are called from object
         thread, and all gao must be created within event loop's thread).
         '''
-        logger.debug('_deregister finalizer called for ' + str(ghid))
+        log_event(logger, logging.DEBUG, 'salmonator.finalized', ghid=ghid)
         if self._clear_q is not None:
+            self._clearing.add(ghid)
             # This needs to be a function, not a coro, so use nowait.
             self._clear_q.put_nowait(ghid)
     
@@ -663,7 +1480,7 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
         ''' Tells the salmonator to stop listening for upstream object
         updates.
         '''
-        logger.debug('Deregistering updates for ' + str(ghid))
+        log_event(logger, logging.DEBUG, 'salmonator.deregister', ghid=ghid)
         # This should maybe use remove instead of discard?
         self._registered.discard(ghid)
     
@@ -689,6 +1506,8 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
         "if remote.has_connection()"
         '''
         data = await self._librarian.retrieve(ghid)
+        # Anything we just published certainly isn't unavailable anymore.
+        self._unavailable.pop(ghid, None)
         
         tasks = set()
         for remote in self._upstream_remotes:
@@ -697,7 +1516,10 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
                     make_background_future(remote.publish(data))
                 )
             else:
-                self._deferred.append(remote, data)
+                await self._librarian.outbox_append(
+                    self._outbox_key(remote),
+                    ghid
+                )
             
         # Need to make sure it's not empty
         if tasks:
@@ -713,31 +1535,96 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
         that this is not meant to be called on a dynamic address, as a
         subs update from a slower remote would always be overridden by
         the faster one.
+        
+        Concurrent pulls for the same ghid are coalesced into a single
+        upstream fetch, and ghids that were just unavailable everywhere
+        are briefly remembered as such.
+        '''
+        expiry = self._unavailable.get(ghid)
+        if expiry is not None:
+            if expiry > time.monotonic():
+                self.pulls_negative_cached += 1
+                raise UnavailableUpstream(
+                    'Object was recently unavailable or unacceptable at all '
+                    'currently-registered remotes.'
+                )
+            else:
+                self._unavailable.pop(ghid, None)
+        
+        try:
+            shared = self._pulls_in_flight[ghid]
+        
+        except KeyError:
+            shared = asyncio.ensure_future(self._pull(ghid))
+            self._pulls_in_flight[ghid] = shared
+            shared.add_done_callback(
+                functools.partial(self._pull_finished, ghid)
+            )
+        
+        else:
+            self.pulls_coalesced += 1
+            log_event(logger, logging.DEBUG, 'pull.coalesced', ghid=ghid)
+        
+        # Shield the shared future, so that cancelling one waiter doesn't
+        # cancel the pull for everyone else.
+        await asyncio.shield(shared)
+    
+    def _pull_finished(self, ghid, shared):
+        ''' Done callback for shared pull futures. Clears the in-flight
+        lookup, and records any negative result.
+        '''
+        if self._pulls_in_flight.get(ghid) is shared:
+            del self._pulls_in_flight[ghid]
+        
+        # Always retrieve the exception, so that asyncio doesn't complain if
+        # every waiter happened to be cancelled.
+        if shared.cancelled():
+            return
+        
+        exc = shared.exception()
+        # Don't cache the result if there simply weren't any remotes to ask.
+        connected = any(remote.has_connection
+                        for remote in self._upstream_remotes)
+        if isinstance(exc, UnavailableUpstream) and connected:
+            self._unavailable[ghid] = time.monotonic() + self._negative_ttl
+    
+    async def _pull(self, ghid):
+        ''' Performs the actual pull. Should only be called by pull().
         '''
         pull_complete = None
+        # Best remotes first. Only hedge to the next one if the current one
+        # is slow (or fails).
+        candidates = collections.deque(self._rank_remotes())
         tasks_available = set()
         task_to_remote = {}
-        for remote in self._upstream_remotes:
-            if remote.has_connection:
+        
+        # Note that this also shields us against having no remotes
+        while (candidates or tasks_available) and not pull_complete:
+            if candidates:
+                remote = candidates.popleft()
                 task = asyncio.ensure_future(
                     self._attempt_pull_single(ghid, remote)
                 )
                 tasks_available.add(task)
                 task_to_remote[task] = remote
+                hedge_after = self._hedge_delay(remote)
+            
+            # Nothing left to hedge with, so wait for whatever's outstanding.
+            else:
+                hedge_after = None
             
-        # Wait until the first successful task completion
-        # Note that this also shields us against having no tasks
-        while tasks_available and not pull_complete:
-            finished, pending = await asyncio.wait(
+            finished, tasks_available = await asyncio.wait(
                 fs = tasks_available,
+                timeout = hedge_after,
                 return_when = asyncio.FIRST_COMPLETED
             )
+            
+            if not finished:
+                log_event(logger, logging.DEBUG, 'pull.hedged', ghid=ghid,
+                          remote=remote._conn_desc)
         
             # Despite FIRST_COMPLETED, asyncio may return more than one task
             for task in finished:
-                # The task finished, so discard it from the available and reap
-                # any exception
-                tasks_available.discard(task)
                 exc = task.exception()
                 
                 # If there's been an exception, continue waiting for the rest.
@@ -745,14 +1632,11 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
                 # persisters all the time. Let the parent log if, for example,
                 # it's missing everywhere.
                 if exc is not None:
-                    remote = task_to_remote[task]
                     logger.info(
-                        'Error while pulling from remote at ' +
-                        remote._conn_desc + ':\n' +
-                        ''.join(traceback.format_tb(exc.__traceback__)) +
-                        repr(exc)
+                        'Error while pulling from remote at %s:',
+                        task_to_remote[task]._conn_desc,
+                        exc_info = (type(exc), exc, exc.__traceback__)
                     )
-                    pull_complete = None
                 
                 # Completed successfully, but it could be a 404 (or other
                 # error), which would present as result() = False.
@@ -780,13 +1664,11 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
             
         # Log success.
         else:
-            logger.debug(
-                'Successful remote pull for {!s}. Handling...'.format(ghid)
-            )
+            log_event(logger, logging.DEBUG, 'pull.succeeded', ghid=ghid)
         
         # We may still have some pending tasks. Cancel them. Note that we have
         # not yielded control to the event loop, so there is no race.
-        for task in pending:
+        for task in tasks_available:
             logger.debug('Cancelling pending pulls.')
             task.cancel()
             
@@ -814,7 +1696,7 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
                         'missing both locally and upstream.'
                     )
         
-        logger.debug('Successful pull handled.')
+        log_event(logger, logging.DEBUG, 'pull.handled')
     
     @fixture_noop
     @public_api
@@ -832,17 +1714,34 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
                 raise
             # Suppress errors if we were called quietly.
             else:
-                logger.info(
-                    'Object was unavailable or unacceptable upstream, but '
-                    'pull was called quietly: ' + str(ghid)
-                )
+                log_event(logger, logging.INFO, 'pull.quiet_failure',
+                          ghid=ghid)
         
     async def _attempt_pull_single(self, ghid, remote):
         ''' Attempt to fetch a single object from a single remote. If
         successful, put it into the ingestion pipeline.
         '''
+        stats = self._get_remote_stats(remote)
+        start = time.monotonic()
+        
         # This may error, but any errors here will be caught by the parent.
-        data = await remote.get(ghid)
+        try:
+            data = await remote.get(ghid)
+        
+        # Hedged pulls get cancelled all the time, which isn't a failure.
+        # But the elapsed time is still a lower bound on the latency, and if
+        # we don't record it, a remote that always loses would never get
+        # demoted.
+        except asyncio.CancelledError:
+            stats.latency.record(time.monotonic() - start)
+            raise
+        
+        except Exception:
+            stats.record_failure()
+            raise
+        
+        else:
+            stats.record_success(time.monotonic() - start)
         
         # Call as remotable=False to avoid infinite loops.
         ingested = await self._percore.ingest(data, remotable=False)
@@ -867,21 +1766,9 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
             
         self._bootstrapped = True
     
-    @fixture_noop
-    @public_api
-    async def restore_connection(self, remote, connection):
-        ''' Start or re-start a connection.
+    async def _resubscribe(self, connection):
+        ''' Blindly resubscribe to all registered ghids.
         '''
-        # We need to subscribe to our identity if we're restoring a terminated
-        # connection. If we haven't bootstrapped though, that will be handled
-        # there.
-        if self._bootstrapped:
-            await remote.publish(self._golcore._identity.second_party.packed)
-            await self._remote_protocol.subscribe(
-                connection,
-                self._golcore.whoami
-            )
-        
         # For every every active (salmonator-registered) GAO's ghid...
         tasks = set()
         for registrant in self._registered:
@@ -902,18 +1789,125 @@ class Salmonator(loopa.TaskLooper, metaclass=API):
                 return_when = asyncio.ALL_COMPLETED
             )
         
-        # Now, we need to destructively iterate over our deferreds until the
-        # remote list is exhausted. We have to do this in order, sequentially,
-        # and serially, because eg. containers require bindings, etc.
-        to_push = collections.deque(self._deferred.pop_key(remote))
+    async def _resync(self, connection):
+        ''' Resubscribe to all registered ghids, sending the remote our
+        most recent counter for each so that it can send us anything we
+        missed.
+        '''
+        registrants = list(self._registered)
+        updates = 0
+        
+        for start in range(0, len(registrants), self._resync_batch):
+            cursors = []
+            for registrant in registrants[start:start + self._resync_batch]:
+                try:
+                    obj = await self._librarian.summarize(registrant)
+                    counter = obj.counter
+                except (KeyError, AttributeError):
+                    counter = -1
+                cursors.append((registrant, counter))
+            
+            payloads = await self._remote_protocol.resync(connection, cursors)
+            
+            for payload in payloads:
+                try:
+                    ingested = await self._percore.ingest(
+                        payload,
+                        remotable = False,
+                        skip_conn = connection
+                    )
+                
+                except asyncio.CancelledError:
+                    raise
+                
+                except Exception:
+                    logger.warning(
+                        'Failed to ingest resync payload w/ traceback:\n' +
+                        ''.join(traceback.format_exc())
+                    )
+                
+                else:
+                    if ingested:
+                        updates += 1
+                    
+                    # Anything that's still missing its target gets pulled.
+                    if isinstance(ingested, _GobdLite):
+                        make_background_future(self.notify(ingested.ghid))
+        
+        logger.info(
+            'Resynced ' + str(len(registrants)) + ' subscriptions with ' +
+            str(updates) + ' updates.'
+        )
+        self.resync_updates += updates
+    
+    @fixture_noop
+    @public_api
+    async def restore_connection(self, remote, connection):
+        ''' Start or re-start a connection.
+        '''
+        # We need to subscribe to our identity if we're restoring a terminated
+        # connection. If we haven't bootstrapped though, that will be handled
+        # there.
+        if self._bootstrapped:
+            await remote.publish(self._golcore._identity.second_party.packed)
+            await self._remote_protocol.subscribe(
+                connection,
+                self._golcore.whoami
+            )
+        
+        # Ask for bundled updates before any subscriptions are made, so that
+        # we don't miss out on any. Older remotes won't support this, but
+        # that's fine; we'll just need to pull the targets ourselves.
+        if self._bundle_updates:
+            try:
+                await self._remote_protocol.request_bundling(connection)
+            
+            except asyncio.CancelledError:
+                raise
+            
+            except Exception:
+                logger.info(
+                    'Bundled updates unavailable at ' + remote._conn_desc +
+                    ' w/ traceback:\n' + ''.join(traceback.format_exc())
+                )
+        
+        # Now resubscribe to every active (salmonator-registered) GAO,
+        # catching up on anything we missed while disconnected.
         try:
-            while to_push:
-                data = to_push.popleft()
-                await self._remote_protocol.publish(connection, data)
+            await self._resync(connection)
         
-        # Restore the last to_push, put it back into the deferred list, and
-        # then re-raise
-        except Exception:
-            to_push.appendleft(data)
-            self._deferred.extend(remote, to_push)
+        except asyncio.CancelledError:
             raise
+        
+        # Older remotes don't support resyncing, so fall back to a blind
+        # resubscription.
+        except Exception:
+            logger.warning(
+                'Resync failed at ' + remote._conn_desc + '; falling back ' +
+                'to resubscription w/ traceback:\n' +
+                ''.join(traceback.format_exc())
+            )
+            await self._resubscribe(connection)
+        
+        # Now upload everything in our outbox. We have to do this in order,
+        # sequentially, and serially, because eg. containers require bindings,
+        # etc. Each ghid is only removed from the outbox once it's been sent,
+        # so that nothing is lost if we fail (or die) partway through.
+        key = self._outbox_key(remote)
+        to_push = await self._librarian.outbox_peek(key)
+        logger.info(
+            'Uploading ' + str(len(to_push)) + ' deferred objects to ' + key
+        )
+        for ghid in to_push:
+            try:
+                data = await self._librarian.retrieve(ghid)
+            
+            # It's been GC'd in the meantime, so there's nothing to send.
+            except KeyError:
+                log_event(logger, logging.DEBUG, 'push.deferred_missing',
+                          ghid=ghid)
+            
+            else:
+                await self._remote_protocol.publish(connection, data)
+            
+            await self._librarian.outbox_remove(key, ghid)
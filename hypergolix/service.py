@@ -52,6 +52,8 @@ from daemoniker import SIGTERM
 from hypergolix import logutils
 from hypergolix.comms import BasicServer
 from hypergolix.comms import WSConnection
+from hypergolix.comms import WSBeatingConn
+from hypergolix.comms import TCPConnection
 
 from hypergolix.persistence import PersistenceCore
 from hypergolix.persistence import Doorman
@@ -165,10 +167,16 @@ class RemotePersistenceServer(loopa.TaskCommander):
     verbosity:  'warning'
     debug:      False
     traceur:    False
+    tcp_port:   None
     '''
     
-    def __init__(self, cache_dir, host, port, *args, **kwargs):
+    def __init__(self, cache_dir, host, port, *args, tcp_port=None,
+                 **kwargs):
         ''' Do all of that other smart setup while we're at it.
+        
+        If tcp_port is not None, we'll additionally serve the same
+        protocol over length-prefixed TCP on that port, for clients and
+        peers on trusted networks.
         '''
         super().__init__(*args, **kwargs)
         
@@ -183,9 +191,8 @@ class RemotePersistenceServer(loopa.TaskCommander):
         self.librarian = DiskLibrarian(cache_dir, self.executor, self._loop)
         self.postman = PostOffice()
         self.undertaker = UndertakerCore()
-        # I mean, this won't be used unless we set up peering, but it saves us
-        # needing to do a modal switch for remote persistence servers
-        self.salmonator = Salmonator.__fixture__()
+        # This is only used for peering (ie server-to-server replication).
+        self.salmonator = Salmonator()
         self.remote_protocol = RemotePersistenceProtocol()
         
         self.percore.assemble(
@@ -215,10 +222,17 @@ class RemotePersistenceServer(loopa.TaskCommander):
             librarian = self.librarian,
             postman = self.postman
         )
+        self.salmonator.assemble(
+            golcore = None,
+            percore = self.percore,
+            librarian = self.librarian,
+            remote_protocol = self.remote_protocol
+        )
         self.remote_protocol.assemble(
             percore = self.percore,
             librarian = self.librarian,
-            postman = self.postman
+            postman = self.postman,
+            salmonator = self.salmonator
         )
         
         self.server = BasicServer(connection_cls=WSConnection)
@@ -229,8 +243,37 @@ class RemotePersistenceServer(loopa.TaskCommander):
             port = port,
             tls = False
         )
+        
+        if tcp_port is None:
+            self.tcp_server = None
+        
+        else:
+            self.tcp_server = BasicServer(connection_cls=TCPConnection)
+            self.register_task(
+                self.tcp_server,
+                msg_handler = self.remote_protocol,
+                host = host,
+                port = tcp_port,
+                tls = False
+            )
+        
         self.register_task(self.postman)
         self.register_task(self.undertaker)
+        self.register_task(self.salmonator)
+    
+    def add_peer(self, connection_cls, *args, **kwargs):
+        ''' Add a peered persistence server, to which we will replicate
+        everything we ingest. Connection using connection_cls; on
+        instantiation, the connection will use *args and **kwargs.
+        
+        MUST BE CALLED BEFORE STARTING!
+        '''
+        self.salmonator.add_downstream_remote(
+            task_commander = self,
+            connection_cls = connection_cls,
+            *args,
+            **kwargs
+        )
         
     async def setup(self):
         ''' Once booted, restore the librarian.
@@ -299,11 +342,20 @@ def start(namespace=None):
         config.server.ghidcache,
         host,
         config.server.port,
+        tcp_port = config.server.tcp_port,
         reusable_loop = False,
         threaded = False,
         debug = debug
     )
     
+    for peer in config.server.peers:
+        rps.add_peer(
+            connection_cls = WSBeatingConn,
+            host = peer.host,
+            port = peer.port,
+            tls = peer.tls
+        )
+    
     logger.debug('Starting health check...')
     # Start a health check
     healthcheck_server, healthcheck_thread = _serve_healthcheck()
@@ -40,6 +40,7 @@ import traceback
 import asyncio
 import loopa
 import pathlib
+import time
 
 from golix import ThirdParty
 from golix import SecondParty
@@ -90,6 +91,7 @@ from .exceptions import IntegrityError
 from .exceptions import UnavailableUpstream
 
 from .utils import weak_property
+from .utils import LatencyTracker
 
 
 # ###############################################
@@ -125,10 +127,25 @@ class UndertakerCore(loopa.TaskLooper, metaclass=API):
     _librarian = weak_property('__librarian')
     _postman = weak_property('__postman')
     
-    def __init__(self, *args, maxlen=25, **kwargs):
+    def __init__(self, *args, batch_size=25, **kwargs):
+        ''' batch_size is the maximum number of GC candidates processed
+        per loop iteration. The triage set itself is unbounded, so that
+        submitting a candidate never blocks ingestion.
+        '''
         super().__init__(*args, **kwargs)
-        self._maxlen = maxlen
-        self._triage = None
+        self._batch_size = batch_size
+        # Ordered so that GC happens (roughly) in submission order. Maps the
+        # ghid to collect to its skip_conn. Because it's a mapping, the same
+        # ghid is only ever pending triage once.
+        self._triage = collections.OrderedDict()
+        # These need a loop, so they're created during loop_init.
+        self._triage_ready = None
+        self._triage_idle = None
+        
+        # Metrics
+        self.gc_latency = LatencyTracker()
+        self.batch_latency = LatencyTracker()
+        self.triage_deduplicated = 0
         
         self._check_lookup = {
             _GidcLite: self._check_gidc,
@@ -138,31 +155,94 @@ class UndertakerCore(loopa.TaskLooper, metaclass=API):
             _GdxxLite: self._check_gdxx,
             _GarqLite: self._check_garq
         }
+    
+    @property
+    def triage_backlog(self):
+        ''' The number of GC candidates currently awaiting triage.
+        '''
+        return len(self._triage)
+    
+    def triage(self, ghid, skip_conn=None):
+        ''' Submit a ghid for a GC check. Never blocks. If the ghid is
+        already pending, it won't be checked twice; if the two requests
+        disagree on skip_conn, nobody gets skipped.
+        '''
+        try:
+            existing = self._triage[ghid]
         
+        except KeyError:
+            self._triage[ghid] = skip_conn
+        
+        else:
+            self.triage_deduplicated += 1
+            if existing is not skip_conn:
+                self._triage[ghid] = None
+        
+        # If we haven't started yet, loop_init will pick up the backlog.
+        if self._triage_ready is not None:
+            self._triage_idle.clear()
+            self._triage_ready.set()
+    
     async def await_idle(self):
         ''' Wait until the undertaker has no more GC to perform.
         '''
-        while self._triage is None:
+        while self._triage_idle is None:
             await asyncio.sleep(.01)
         
-        await self._triage.join()
-        
+        await self._triage_idle.wait()
+    
     async def loop_init(self):
-        ''' Set up the staging queue.
+        ''' Set up the triage events.
         '''
-        self._triage = asyncio.Queue(maxsize=self._maxlen)
+        self._triage_ready = asyncio.Event()
+        self._triage_idle = asyncio.Event()
         
+        if self._triage:
+            self._triage_ready.set()
+        else:
+            self._triage_idle.set()
+    
     async def loop_stop(self):
-        ''' Clear the staging queue.
+        ''' Clear the triage events. Anything still pending is left in
+        the triage set, in case we get restarted.
         '''
-        self._triage = None
-        
+        self._triage_ready = None
+        self._triage_idle = None
+    
     async def loop_run(self):
-        ''' Wait for stuff to be added to the queue, then execute GC on
-        it.
+        ''' Wait for stuff to be added to the triage set, then execute
+        GC on up to batch_size candidates at once.
+        '''
+        await self._triage_ready.wait()
+        
+        batch = []
+        while self._triage and len(batch) < self._batch_size:
+            batch.append(self._triage.popitem(last=False))
+        
+        logger.debug(str(len(batch)) + ' GC candidates in batch; ' +
+                     str(len(self._triage)) + ' remain in triage.')
+        
+        batch_start = time.monotonic()
+        try:
+            # This is deliberately sequential, since candidates within the
+            # same batch may depend upon one another (ex: a binding and its
+            # target).
+            for ghid_to_collect, skip_conn in batch:
+                await self._collect(ghid_to_collect, skip_conn)
+        
+        finally:
+            self.batch_latency.since(batch_start)
+            # Collection can itself triage more stuff, so only declare idle
+            # if there's truly nothing left.
+            if not self._triage:
+                self._triage_ready.clear()
+                self._triage_idle.set()
+    
+    async def _collect(self, ghid_to_collect, skip_conn):
+        ''' Perform the GC check (and, if needed, GC) for a single ghid.
         '''
-        ghid_to_collect, skip_conn = await self._triage.get()
         logger.debug(str(ghid_to_collect) + ' GC check starting.')
+        start = time.monotonic()
         try:
             obj = await self._librarian.summarize(ghid_to_collect)
             
@@ -185,9 +265,14 @@ class UndertakerCore(loopa.TaskLooper, metaclass=API):
         except KeyError:
             logger.warning(str(ghid_to_collect) + ' missing; could not ' +
                            'garbage collect it.')
-            
+        
+        # Don't let one bad candidate take down the rest of the batch.
+        except Exception:
+            logger.error(str(ghid_to_collect) + ' GC failed w/ traceback:\n' +
+                         ''.join(traceback.format_exc()))
+        
         finally:
-            self._triage.task_done()
+            self.gc_latency.since(start)
         
     def assemble(self, librarian, postman):
         # Call before using.
@@ -215,7 +300,7 @@ class UndertakerCore(loopa.TaskLooper, metaclass=API):
     async def _check_gobs(self, obj, skip_conn=None):
         if (await self._librarian.is_debound(obj)):
             # Add our target to the list of GC checks
-            await self._triage.put((obj.target, skip_conn))
+            self.triage(obj.target, skip_conn)
             return True
         else:
             return False
@@ -230,7 +315,7 @@ class UndertakerCore(loopa.TaskLooper, metaclass=API):
             # Dead binding.
             else:
                 # Still need to add target
-                await self._triage.put((obj.target, skip_conn))
+                self.triage(obj.target, skip_conn)
                 return True
         
         # Nope, still alive.
@@ -298,7 +383,7 @@ class UndertakerCore(loopa.TaskLooper, metaclass=API):
             
             else:
                 triaged = existing.target
-                await self._triage.put((triaged, skip_conn))
+                self.triage(triaged, skip_conn)
         
         else:
             triaged = None
@@ -310,7 +395,7 @@ class UndertakerCore(loopa.TaskLooper, metaclass=API):
         ''' GDXX require triage for new targets.
         '''
         triaged = obj.target
-        await self._triage.put((triaged, skip_conn))
+        self.triage(triaged, skip_conn)
         return triaged
         
     @alert_gdxx.fixture
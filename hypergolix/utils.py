@@ -1276,8 +1276,78 @@ class ListMap:
     def __bool__(self):
         # Pass bool straight to mapping.
         return bool(self._mapping)
+
+
+class LatencyTracker:
+    ''' Keeps a rolling window of durations (in seconds) for cheap,
+    in-process metrics. Not threadsafe; intended to be owned by a single
+    event loop.
+    '''
+    
+    def __init__(self, *args, window=1000, **kwargs):
+        ''' window controls how many of the most recent samples are
+        used for mean and percentile calculations.
+        '''
+        super().__init__(*args, **kwargs)
+        self._samples = collections.deque(maxlen=window)
+        # These are lifetime totals, independent of the window.
+        self.count = 0
+        self.total = 0.0
+    
+    def record(self, duration):
+        ''' Add a single duration sample.
+        '''
+        self._samples.append(duration)
+        self.count += 1
+        self.total += duration
+    
+    def since(self, start):
+        ''' Record the time elapsed since start, which must have come
+        from time.monotonic(). Returns the recorded duration.
+        '''
+        duration = time.monotonic() - start
+        self.record(duration)
+        return duration
+    
+    @property
+    def last(self):
+        ''' The most recent sample, or None if there are none.
+        '''
+        try:
+            return self._samples[-1]
+        except IndexError:
+            return None
+    
+    @property
+    def mean(self):
+        ''' The mean of the current window, or None if empty.
+        '''
+        if self._samples:
+            return sum(self._samples) / len(self._samples)
+        else:
+            return None
+    
+    def percentile(self, pct):
+        ''' Nearest-rank percentile (0-100) of the current window, or
+        None if empty.
+        '''
+        if not self._samples:
+            return None
         
-        
+        ordered = sorted(self._samples)
+        index = int(round((pct / 100) * (len(ordered) - 1)))
+        index = min(max(index, 0), len(ordered) - 1)
+        return ordered[index]
+    
+    def __len__(self):
+        return len(self._samples)
+    
+    def clear(self):
+        ''' Clear the window, but not the lifetime totals.
+        '''
+        self._samples.clear()
+
+
 class NoContext:
     ''' An empty context manager.
     '''
@@ -33,13 +33,18 @@ hypergolix: A python Golix client.
 
 import unittest
 import logging
+import asyncio
 import concurrent.futures
+import os
+from hashlib import sha512
 
 from loopa.utils import await_coroutine_threadsafe
 from loopa import NoopLoop
 
 # These are normal imports
 from hypergolix.accounting import Account
+from hypergolix.accounting import _read_shard_slot
+from hypergolix.accounting import _write_shard_slot
 from hypergolix.app import HypergolixCore
 
 from hypergolix.persistence import PersistenceCore
@@ -66,6 +71,7 @@ from hypergolix.persistence import _GidcLite
 # ###############################################
 
 
+from _fixtures.ghidutils import make_random_ghid
 from _fixtures.identities import TEST_AGENT1
 from _fixtures.identities import TEST_READER1
 gidc = TEST_READER1.packed
@@ -151,6 +157,62 @@ class AccountTest(unittest.TestCase):
         )
         return gobdlite.target
         
+    def test_flush_coalescing(self):
+        ''' Make sure many flushes within the window only push once,
+        and that flush_now pushes immediately.
+        '''
+        pushes = 0
+        
+        async def _push_all():
+            nonlocal pushes
+            pushes += 1
+        
+        self.account._push_all = _push_all
+        
+        async def flush_many():
+            for __ in range(20):
+                await self.account.flush()
+                await asyncio.sleep(0)
+            
+            await asyncio.sleep(self.account._flush_delay * 3)
+        
+        await_coroutine_threadsafe(
+            coro = flush_many(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(pushes, 1)
+        
+        await_coroutine_threadsafe(
+            coro = self.account.flush(),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.account.flush_now(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(pushes, 2)
+        self.assertIsNone(self.account._flush_timer)
+    
+    def test_shard_slot(self):
+        ''' Make sure the shard slot can be added to a legacy root
+        node without disturbing the rest of it.
+        '''
+        manifest = os.urandom(1298)
+        padding = os.urandom(1024)
+        state = manifest + padding
+        state += sha512(state).digest()
+        self.assertIsNone(_read_shard_slot(state))
+        
+        entries = [
+            (make_random_ghid(), TEST_AGENT1.new_secret())
+            for __ in range(3)
+        ]
+        state = _write_shard_slot(state, entries)
+        self.assertEqual(_read_shard_slot(state), entries)
+        self.assertTrue(state.startswith(manifest))
+        self.assertEqual(state[-64 - len(padding):-64], padding)
+        self.assertEqual(sha512(state[:-64]).digest(), state[-64:])
+    
     def test_account_creation(self):
         ''' Test the zeroth bootstrap.
         '''
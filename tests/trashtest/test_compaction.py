@@ -0,0 +1,219 @@
+'''
+Scratchpad for test-based development.
+
+LICENSING
+-------------------------------------------------
+
+hypergolix: A python Golix client.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the
+    Free Software Foundation, Inc.,
+    51 Franklin Street,
+    Fifth Floor,
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import unittest
+import tempfile
+import pathlib
+
+from golix._getlow import GIDC
+
+from hypergolix.compaction import compact
+
+from hypergolix.persistence import _GidcLite
+from hypergolix.persistence import _GeocLite
+from hypergolix.persistence import _GobsLite
+from hypergolix.persistence import _GobdLite
+from hypergolix.persistence import _GdxxLite
+
+
+# ###############################################
+# Testing fixtures
+# ###############################################
+
+
+# Identities
+from _fixtures.remote_exchanges import gidc1
+# Containers
+from _fixtures.remote_exchanges import cont1_1
+from _fixtures.remote_exchanges import cont1_2
+from _fixtures.remote_exchanges import cont2_1
+# Static bindings
+from _fixtures.remote_exchanges import bind1_1
+# Dynamic bindings
+from _fixtures.remote_exchanges import dyn1_1a
+from _fixtures.remote_exchanges import dyn1_1b
+# Debindings
+from _fixtures.remote_exchanges import debind1_1
+from _fixtures.remote_exchanges import debind1_F
+from _fixtures.remote_exchanges import dedebind1_1
+
+
+def _write(cache_dir, lite, packed):
+    ''' Write the object to the cache dir the same way DiskLibrarian
+    would. Returns the path.
+    '''
+    if isinstance(lite, _GobdLite):
+        ghid = lite.frame_ghid
+    else:
+        ghid = lite.ghid
+    
+    path = cache_dir / (ghid.as_str() + '.ghid')
+    path.write_bytes(packed)
+    return path
+
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+class CompactionTest(unittest.TestCase):
+    ''' Test offline compaction of a librarian cache directory.
+    '''
+    
+    def setUp(self):
+        self._tempdir = tempfile.TemporaryDirectory()
+        self.cache_dir = pathlib.Path(self._tempdir.name)
+        
+        self.gidc1 = _write(
+            self.cache_dir,
+            _GidcLite.from_golix(GIDC.unpack(gidc1)),
+            gidc1
+        )
+        self.cont1_1 = _write(
+            self.cache_dir,
+            _GeocLite.from_golix(cont1_1),
+            cont1_1.packed
+        )
+        self.cont1_2 = _write(
+            self.cache_dir,
+            _GeocLite.from_golix(cont1_2),
+            cont1_2.packed
+        )
+        self.cont2_1 = _write(
+            self.cache_dir,
+            _GeocLite.from_golix(cont2_1),
+            cont2_1.packed
+        )
+        self.dyn1_1a = _write(
+            self.cache_dir,
+            _GobdLite.from_golix(dyn1_1a),
+            dyn1_1a.packed
+        )
+        self.dyn1_1b = _write(
+            self.cache_dir,
+            _GobdLite.from_golix(dyn1_1b),
+            dyn1_1b.packed
+        )
+        self.bind1_1 = _write(
+            self.cache_dir,
+            _GobsLite.from_golix(bind1_1),
+            bind1_1.packed
+        )
+    
+    def tearDown(self):
+        self._tempdir.cleanup()
+    
+    def test_dry_run(self):
+        ''' Dry runs should report, but not remove.
+        '''
+        report = compact(self.cache_dir, dry_run=True)
+        
+        self.assertEqual(report.scanned, 7)
+        self.assertEqual(report.removed, 0)
+        # Old frame
+        self.assertEqual(len(report.stale_frames), 1)
+        # Unbound container
+        self.assertEqual(len(report.unreachable), 1)
+        self.assertEqual(
+            report.reclaimable_bytes,
+            len(dyn1_1a.packed) + len(cont2_1.packed)
+        )
+        self.assertTrue(self.dyn1_1a.exists())
+        self.assertTrue(self.cont2_1.exists())
+    
+    def test_compact(self):
+        ''' Stale frames and unbound containers should be removed, but
+        everything live should be kept.
+        '''
+        report = compact(self.cache_dir)
+        self.assertEqual(report.removed, 2)
+        
+        self.assertFalse(self.dyn1_1a.exists())
+        self.assertFalse(self.cont2_1.exists())
+        
+        self.assertTrue(self.gidc1.exists())
+        self.assertTrue(self.dyn1_1b.exists())
+        self.assertTrue(self.cont1_2.exists())
+        # This is still statically bound
+        self.assertTrue(self.cont1_1.exists())
+        self.assertTrue(self.bind1_1.exists())
+    
+    def test_debound(self):
+        ''' Debound bindings and their targets should be removed, but
+        illegal debindings should be ignored.
+        '''
+        illegal = _write(
+            self.cache_dir,
+            _GdxxLite.from_golix(debind1_F),
+            debind1_F.packed
+        )
+        compact(self.cache_dir)
+        self.assertTrue(self.bind1_1.exists())
+        self.assertTrue(self.cont1_1.exists())
+        self.assertTrue(illegal.exists())
+        
+        debinding = _write(
+            self.cache_dir,
+            _GdxxLite.from_golix(debind1_1),
+            debind1_1.packed
+        )
+        compact(self.cache_dir)
+        self.assertFalse(self.bind1_1.exists())
+        self.assertFalse(self.cont1_1.exists())
+        self.assertTrue(debinding.exists())
+    
+    def test_dedebound(self):
+        ''' Debinding a debinding should restore the original binding.
+        '''
+        _write(
+            self.cache_dir,
+            _GdxxLite.from_golix(debind1_1),
+            debind1_1.packed
+        )
+        _write(
+            self.cache_dir,
+            _GdxxLite.from_golix(dedebind1_1),
+            dedebind1_1.packed
+        )
+        compact(self.cache_dir)
+        self.assertTrue(self.bind1_1.exists())
+        self.assertTrue(self.cont1_1.exists())
+
+
+if __name__ == "__main__":
+    from hypergolix import logutils
+    logutils.autoconfig(loglevel='debug')
+    unittest.main()
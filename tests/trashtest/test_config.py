@@ -103,6 +103,8 @@ vec_process = '''
       logdir: null
       pid_file: null
       ipc_port: 7772
+      ipc_socket: null
+      ipc_shm_threshold: null
 '''
 
 
@@ -159,6 +161,8 @@ vec_cfg = '''process:
   logdir: null
   pid_file: null
   ipc_port: 7772
+  ipc_socket: null
+  ipc_shm_threshold: null
 instrumentation:
   verbosity: info
   debug: false
@@ -177,8 +181,10 @@ server:
   pid_file: null
   host: null
   port: null
+  tcp_port: null
   verbosity: null
   debug: null
+  peers: []
 '''
 
 
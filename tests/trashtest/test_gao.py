@@ -33,12 +33,15 @@ hypergolix: A python Golix client.
 
 '''
 
+import os
 import unittest
 import logging
 import queue
 import random
 import inspect
 import asyncio
+import time
+import concurrent.futures
 
 from loopa import TaskLooper
 from loopa import NoopLoop
@@ -49,6 +52,9 @@ from hypergolix.gao import GAOCore
 from hypergolix.gao import GAODict
 from hypergolix.gao import GAOSet
 from hypergolix.gao import GAOSetMap
+from hypergolix.gao import GAOShardedDict
+from hypergolix.gao import DefermentTracker
+from hypergolix.gao import COMPRESSION_STATS
 from hypergolix.dispatch import _Dispatchable
 
 from hypergolix.utils import ApiID
@@ -96,6 +102,9 @@ from _fixtures.remote_exchanges import dyndebind1_1
 
 logger = logging.getLogger(__name__)
 
+# Benchmarks are slow, so they only run when asked for.
+RUN_BENCHMARKS = bool(os.environ.get('HYPERGOLIX_BENCHMARKS'))
+
 gidclite1 = _GidcLite.from_golix(GIDC.unpack(gidc1))
 obj1 = _GeocLite.from_golix(cont1_1)
 obj2 = _GeocLite.from_golix(cont1_2)
@@ -106,6 +115,31 @@ xbind1 = _GdxxLite.from_golix(debind1_1)
 xbind1d = _GdxxLite.from_golix(dyndebind1_1)
 
 
+class _StashSalmonator:
+    ''' Just enough of a salmonator to "pull" stashed objects into a
+    librarian.
+    '''
+    
+    def __init__(self, librarian):
+        self.librarian = librarian
+        # Lookup <ghid>: (<lite obj>, <packed>)
+        self.stash = {}
+        self.pulled = []
+    
+    async def pull(self, ghid):
+        obj, data = self.stash[ghid]
+        await self.librarian.store(obj, data)
+        self.pulled.append(ghid)
+    
+    async def attempt_pull(self, ghid, quiet=False):
+        try:
+            await self.pull(ghid)
+        
+        except KeyError:
+            if not quiet:
+                raise
+
+
 class GAOTestingCore:
     ''' Unified testing mechanism for GAO. Just add water (err, a
     make_gao method and a setUp method) to start.
@@ -638,6 +672,224 @@ class GAODictTest(GAOTestingCore, unittest.TestCase):
         for it in gao:
             pass
     
+    def test_delta_frames(self):
+        ''' Make sure updates after the first snapshot are pushed as
+        deltas, and that pulls replay them (and rebase local changes).
+        '''
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(gidclite1, gidc1),
+            loop = self.nooploop._loop
+        )
+        
+        gao1 = await_coroutine_threadsafe(
+            coro = self.make_gao(
+                ghid = None,
+                dynamic = True,
+                author = None,
+                legroom = 7
+            ),
+            loop = self.nooploop._loop
+        )
+        gao1.update({
+            ii: bytes([random.randint(0, 255) for i in range(32)])
+            for ii in range(100)
+        })
+        await_coroutine_threadsafe(
+            coro = gao1.push(),
+            loop = self.nooploop._loop
+        )
+        self.assertIsNotNone(gao1._delta_base)
+        
+        gao2 = await_coroutine_threadsafe(
+            coro = self.make_gao(
+                ghid = gao1.ghid,
+                dynamic = None,
+                author = None,
+                legroom = 7
+            ),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = gao2._pull(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(gao1, gao2)
+        
+        gao1[1] = b'foo'
+        packed = await_coroutine_threadsafe(
+            coro = gao1.pack_gao(),
+            loop = self.nooploop._loop
+        )
+        self.assertTrue(packed.startswith(b'hgxl'))
+        # Packing alone shouldn't hand over the log.
+        self.assertEqual(gao1._delta_log, [('__setitem__', (1, b'foo'), {})])
+        await_coroutine_threadsafe(
+            coro = gao1.push(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(gao1._delta_ops, [('__setitem__', (1, b'foo'), {})])
+        
+        # Unpushed local changes on gao2 should survive the pull.
+        gao2[2] = b'bar'
+        await_coroutine_threadsafe(
+            coro = gao2.pull(notification=gao1.ghid),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(gao2[1], b'foo')
+        self.assertEqual(gao2[2], b'bar')
+        
+        gao2[2] = gao1[2]
+        self.assertEqual(gao1, gao2)
+    
+    def test_delta_log(self):
+        ''' Make sure the delta log records what the calls actually did,
+        not just the calls themselves.
+        '''
+        gao = await_coroutine_threadsafe(
+            coro = self.make_gao(
+                ghid = None,
+                dynamic = True,
+                author = None,
+                legroom = 7
+            ),
+            loop = self.nooploop._loop
+        )
+        gao.update(zip([2, 3], [b'a', b'b']))
+        key, value = gao.popitem()
+        value = [b'c']
+        gao[4] = value
+        value.append(b'd')
+        
+        self.assertEqual(gao._delta_log, [
+            ('update', ([(2, b'a'), (3, b'b')],), {}),
+            ('__delitem__', (key,), {}),
+            ('__setitem__', (4, [b'c']), {})
+        ])
+    
+    def test_delta_snapshot_pull(self):
+        ''' Make sure a reader without the snapshot pulls it, and the
+        binding holding it, instead of failing.
+        '''
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(gidclite1, gidc1),
+            loop = self.nooploop._loop
+        )
+        
+        gao1 = await_coroutine_threadsafe(
+            coro = self.make_gao(
+                ghid = None,
+                dynamic = True,
+                author = None,
+                legroom = 7
+            ),
+            loop = self.nooploop._loop
+        )
+        gao1.update({
+            ii: bytes([random.randint(0, 255) for i in range(32)])
+            for ii in range(100)
+        })
+        await_coroutine_threadsafe(
+            coro = gao1.push(),
+            loop = self.nooploop._loop
+        )
+        gao1[1] = b'foo'
+        await_coroutine_threadsafe(
+            coro = gao1.push(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(gao1._delta_ops, [('__setitem__', (1, b'foo'), {})])
+        
+        # Move the snapshot and its hold out of the reader's librarian, and
+        # into "upstream".
+        base = gao1._delta_base
+        salmonator = _StashSalmonator(self.librarian)
+        for ghid in (base.ghid, base.hold):
+            obj = await_coroutine_threadsafe(
+                coro = self.librarian.summarize(ghid),
+                loop = self.nooploop._loop
+            )
+            data = await_coroutine_threadsafe(
+                coro = self.librarian.retrieve(ghid),
+                loop = self.nooploop._loop
+            )
+            salmonator.stash[ghid] = (obj, data)
+            await_coroutine_threadsafe(
+                coro = self.librarian.abandon(obj),
+                loop = self.nooploop._loop
+            )
+        
+        gao2 = await_coroutine_threadsafe(
+            coro = self.make_gao(
+                ghid = gao1.ghid,
+                dynamic = None,
+                author = None,
+                legroom = 7,
+                salmonator = salmonator
+            ),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = gao2._pull(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(gao1, gao2)
+        self.assertEqual(salmonator.pulled, [base.ghid, base.hold])
+    
+    def test_compression(self):
+        ''' Make sure compressed GAOs round-trip, and that small ones are
+        left alone.
+        '''
+        gao1 = await_coroutine_threadsafe(
+            coro = self.make_gao(
+                ghid = None,
+                dynamic = True,
+                author = None,
+                legroom = 7
+            ),
+            loop = self.nooploop._loop
+        )
+        gao1.compression = 'zlib'
+        
+        skipped = COMPRESSION_STATS.skipped
+        packed = await_coroutine_threadsafe(
+            coro = gao1.pack_gao(),
+            loop = self.nooploop._loop
+        )
+        self.assertFalse(packed.startswith(b'hgxz'))
+        self.assertEqual(COMPRESSION_STATS.skipped, skipped + 1)
+        
+        gao1.update({ii: b'hello world' * 10 for ii in range(100)})
+        compressed = COMPRESSION_STATS.compressed
+        packed = await_coroutine_threadsafe(
+            coro = gao1.pack_gao(),
+            loop = self.nooploop._loop
+        )
+        self.assertTrue(packed.startswith(b'hgxz'))
+        self.assertEqual(COMPRESSION_STATS.compressed, compressed + 1)
+        self.assertLess(COMPRESSION_STATS.ratio, 1)
+        
+        gao2 = await_coroutine_threadsafe(
+            coro = self.make_gao(
+                ghid = None,
+                dynamic = True,
+                author = None,
+                legroom = 7
+            ),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = gao2.unpack_gao(packed),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(gao1, gao2)
+        
+        gao1.compression = 'foo'
+        with self.assertRaises(ValueError):
+            await_coroutine_threadsafe(
+                coro = gao1.pack_gao(),
+                loop = self.nooploop._loop
+            )
+
     
 class GAOSetTest(GAOTestingCore, unittest.TestCase):
     ''' Test the standard GAO.
@@ -769,6 +1021,411 @@ class GAOSetMapTest(GAOTestingCore, unittest.TestCase):
             pass
     
     
+class _CountingGAO:
+    ''' Just enough of a GAO to be tracked and flushed.
+    '''
+    
+    def __init__(self, ghid, mutated):
+        self.ghid = ghid
+        self._mutated = mutated
+        self.pushes = 0
+    
+    async def push(self):
+        self.pushes += 1
+        self._mutated = False
+        # Give the other pushes a chance to run concurrently
+        await asyncio.sleep(0)
+
+
+class DefermentTrackerTest(unittest.TestCase):
+    ''' Test flushing deferred GAOs.
+    '''
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.nooploop = NoopLoop(
+            debug = True,
+            threaded = True
+        )
+        cls.nooploop.start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        # Kill the running loop.
+        cls.nooploop.stop_threadsafe_nowait()
+    
+    def test_flush(self):
+        tracker = DefermentTracker(max_concurrency=2)
+        clean = [_CountingGAO(make_random_ghid(), False) for __ in range(10)]
+        dirty = [_CountingGAO(make_random_ghid(), True) for __ in range(5)]
+        new = [_CountingGAO(None, False) for __ in range(2)]
+        
+        for gao in clean + dirty + new:
+            tracker.add(gao)
+        
+        skipped = await_coroutine_threadsafe(
+            coro = tracker.flush(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(skipped, 10)
+        
+        for gao in clean:
+            self.assertEqual(gao.pushes, 0)
+        for gao in dirty + new:
+            self.assertEqual(gao.pushes, 1)
+        
+        # Now everything with a ghid is clean.
+        skipped = await_coroutine_threadsafe(
+            coro = tracker.flush(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(skipped, 15)
+
+
+class GAOShardedDictTest(unittest.TestCase):
+    ''' Test sharded dicts.
+    '''
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.nooploop = NoopLoop(
+            debug = True,
+            threaded = True
+        )
+        cls.nooploop.start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        # Kill the running loop.
+        cls.nooploop.stop_threadsafe_nowait()
+    
+    def setUp(self):
+        # These are directly required by the GAO
+        self.librarian = LibrarianCore.__fixture__()
+        self.golcore = GolixCore.__fixture__(TEST_AGENT1,
+                                             librarian=self.librarian)
+        # Don't fixture this. We need to actually resolve things.
+        self.ghidproxy = GhidProxier()
+        self.privateer = Privateer.__fixture__(TEST_AGENT1)
+        self.percore = PersistenceCore.__fixture__(librarian=self.librarian)
+        # Some assembly required
+        self.ghidproxy.assemble(self.librarian)
+        
+        # We need to have our author "on file" for any pulls.
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(gidclite1, gidc1),
+            loop = self.nooploop._loop
+        )
+    
+    def make_sharded(self, ghid, master_secret):
+        return GAOShardedDict(
+            ghid = ghid,
+            legroom = 7,
+            master_secret = master_secret,
+            shard_count = 4,
+            golcore = self.golcore,
+            ghidproxy = self.ghidproxy,
+            privateer = self.privateer,
+            percore = self.percore,
+            librarian = self.librarian
+        )
+    
+    def test_sharding(self):
+        master_secret = self.privateer.new_secret()
+        sharded1 = self.make_sharded(None, master_secret)
+        
+        # Setting things before allocation should still work.
+        early_key = make_random_ghid()
+        sharded1[early_key] = 0
+        
+        await_coroutine_threadsafe(
+            coro = sharded1.allocate(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(len(sharded1.shards), 4)
+        self.assertEqual(sharded1[early_key], 0)
+        
+        expected = {early_key: 0}
+        for ii in range(1, 50):
+            key = make_random_ghid()
+            sharded1[key] = ii
+            expected[key] = ii
+        self.assertEqual(dict(sharded1), expected)
+        
+        await_coroutine_threadsafe(
+            coro = sharded1.push(),
+            loop = self.nooploop._loop
+        )
+        
+        # A single mutation should only dirty a single shard.
+        sharded1[early_key] = 1
+        expected[early_key] = 1
+        self.assertEqual(
+            sum(shard._mutated for shard in sharded1.shards),
+            1
+        )
+        await_coroutine_threadsafe(
+            coro = sharded1.push(),
+            loop = self.nooploop._loop
+        )
+        
+        sharded2 = self.make_sharded(sharded1.ghid, master_secret)
+        await_coroutine_threadsafe(
+            coro = sharded2.restore(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(dict(sharded2), expected)
+        
+        self.assertEqual(sharded2.pop(early_key), 1)
+        self.assertNotIn(early_key, sharded2)
+    
+    def test_migration(self):
+        ''' Make sure migrating leaves the legacy dict alone, and that
+        losing a concurrent migration keeps everything.
+        '''
+        legacy_secret = self.privateer.new_secret()
+        legacy = GAODict(
+            ghid = None,
+            dynamic = True,
+            author = None,
+            legroom = 7,
+            golcore = self.golcore,
+            ghidproxy = self.ghidproxy,
+            privateer = self.privateer,
+            percore = self.percore,
+            librarian = self.librarian,
+            master_secret = legacy_secret
+        )
+        await_coroutine_threadsafe(
+            coro = legacy._push(force=True),
+            loop = self.nooploop._loop
+        )
+        expected = {make_random_ghid(): ii for ii in range(20)}
+        legacy.update(expected)
+        await_coroutine_threadsafe(
+            coro = legacy._push(),
+            loop = self.nooploop._loop
+        )
+        legacy_frame = legacy.target_history[0]
+        
+        # Two devices migrate concurrently.
+        sharded1 = self.make_sharded(None, self.privateer.new_secret())
+        sharded2 = self.make_sharded(None, self.privateer.new_secret())
+        for sharded in (sharded1, sharded2):
+            await_coroutine_threadsafe(
+                coro = sharded.allocate(legacy.state),
+                loop = self.nooploop._loop
+            )
+            self.assertEqual(dict(sharded), expected)
+        
+        await_coroutine_threadsafe(
+            coro = legacy._pull(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(legacy.target_history[0], legacy_frame)
+        self.assertEqual(dict(legacy.state), expected)
+        
+        # The second one loses, but had already changed something.
+        late_key = make_random_ghid()
+        sharded2[late_key] = 20
+        await_coroutine_threadsafe(
+            coro = sharded2.adopt(
+                sharded1.ghid,
+                sharded1.directory._master_secret
+            ),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(sharded2.ghid, sharded1.ghid)
+        self.assertEqual(sharded2[late_key], 20)
+        
+        sharded3 = self.make_sharded(
+            sharded1.ghid,
+            sharded1.directory._master_secret
+        )
+        await_coroutine_threadsafe(
+            coro = sharded3.restore(),
+            loop = self.nooploop._loop
+        )
+        expected[late_key] = 20
+        self.assertEqual(dict(sharded3), expected)
+
+
+@unittest.skipUnless(RUN_BENCHMARKS,
+                     'Set HYPERGOLIX_BENCHMARKS to run benchmarks.')
+class RatchetCacheBench(unittest.TestCase):
+    ''' Benchmark push and pull latency for a rapidly-updated dynamic
+    GAO, with and without the privateer's ratchet cache.
+    '''
+    BENCH_FRAMES = 100
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.nooploop = NoopLoop(
+            debug = False,
+            threaded = True
+        )
+        cls.nooploop.start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        # Kill the running loop.
+        cls.nooploop.stop_threadsafe_nowait()
+    
+    def make_gao(self, ghid, dynamic, privateer):
+        return GAODict(
+            ghid,
+            dynamic,
+            None,
+            7,
+            state = {},
+            golcore = self.golcore,
+            ghidproxy = self.ghidproxy,
+            privateer = privateer,
+            percore = self.percore,
+            librarian = self.librarian
+        )
+    
+    async def _bench(self, ratchet_cache):
+        ''' Push BENCH_FRAMES updates from one GAO, pulling each of them
+        into a second one with a separate privateer. Returns the mean
+        push and pull latency.
+        '''
+        self.librarian = LibrarianCore.__fixture__()
+        self.golcore = GolixCore.__fixture__(TEST_AGENT1,
+                                             librarian=self.librarian)
+        self.ghidproxy = GhidProxier()
+        self.percore = PersistenceCore.__fixture__(librarian=self.librarian)
+        self.ghidproxy.assemble(self.librarian)
+        await self.librarian.store(gidclite1, gidc1)
+        
+        privateer1 = Privateer.__fixture__(TEST_AGENT1,
+                                           ratchet_cache=ratchet_cache)
+        privateer2 = Privateer.__fixture__(TEST_AGENT1,
+                                           ratchet_cache=ratchet_cache)
+        
+        gao1 = self.make_gao(None, True, privateer1)
+        await gao1.push()
+        
+        # The second privateer needs somewhere to start the ratchet from.
+        first = gao1.target_history[0]
+        privateer2.stage(first, privateer1.get(first))
+        privateer2.commit(first)
+        gao2 = self.make_gao(gao1.ghid, None, privateer2)
+        await gao2._pull()
+        
+        push_time = 0
+        pull_time = 0
+        for ii in range(self.BENCH_FRAMES):
+            gao1[ii] = ii
+            start = time.perf_counter()
+            await gao1.push()
+            push_time += time.perf_counter() - start
+            # Let anything scheduled in the meantime run.
+            await asyncio.sleep(0)
+            
+            start = time.perf_counter()
+            await gao2.pull(notification=gao1.ghid)
+            pull_time += time.perf_counter() - start
+            await asyncio.sleep(0)
+        
+        self.assertEqual(gao1, gao2)
+        return push_time / self.BENCH_FRAMES, pull_time / self.BENCH_FRAMES
+    
+    def test_latency(self):
+        for ratchet_cache in (None, 1000):
+            push, pull = await_coroutine_threadsafe(
+                coro = self._bench(ratchet_cache),
+                loop = self.nooploop._loop
+            )
+            logger.info(
+                'Ratchet cache %5s: %8.1f us/push, %8.1f us/pull',
+                ratchet_cache, push * 1e6, pull * 1e6
+            )
+
+
+@unittest.skipUnless(RUN_BENCHMARKS,
+                     'Set HYPERGOLIX_BENCHMARKS to run benchmarks.')
+class ConcurrentPushBench(unittest.TestCase):
+    ''' Benchmark push throughput for many dynamic GAOs pushing at
+    once through a GolixCore backed by a real executor.
+    '''
+    BENCH_PUSHES = 64
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.nooploop = NoopLoop(
+            debug = False,
+            threaded = True
+        )
+        cls.nooploop.start()
+        cls.executor = concurrent.futures.ThreadPoolExecutor(8)
+    
+    @classmethod
+    def tearDownClass(cls):
+        # Kill the running loop.
+        cls.nooploop.stop_threadsafe_nowait()
+        cls.executor.shutdown()
+    
+    def make_gao(self):
+        return GAODict(
+            None,
+            True,
+            None,
+            7,
+            state = {},
+            golcore = self.golcore,
+            ghidproxy = self.ghidproxy,
+            privateer = self.privateer,
+            percore = self.percore,
+            librarian = self.librarian
+        )
+    
+    async def _worker(self, gao, pushes):
+        for ii in range(pushes):
+            gao[ii] = ii
+            await gao.push()
+    
+    async def _bench(self, concurrency):
+        ''' Spread BENCH_PUSHES pushes across concurrency GAOs, pushing
+        them all at once. Returns the elapsed time.
+        '''
+        self.librarian = LibrarianCore.__fixture__()
+        # Don't fixture this. We need the executor.
+        self.golcore = GolixCore(
+            executor = self.executor,
+            loop = self.nooploop._loop
+        )
+        self.golcore._identity = TEST_AGENT1
+        self.golcore.assemble(self.librarian)
+        self.ghidproxy = GhidProxier()
+        self.percore = PersistenceCore.__fixture__(librarian=self.librarian)
+        self.privateer = Privateer.__fixture__(TEST_AGENT1)
+        self.ghidproxy.assemble(self.librarian)
+        await self.librarian.store(gidclite1, gidc1)
+        
+        gaos = [self.make_gao() for __ in range(concurrency)]
+        # The first push of each GAO creates it, so leave it out.
+        await asyncio.gather(*[gao.push() for gao in gaos])
+        
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            self._worker(gao, self.BENCH_PUSHES // concurrency)
+            for gao in gaos
+        ])
+        return time.perf_counter() - start
+    
+    def test_throughput(self):
+        for concurrency in (1, 4, 16):
+            elapsed = await_coroutine_threadsafe(
+                coro = self._bench(concurrency),
+                loop = self.nooploop._loop
+            )
+            logger.info(
+                'Concurrency %3d: %8.1f pushes/sec',
+                concurrency, self.BENCH_PUSHES / elapsed
+            )
+
+
 class DispatchableTest(GAOTestingCore, unittest.TestCase):
     ''' Test the standard GAO.
     '''
@@ -816,6 +1473,55 @@ class DispatchableTest(GAOTestingCore, unittest.TestCase):
         '''
         obj.state = bytes([random.randint(0, 255) for i in range(32)])
         
+    def test_compression(self):
+        ''' Make sure per-api compression round-trips.
+        '''
+        gao1 = await_coroutine_threadsafe(
+            coro = self.make_gao(
+                ghid = None,
+                dynamic = True,
+                author = None,
+                legroom = 7
+            ),
+            loop = self.nooploop._loop
+        )
+        gao1.state = b'hello world' * 100
+        
+        packed = await_coroutine_threadsafe(
+            coro = gao1.pack_gao(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(packed[4:5], b'\x00')
+        
+        self.dispatch.set_compression(gao1.api_id, 'zlib')
+        self.assertEqual(self.dispatch.compression_lookup(gao1.api_id), 'zlib')
+        packed = await_coroutine_threadsafe(
+            coro = gao1.pack_gao(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(packed[4:5], b'\x01')
+        self.assertLess(len(packed), len(gao1.state))
+        
+        gao2 = await_coroutine_threadsafe(
+            coro = self.make_gao(
+                ghid = None,
+                dynamic = True,
+                author = None,
+                legroom = 7
+            ),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = gao2.unpack_gao(packed),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(gao2.state, gao1.state)
+        
+        self.dispatch.set_compression(gao1.api_id, None)
+        self.assertIsNone(self.dispatch.compression_lookup(gao1.api_id))
+        with self.assertRaises(ValueError):
+            self.dispatch.set_compression(gao1.api_id, 'foo')
+
 
 if __name__ == "__main__":
     from hypergolix import logutils
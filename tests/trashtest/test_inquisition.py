@@ -0,0 +1,206 @@
+'''
+Scratchpad for test-based development.
+
+LICENSING
+-------------------------------------------------
+
+hypergolix: A python Golix client.
+    Copyright (C) 2016 Muterra, Inc.
+    
+    Contributors
+    ------------
+    Nick Badger
+        badg@muterra.io | badg@nickbadger.com | nickbadger.com
+
+    This library is free software; you can redistribute it and/or
+    modify it under the terms of the GNU Lesser General Public
+    License as published by the Free Software Foundation; either
+    version 2.1 of the License, or (at your option) any later version.
+
+    This library is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+    Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public
+    License along with this library; if not, write to the
+    Free Software Foundation, Inc.,
+    51 Franklin Street,
+    Fifth Floor,
+    Boston, MA  02110-1301 USA
+
+------------------------------------------------------
+
+'''
+
+import unittest
+import asyncio
+import gc
+
+from hypergolix.inquisition import Inquisitor
+from hypergolix.core import Oracle
+from hypergolix.dispatch import Dispatcher
+
+from _fixtures.ghidutils import make_random_ghid
+
+
+# ###############################################
+# Testing fixtures
+# ###############################################
+
+
+class _SizedGAO:
+    ''' Stand-in for a GAO with a known packed size.
+    '''
+    
+    def __init__(self, packed_size):
+        self._packed_size = packed_size
+        self.push_pending = False
+
+
+class _Connection:
+    ''' Stand-in for an IPC connection (needs to be weakref-able).
+    '''
+    pass
+
+
+class _Salmonator:
+    ''' Stand-in for the salmonator that records deregistrations.
+    '''
+    
+    def __init__(self):
+        self.deregistered = []
+    
+    def _deregister(self, ghid):
+        self.deregistered.append(ghid)
+
+
+# ###############################################
+# Testing
+# ###############################################
+
+
+class InquisitorTest(unittest.TestCase):
+    ''' Test eviction of GAOs from the oracle.
+    '''
+    
+    def setUp(self):
+        self.oracle = Oracle.__fixture__()
+        self.salmonator = _Salmonator()
+        self.oracle._salmonator = self.salmonator
+        self.dispatch = Dispatcher.__fixture__()
+        self.inquisitor = Inquisitor(budget=10000, overhead=0)
+        self.inquisitor.assemble(
+            oracle = self.oracle,
+            dispatch = self.dispatch
+        )
+    
+    def test_sweep(self):
+        ''' Make sure the least recently used, untracked GAOs get
+        evicted once we're over budget.
+        '''
+        ghids = [make_random_ghid() for __ in range(5)]
+        objs = [_SizedGAO(4000) for __ in range(5)]
+        for ghid, obj in zip(ghids, objs):
+            self.oracle.add_object(ghid, obj)
+        
+        # Pin the oldest one
+        conn = _Connection()
+        self.dispatch._obj_binding.add(objs[0], conn)
+        # And pretend the next is still loading
+        objs[1]._ctx = asyncio.Event()
+        
+        usage = self.inquisitor.sweep()
+        self.assertEqual(usage, 8000)
+        self.assertEqual(self.inquisitor.evictions, 3)
+        self.assertEqual(self.inquisitor.sweep_latency.count, 1)
+        
+        self.assertIn(ghids[0], self.oracle)
+        self.assertIn(ghids[1], self.oracle)
+        for ghid in ghids[2:]:
+            self.assertNotIn(ghid, self.oracle)
+        
+        # Nothing is freed until it's actually collected, and anything still
+        # alive counts against the budget.
+        self.assertEqual(self.inquisitor.bytes_freed, 0)
+        alive = objs[2]
+        del objs, obj
+        gc.collect()
+        self.assertEqual(self.inquisitor.bytes_freed, 8000)
+        self.assertEqual(self.inquisitor.sweep(), 12000)
+        
+        # Under budget, so nothing else should go.
+        del alive
+        gc.collect()
+        self.assertEqual(self.inquisitor.bytes_freed, 12000)
+        self.assertEqual(self.inquisitor.sweep(), 8000)
+        self.assertEqual(self.inquisitor.evictions, 3)
+    
+    def test_pinned(self):
+        ''' Pinned GAOs should never be evicted.
+        '''
+        ghid = make_random_ghid()
+        self.oracle.add_object(ghid, _SizedGAO(20000))
+        self.oracle.pin(ghid)
+        
+        self.assertEqual(self.inquisitor.sweep(), 20000)
+        self.assertEqual(self.inquisitor.evictions, 0)
+        self.assertFalse(self.oracle.evict(ghid))
+        self.assertIn(ghid, self.oracle)
+    
+    def test_push_pending(self):
+        ''' GAOs with unpushed changes should never be evicted.
+        '''
+        ghid = make_random_ghid()
+        obj = _SizedGAO(20000)
+        obj.push_pending = True
+        self.oracle.add_object(ghid, obj)
+        
+        self.assertEqual(self.inquisitor.sweep(), 20000)
+        self.assertIn(ghid, self.oracle)
+        
+        obj.push_pending = False
+        self.assertEqual(self.inquisitor.sweep(), 0)
+        self.assertNotIn(ghid, self.oracle)
+    
+    def test_revival(self):
+        ''' Evicted objects that are still alive elsewhere should be
+        revived instead of duplicated; dead ones should be forgotten.
+        '''
+        ghid1 = make_random_ghid()
+        ghid2 = make_random_ghid()
+        obj1 = _SizedGAO(0)
+        self.oracle.add_object(ghid1, obj1)
+        self.oracle.add_object(ghid2, _SizedGAO(0))
+        
+        self.assertEqual(
+            self.oracle.by_recency(),
+            [(ghid1, obj1), (ghid2, self.oracle._lookup[ghid2])]
+        )
+        
+        self.assertTrue(self.oracle.evict(ghid1))
+        self.assertTrue(self.oracle.evict(ghid2))
+        self.assertFalse(self.oracle.evict(ghid2))
+        # Unsubscribed right away, not once collected.
+        self.assertEqual(self.salmonator.deregistered, [ghid1, ghid2])
+        self.assertTrue(self.oracle.is_loaded(ghid1))
+        gc.collect()
+        
+        self.assertIs(self.oracle._evicted.get(ghid1), obj1)
+        self.assertNotIn(ghid2, self.oracle._evicted)
+        
+        self.assertFalse(self.oracle.is_loaded(ghid2))
+        
+        self.oracle.forget(ghid1)
+        self.assertNotIn(ghid1, self.oracle._evicted)
+        self.assertEqual(self.salmonator.deregistered, [ghid1, ghid2])
+
+
+if __name__ == "__main__":
+    from hypergolix import logutils
+    logutils.autoconfig(loglevel='debug')
+    
+    # from hypergolix.utils import TraceLogger
+    # with TraceLogger(interval=10):
+    #     unittest.main()
+    unittest.main()
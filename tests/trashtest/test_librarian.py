@@ -125,6 +125,72 @@ class GenericLibrarianTest:
             )
         )
         
+    def test_outbox(self):
+        ''' Test the deferred upload outbox.
+        '''
+        self.assertEqual(self.librarian.outbox_depth(), 0)
+        
+        await_coroutine_threadsafe(
+            coro = self.librarian.outbox_append('foo', geoc1_1.ghid),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.librarian.outbox_append('foo', gobd1_a.ghid),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.librarian.outbox_append('bar', geoc1_1.ghid),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(self.librarian.outbox_depth(), 3)
+        
+        # Queueing something twice only moves it to the back.
+        await_coroutine_threadsafe(
+            coro = self.librarian.outbox_append('foo', geoc1_1.ghid),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.librarian.outbox_append('foo', gobd1_a.ghid),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(self.librarian.outbox_depth(), 3)
+        
+        pending = await_coroutine_threadsafe(
+            coro = self.librarian.outbox_peek('foo'),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(pending, [geoc1_1.ghid, gobd1_a.ghid])
+        # Peeking mustn't remove anything.
+        self.assertEqual(self.librarian.outbox_depth(), 3)
+        
+        await_coroutine_threadsafe(
+            coro = self.librarian.outbox_remove('foo', geoc1_1.ghid),
+            loop = self.nooploop._loop
+        )
+        pending = await_coroutine_threadsafe(
+            coro = self.librarian.outbox_peek('foo'),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(pending, [gobd1_a.ghid])
+        self.assertEqual(self.librarian.outbox_depth(), 2)
+        
+        # Removing something that isn't queued is a noop.
+        await_coroutine_threadsafe(
+            coro = self.librarian.outbox_remove('bar', gobd1_a.ghid),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(self.librarian.outbox_depth(), 2)
+        
+        await_coroutine_threadsafe(
+            coro = self.librarian.outbox_remove('foo', gobd1_a.ghid),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.librarian.outbox_remove('bar', geoc1_1.ghid),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(self.librarian.outbox_depth(), 0)
+    
     def test_resolution(self):
         ''' Test librarian.resolve_frame(ghid).
         '''
@@ -583,6 +649,70 @@ class DiskLibrarianTest(GenericLibrarianTest, unittest.TestCase):
             self.librarian._dyn_resolver,
             librarian2._dyn_resolver
         )
+    
+    def test_outbox_restoration(self):
+        ''' Make sure pending uploads survive restoration, and that the
+        outbox log gets compacted.
+        '''
+        await_coroutine_threadsafe(
+            coro = self.librarian.outbox_append('foo', geoc1_1.ghid),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.librarian.outbox_append('foo', gobd1_a.ghid),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.librarian.outbox_append('foo', gobd1_a.ghid),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.librarian.outbox_remove('foo', geoc1_1.ghid),
+            loop = self.nooploop._loop
+        )
+        
+        librarian2 = DiskLibrarian(self.ghidcache, self.executor,
+                                   self.nooploop._loop)
+        librarian2.assemble(self.enforcer, self.lawyer, self.percore)
+        await_coroutine_threadsafe(
+            coro = librarian2.restore(),
+            loop = self.nooploop._loop
+        )
+        
+        self.assertEqual(librarian2.outbox_depth(), 1)
+        pending = await_coroutine_threadsafe(
+            coro = librarian2.outbox_peek('foo'),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(pending, [gobd1_a.ghid])
+        
+        # Churn through enough changes to force a rewrite of the log.
+        librarian2._OUTBOX_SLACK = 4
+        for __ in range(5):
+            await_coroutine_threadsafe(
+                coro = librarian2.outbox_append('bar', geoc1_1.ghid),
+                loop = self.nooploop._loop
+            )
+            await_coroutine_threadsafe(
+                coro = librarian2.outbox_remove('bar', geoc1_1.ghid),
+                loop = self.nooploop._loop
+            )
+        
+        self.assertLessEqual(librarian2._outbox_lines, 6)
+        
+        librarian3 = DiskLibrarian(self.ghidcache, self.executor,
+                                   self.nooploop._loop)
+        librarian3.assemble(self.enforcer, self.lawyer, self.percore)
+        await_coroutine_threadsafe(
+            coro = librarian3.restore(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(librarian3.outbox_depth(), 1)
+        pending = await_coroutine_threadsafe(
+            coro = librarian3.outbox_peek('foo'),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(pending, [gobd1_a.ghid])
 
 
 if __name__ == "__main__":
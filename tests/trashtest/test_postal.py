@@ -616,6 +616,53 @@ class PostOfficeTest(unittest.TestCase):
             ),
             loop = self.nooploop._loop
         )
+        
+    def test_bundled_delivery(self):
+        ''' Test that bundling connections get bundled updates, and
+        everyone else gets normal ones.
+        '''
+        plain = []
+        bundled = []
+        
+        async def subscription_update(connection, subscription_ghid,
+                                      notification_ghid, timeout=None):
+            plain.append(connection)
+        
+        async def bundled_update(connection, subscription_ghid,
+                                 notification_ghid, timeout=None):
+            bundled.append(connection)
+        
+        self.remoter.subscription_update = subscription_update
+        self.remoter.bundled_update = bundled_update
+        
+        # Again, use classes as weakref-able connections.
+        class Conn1:
+            pass
+        
+        class Conn2:
+            pass
+        
+        sub = make_random_ghid()
+        self.postman._connections.add(sub, Conn1)
+        self.postman._connections.add(sub, Conn2)
+        
+        async def deliver():
+            await self.postman.set_bundling(Conn1, True)
+            await self.postman._deliver(
+                subscription = sub,
+                notification = make_random_ghid(),
+                skip_conn = None
+            )
+            # Let the background deliveries run
+            await asyncio.sleep(.01)
+        
+        await_coroutine_threadsafe(
+            coro = deliver(),
+            loop = self.nooploop._loop
+        )
+        
+        self.assertEqual(bundled, [Conn1])
+        self.assertEqual(plain, [Conn2])
 
 
 if __name__ == "__main__":
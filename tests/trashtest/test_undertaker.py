@@ -151,7 +151,7 @@ req3 = _GarqLite.from_golix(handshake3_1)
 
 class UndertakerLoopingTest(unittest.TestCase):
     ''' Test the actual, real, live undertaker loop, but inject stuff
-    directly into self._triage instead of using _check calls.
+    directly into self.triage() instead of using _check calls.
     '''
     
     @classmethod
@@ -195,9 +195,8 @@ class UndertakerLoopingTest(unittest.TestCase):
         )
         
         # Gidc should never be GC'd
-        await_coroutine_threadsafe(
-            coro = self.undertaker._triage.put((gidclite1.ghid, None)),
-            loop = self.undertaker._loop
+        self.undertaker._loop.call_soon_threadsafe(
+            self.undertaker.triage, gidclite1.ghid, None
         )
         await_coroutine_threadsafe(
             coro = self.undertaker.await_idle(),
@@ -221,9 +220,8 @@ class UndertakerLoopingTest(unittest.TestCase):
         )
         
         # Geoc should be GC'd if unbound.
-        await_coroutine_threadsafe(
-            coro = self.undertaker._triage.put((obj1.ghid, None)),
-            loop = self.undertaker._loop
+        self.undertaker._loop.call_soon_threadsafe(
+            self.undertaker.triage, obj1.ghid, None
         )
         await_coroutine_threadsafe(
             coro = self.undertaker.await_idle(),
@@ -245,9 +243,8 @@ class UndertakerLoopingTest(unittest.TestCase):
             coro = self.librarian.store(obj1, cont1_1.packed),
             loop = self.undertaker._loop
         )
-        await_coroutine_threadsafe(
-            coro = self.undertaker._triage.put((obj1.ghid, None)),
-            loop = self.undertaker._loop
+        self.undertaker._loop.call_soon_threadsafe(
+            self.undertaker.triage, obj1.ghid, None
         )
         await_coroutine_threadsafe(
             coro = self.undertaker.await_idle(),
@@ -275,9 +272,8 @@ class UndertakerLoopingTest(unittest.TestCase):
         )
         
         # Gobs should be kept if not DEbound.
-        await_coroutine_threadsafe(
-            coro = self.undertaker._triage.put((sbind1.ghid, None)),
-            loop = self.undertaker._loop
+        self.undertaker._loop.call_soon_threadsafe(
+            self.undertaker.triage, sbind1.ghid, None
         )
         await_coroutine_threadsafe(
             coro = self.undertaker.await_idle(),
@@ -302,9 +298,8 @@ class UndertakerLoopingTest(unittest.TestCase):
             coro = self.librarian.store(xbind1, debind1_1.packed),
             loop = self.undertaker._loop
         )
-        await_coroutine_threadsafe(
-            coro = self.undertaker._triage.put((sbind1.ghid, None)),
-            loop = self.undertaker._loop
+        self.undertaker._loop.call_soon_threadsafe(
+            self.undertaker.triage, sbind1.ghid, None
         )
         await_coroutine_threadsafe(
             coro = self.undertaker.await_idle(),
@@ -340,9 +335,8 @@ class UndertakerLoopingTest(unittest.TestCase):
         
         # Gobd should be kept unless explicitly DEbound (or if also explicitly
         # bound; TODO.)
-        await_coroutine_threadsafe(
-            coro = self.undertaker._triage.put((dbind1a.ghid, None)),
-            loop = self.undertaker._loop
+        self.undertaker._loop.call_soon_threadsafe(
+            self.undertaker.triage, dbind1a.ghid, None
         )
         await_coroutine_threadsafe(
             coro = self.undertaker.await_idle(),
@@ -367,9 +361,8 @@ class UndertakerLoopingTest(unittest.TestCase):
             coro = self.librarian.store(xbind1d, dyndebind1_1.packed),
             loop = self.undertaker._loop
         )
-        await_coroutine_threadsafe(
-            coro = self.undertaker._triage.put((dbind1a.ghid, None)),
-            loop = self.undertaker._loop
+        self.undertaker._loop.call_soon_threadsafe(
+            self.undertaker.triage, dbind1a.ghid, None
         )
         await_coroutine_threadsafe(
             coro = self.undertaker.await_idle(),
@@ -400,9 +393,8 @@ class UndertakerLoopingTest(unittest.TestCase):
         )
         
         # Gdxx should be kept if not DEbound.
-        await_coroutine_threadsafe(
-            coro = self.undertaker._triage.put((xbind1.ghid, None)),
-            loop = self.undertaker._loop
+        self.undertaker._loop.call_soon_threadsafe(
+            self.undertaker.triage, xbind1.ghid, None
         )
         await_coroutine_threadsafe(
             coro = self.undertaker.await_idle(),
@@ -420,9 +412,8 @@ class UndertakerLoopingTest(unittest.TestCase):
             coro = self.librarian.store(xbind1x, dedebind1_1.packed),
             loop = self.undertaker._loop
         )
-        await_coroutine_threadsafe(
-            coro = self.undertaker._triage.put((xbind1.ghid, None)),
-            loop = self.undertaker._loop
+        self.undertaker._loop.call_soon_threadsafe(
+            self.undertaker.triage, xbind1.ghid, None
         )
         await_coroutine_threadsafe(
             coro = self.undertaker.await_idle(),
@@ -446,9 +437,8 @@ class UndertakerLoopingTest(unittest.TestCase):
         )
         
         # Garq should be kept if not DEbound.
-        await_coroutine_threadsafe(
-            coro = self.undertaker._triage.put((req1.ghid, None)),
-            loop = self.undertaker._loop
+        self.undertaker._loop.call_soon_threadsafe(
+            self.undertaker.triage, req1.ghid, None
         )
         await_coroutine_threadsafe(
             coro = self.undertaker.await_idle(),
@@ -466,9 +456,8 @@ class UndertakerLoopingTest(unittest.TestCase):
             coro = self.librarian.store(xbind1R, debindR_1.packed),
             loop = self.undertaker._loop
         )
-        await_coroutine_threadsafe(
-            coro = self.undertaker._triage.put((req1.ghid, None)),
-            loop = self.undertaker._loop
+        self.undertaker._loop.call_soon_threadsafe(
+            self.undertaker.triage, req1.ghid, None
         )
         await_coroutine_threadsafe(
             coro = self.undertaker.await_idle(),
@@ -796,6 +785,19 @@ class UndertakerAlertTest(unittest.TestCase):
             None
         )
 
+    def test_dedup(self):
+        ''' Test that repeated alerts for the same target are only
+        triaged once.
+        '''
+        for __ in range(3):
+            await_coroutine_threadsafe(
+                coro = self.undertaker.alert_gdxx(xbind1),
+                loop = self.nooploop._loop
+            )
+
+        self.assertEqual(self.undertaker.triage_backlog, 1)
+        self.assertEqual(self.undertaker.triage_deduplicated, 2)
+
 
 if __name__ == "__main__":
     from hypergolix import logutils
@@ -43,7 +43,11 @@ import asyncio
 import random
 import traceback
 import os
+import stat
 import sys
+import io
+import socket
+import tempfile
 from contextlib import contextmanager
 
 from hypergolix.utils import Aengel
@@ -57,10 +61,14 @@ from hypergolix.comms import BasicServer
 from hypergolix.comms import MsgBuffer
 from hypergolix.comms import WSConnection
 from hypergolix.comms import WSBeatingConn
+from hypergolix.comms import UnixConnection
+from hypergolix.comms import TCPConnection
 from hypergolix.comms import ConnectionManager
 
 from hypergolix.exceptions import RequestFinished
 
+from hypergolix.logutils import log_event
+
 
 # ###############################################
 # Fixtures
@@ -69,6 +77,9 @@ from hypergolix.exceptions import RequestFinished
 
 logger = logging.getLogger(__name__)
 
+# Benchmarks are slow, so they only run when asked for.
+RUN_BENCHMARKS = bool(os.environ.get('HYPERGOLIX_BENCHMARKS'))
+
 
 ERROR_LOOKUP = {
     b'\x00\x00': Exception,
@@ -195,6 +206,34 @@ class TestParrot(metaclass=RequestResponseProtocol, error_codes=ERROR_LOOKUP):
         self._incoming_counter = 0
         
         super().__init__(*args, **kwargs)
+
+
+class NarrowParrot(metaclass=RequestResponseProtocol, error_codes=ERROR_LOOKUP,
+                   default_version=b'\x00\x00'):
+    ''' Stand-in for a peer that predates wide request tokens.
+    '''
+    
+    @request(b'!S')
+    async def static(self, connection):
+        return b''
+    
+    @static.request_handler
+    async def static(self, connection, body):
+        return b'\xFF'
+
+
+class WideParrot(metaclass=RequestResponseProtocol, error_codes=ERROR_LOOKUP,
+                 default_version=b'\x00\x00', wide_version=b'\x00\x01'):
+    ''' Same as NarrowParrot, but supports wide request tokens.
+    '''
+    
+    @request(b'!S')
+    async def static(self, connection):
+        return b''
+    
+    @static.request_handler
+    async def static(self, connection, body):
+        return b'\xFF'
         
         
 TEST_ITERATIONS = 10
@@ -607,6 +646,548 @@ class WSHeartbeatTest(unittest.TestCase):
         logger.info('Exiting server test.')
 
 
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'Unix sockets unavailable')
+class UnixBasicTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tempdir.name, 'hgx-test.sock')
+        
+        self.server_commander = TaskCommander(
+            reusable_loop = False,
+            threaded = True,
+            thread_kwargs = {'name': 'server'}
+        )
+        self.server_protocol = TestParrot()
+        self.server = BasicServer(connection_cls=UnixConnection)
+        self.server_commander.register_task(
+            self.server,
+            msg_handler = self.server_protocol,
+            path = self.path
+        )
+        
+        self.client1_commander = TaskCommander(
+            reusable_loop = False,
+            threaded = True,
+            thread_kwargs = {'name': 'client1'}
+        )
+        self.client1_protocol = TestParrot()
+        self.client1 = ConnectionManager(
+            connection_cls = UnixConnection,
+            msg_handler = self.client1_protocol,
+            autoretry = False
+        )
+        self.client1_commander.register_task(
+            self.client1,
+            path = self.path
+        )
+        
+        self.server_commander.start()
+        await_coroutine_threadsafe(
+            coro = self.server_commander.await_init(),
+            loop = self.server_commander._loop
+        )
+        # Give the server a moment to actually bind the socket.
+        time.sleep(.1)
+        
+        self.client1_commander.start()
+        await_coroutine_threadsafe(
+            coro = self.client1_commander.await_init(),
+            loop = self.client1_commander._loop
+        )
+    
+    def tearDown(self):
+        self.client1_commander.stop_threadsafe(timeout=.5)
+        self.server_commander.stop_threadsafe(timeout=.5)
+        time.sleep(.1)
+        self.tempdir.cleanup()
+    
+    def test_permissions(self):
+        ''' Only the owner should be able to connect to the socket.
+        '''
+        mode = stat.S_IMODE(os.stat(self.path).st_mode)
+        self.assertEqual(mode, stat.S_IRUSR | stat.S_IWUSR)
+    
+    def test_client1(self):
+        for ii in range(TEST_ITERATIONS):
+            # Generate pseudorandom bytes w/ length 25
+            msg = bytes([random.randint(0, 255) for i in range(0, 25)])
+            
+            await_coroutine_threadsafe(
+                coro = self.client1.parrot(msg, timeout=1),
+                loop = self.client1_commander._loop
+            )
+            self.assertEqual(msg, self.client1_protocol.check_result())
+            
+            response = await_coroutine_threadsafe(
+                coro = self.client1.static(timeout=1),
+                loop = self.client1_commander._loop
+            )
+            self.assertEqual(response, self.client1_protocol.STATIC_RESPONSE)
+    
+    def test_server(self):
+        await_coroutine_threadsafe(
+            coro = self.client1.announce(timeout=1),
+            loop = self.client1_commander._loop
+        )
+        connection = self.server_protocol.connections[0]
+        
+        for ii in range(TEST_ITERATIONS):
+            # Generate pseudorandom bytes w/ length 25
+            msg = bytes([random.randint(0, 255) for i in range(0, 25)])
+            
+            await_coroutine_threadsafe(
+                coro = self.server_protocol.parrot(
+                    connection,
+                    msg,
+                    timeout = 1
+                ),
+                loop = self.server_commander._loop
+            )
+            self.assertEqual(msg, self.server_protocol.check_result())
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    ''' Test request routing for pooled connection managers.
+    '''
+    
+    def test_route(self):
+        manager = ConnectionManager(
+            connection_cls = WSConnection,
+            msg_handler = TestParrot(),
+            pool_size = 3,
+            pinned_requests = {'announce'}
+        )
+        primary = object()
+        pooled1 = object()
+        pooled2 = object()
+        manager._connection = primary
+        
+        # Without any pooled connections, everything uses the primary.
+        self.assertIs(manager._route('parrot'), primary)
+        self.assertIs(manager._route('announce'), primary)
+        
+        manager._pool.extend([pooled1, pooled2])
+        manager._outstanding[pooled1] = 2
+        manager._outstanding[pooled2] = 1
+        self.assertIs(manager._route('parrot'), pooled2)
+        self.assertIs(manager._route('announce'), primary)
+        
+        manager._outstanding[pooled2] = 3
+        self.assertIs(manager._route('parrot'), pooled1)
+    
+    def test_pooled_recovery(self):
+        ''' Pooled connections that die with arbitrary errors are
+        replaced.
+        '''
+        class _FlakyConn:
+            created = []
+            
+            @classmethod
+            async def new(cls):
+                self = cls()
+                cls.created.append(self)
+                return self
+            
+            async def listen_forever(self, receiver):
+                # Only the first connection dies.
+                if len(self.created) == 1:
+                    raise ValueError()
+                await asyncio.sleep(60)
+            
+            async def close(self):
+                pass
+            
+            @staticmethod
+            def desc_str():
+                return 'flaky'
+        
+        manager = ConnectionManager(
+            connection_cls = _FlakyConn,
+            msg_handler = TestParrot(),
+            pool_size = 2
+        )
+        manager.MIN_RETRY_DELAY = 0
+        manager._conn_args = ()
+        manager._conn_kwargs = {}
+        
+        async def run():
+            task = asyncio.ensure_future(manager._maintain_pooled())
+            try:
+                for __ in range(100):
+                    await asyncio.sleep(.01)
+                    if len(_FlakyConn.created) > 1 and manager._pool:
+                        break
+            finally:
+                task.cancel()
+                await asyncio.wait([task])
+        
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(run())
+        finally:
+            loop.close()
+        
+        self.assertEqual(len(_FlakyConn.created), 2)
+        self.assertEqual(manager._pool, [])
+
+
+class RequestTokenTest(unittest.TestCase):
+    ''' Test request token allocation.
+    '''
+    
+    def test_tokens(self):
+        protocol = TestParrot()
+        connection = WSConnection(websocket=None)
+        
+        token1 = protocol._new_request_token(connection)
+        token2 = protocol._new_request_token(connection)
+        self.assertEqual(token2, token1 + 1)
+        
+        # Tokens wrap around at the end of the token space, skipping any that
+        # are still outstanding.
+        protocol._last_tokens[connection] = token1._MAX_VAL - 1
+        token3 = protocol._new_request_token(connection)
+        token4 = protocol._new_request_token(connection)
+        self.assertEqual(token3, token1._MAX_VAL)
+        self.assertEqual(token4, token2 + 1)
+
+
+class FramingTest(unittest.TestCase):
+    ''' Test message packing and unpacking.
+    '''
+    
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+    
+    def tearDown(self):
+        self.loop.close()
+    
+    def test_roundtrip(self):
+        protocol = TestParrot()
+        token = protocol._new_request_token(WSConnection(websocket=None))
+        body = bytes([random.randint(0, 255) for i in range(0, 25)])
+        
+        msg = self.loop.run_until_complete(
+            protocol.packit(b'!P', token, body)
+        )
+        # Gathered bodies must pack identically.
+        gathered = self.loop.run_until_complete(
+            protocol.packit(b'!P', token, (body[:10], memoryview(body)[10:]))
+        )
+        self.assertEqual(msg, gathered)
+        
+        code, token2, body2 = self.loop.run_until_complete(
+            protocol.unpackit(msg)
+        )
+        self.assertEqual(code, b'!P')
+        self.assertEqual(token2, token)
+        self.assertEqual(body2, body)
+        self.assertIsInstance(body2, bytes)
+        
+        # Opting in to body views shouldn't change the contents.
+        protocol._BODY_VIEWS = True
+        code, token2, body2 = self.loop.run_until_complete(
+            protocol.unpackit(msg)
+        )
+        self.assertEqual(body2, body)
+        self.assertIsInstance(body2, memoryview)
+
+
+class _LoopbackConn:
+    ''' Delivers everything sent on it directly to the protocol at the
+    other end, without any actual transport.
+    '''
+    
+    def __init__(self, protocol):
+        self.protocol = protocol
+        self.peer = None
+    
+    async def send(self, msg):
+        await self.peer.protocol(self.peer, msg)
+
+
+class _RecordingConn(_LoopbackConn):
+    ''' Loopback connection that also records everything sent on it.
+    '''
+    
+    def __init__(self, protocol):
+        super().__init__(protocol)
+        self.sent = []
+    
+    async def send(self, msg):
+        self.sent.append(bytes(msg))
+        await super().send(msg)
+
+
+class TokenNegotiationTest(unittest.TestCase):
+    ''' Test negotiation of wide request tokens.
+    '''
+    
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+    
+    def tearDown(self):
+        self.loop.close()
+    
+    def _connect(self, client, server):
+        client_conn = _RecordingConn(client)
+        server_conn = _RecordingConn(server)
+        client_conn.peer = server_conn
+        server_conn.peer = client_conn
+        return client_conn, server_conn
+    
+    def _request(self, protocol, connection):
+        async def run():
+            response = await protocol.static(connection, timeout=5)
+            # Let the negotiation finish in the background.
+            await asyncio.sleep(.01)
+            return response
+        
+        return self.loop.run_until_complete(run())
+    
+    def test_wide(self):
+        client = WideParrot()
+        server = WideParrot()
+        client_conn, server_conn = self._connect(client, server)
+        
+        self.assertEqual(self._request(client, client_conn), b'\xFF')
+        self.assertIn(client_conn, client._wide)
+        self.assertIn(server_conn, server._wide)
+        # Until then, everything was narrow.
+        self.assertTrue(
+            all(msg[:2] == b'\x00\x00' for msg in client_conn.sent)
+        )
+        self.assertTrue(
+            all(msg[:2] == b'\x00\x00' for msg in server_conn.sent)
+        )
+        
+        del client_conn.sent[:]
+        del server_conn.sent[:]
+        self.assertEqual(self._request(client, client_conn), b'\xFF')
+        self.assertEqual(self._request(server, server_conn), b'\xFF')
+        for msg in client_conn.sent + server_conn.sent:
+            self.assertEqual(msg[:2], b'\x00\x01')
+            # Version, code, 4-byte token, and a 0- or 1-byte body.
+            self.assertIn(len(msg), {8, 9})
+    
+    def test_narrow_peer(self):
+        client = WideParrot()
+        server = NarrowParrot()
+        client_conn, server_conn = self._connect(client, server)
+        
+        for __ in range(3):
+            self.assertEqual(self._request(client, client_conn), b'\xFF')
+        
+        self.assertNotIn(client_conn, client._wide)
+        for msg in client_conn.sent + server_conn.sent:
+            self.assertEqual(msg[:2], b'\x00\x00')
+        
+        # And the other way around, too.
+        self.assertEqual(self._request(server, server_conn), b'\xFF')
+        self.assertNotIn(client_conn, client._wide)
+        self.assertEqual(server_conn.sent[-1][:2], b'\x00\x00')
+
+
+class LoggingTest(unittest.TestCase):
+    ''' Test structured logging, and benchmark its per-request CPU
+    cost.
+    '''
+    BENCH_REQUESTS = 2000
+    
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.root = logging.getLogger('')
+        self.old_level = self.root.level
+        self.stream = io.StringIO()
+        self.handler = logging.StreamHandler(self.stream)
+        self.root.addHandler(self.handler)
+    
+    def tearDown(self):
+        self.root.removeHandler(self.handler)
+        self.root.setLevel(self.old_level)
+        self.loop.close()
+    
+    def test_log_event(self):
+        records = []
+        
+        class Collector(logging.Handler):
+            def emit(self, record):
+                records.append(record)
+        
+        collector = Collector()
+        test_logger = logging.getLogger('hypergolix.test_log_event')
+        test_logger.addHandler(collector)
+        try:
+            test_logger.setLevel(logging.INFO)
+            log_event(test_logger, logging.DEBUG, 'test.hidden', value=1)
+            self.assertEqual(records, [])
+            
+            log_event(test_logger, logging.INFO, 'test.shown', value=1,
+                      body=memoryview(b'\x01'))
+            self.assertEqual(len(records), 1)
+            self.assertEqual(records[0].event, 'test.shown')
+            self.assertEqual(records[0].event_fields['value'], 1)
+            self.assertEqual(
+                records[0].getMessage(),
+                "test.shown value=1 body=b'\\x01'"
+            )
+        
+        finally:
+            test_logger.removeHandler(collector)
+            test_logger.setLevel(logging.NOTSET)
+    
+    def _bench(self, level):
+        ''' Time BENCH_REQUESTS loopback requests with the root logger
+        at level. Returns CPU seconds per request.
+        '''
+        self.root.setLevel(level)
+        client = TestParrot()
+        server = TestParrot()
+        client_conn = _LoopbackConn(client)
+        server_conn = _LoopbackConn(server)
+        client_conn.peer = server_conn
+        server_conn.peer = client_conn
+        
+        async def run():
+            for __ in range(self.BENCH_REQUESTS):
+                await client.static(client_conn, timeout=5)
+        
+        start = time.process_time()
+        self.loop.run_until_complete(run())
+        return (time.process_time() - start) / self.BENCH_REQUESTS
+    
+    @unittest.skipUnless(RUN_BENCHMARKS,
+                         'Set HYPERGOLIX_BENCHMARKS to run benchmarks.')
+    def test_overhead(self):
+        quiet = self._bench(logging.WARNING)
+        verbose = self._bench(logging.DEBUG)
+        logger.info(
+            'Per-request CPU: %.1f us at WARNING, %.1f us at DEBUG; '
+            '%.1f us saved.',
+            quiet * 1e6, verbose * 1e6, (verbose - quiet) * 1e6
+        )
+
+
+@unittest.skipUnless(RUN_BENCHMARKS,
+                     'Set HYPERGOLIX_BENCHMARKS to run benchmarks.')
+class WSThroughputBench(unittest.TestCase):
+    ''' Benchmark request throughput across a single connection.
+    '''
+    BENCH_REQUESTS = 5000
+    BENCH_CONCURRENCY = (1, 64, 1024)
+    CONNECTION_CLS = WSConnection
+    PORT = 9320
+    
+    def setUp(self):
+        self.server_commander = TaskCommander(
+            reusable_loop = False,
+            threaded = True,
+            thread_kwargs = {'name': 'server'}
+        )
+        self.server_protocol = TestParrot()
+        self.server = BasicServer(connection_cls=self.CONNECTION_CLS)
+        self.server_commander.register_task(
+            self.server,
+            msg_handler = self.server_protocol,
+            host = 'localhost',
+            port = self.PORT
+        )
+        
+        self.client_commander = TaskCommander(
+            reusable_loop = False,
+            threaded = True,
+            thread_kwargs = {'name': 'client'}
+        )
+        self.client_protocol = TestParrot()
+        self.client = ConnectionManager(
+            connection_cls = self.CONNECTION_CLS,
+            msg_handler = self.client_protocol,
+            autoretry = False
+        )
+        self.client_commander.register_task(
+            self.client,
+            host = 'localhost',
+            port = self.PORT,
+            tls = False
+        )
+        
+        self.server_commander.start()
+        await_coroutine_threadsafe(
+            coro = self.server_commander.await_init(),
+            loop = self.server_commander._loop
+        )
+        self.client_commander.start()
+        await_coroutine_threadsafe(
+            coro = self.client_commander.await_init(),
+            loop = self.client_commander._loop
+        )
+    
+    def tearDown(self):
+        self.client_commander.stop_threadsafe(timeout=.5)
+        self.server_commander.stop_threadsafe(timeout=.5)
+        time.sleep(.1)
+    
+    async def _bench(self, concurrency):
+        ''' Issue BENCH_REQUESTS static requests, with at most
+        concurrency of them in flight at any given time.
+        '''
+        remaining = self.BENCH_REQUESTS
+        
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                await self.client.static(timeout=30)
+        
+        start = time.monotonic()
+        await asyncio.gather(*[worker() for __ in range(concurrency)])
+        return self.BENCH_REQUESTS / (time.monotonic() - start)
+    
+    def test_throughput(self):
+        for concurrency in self.BENCH_CONCURRENCY:
+            rate = await_coroutine_threadsafe(
+                coro = self._bench(concurrency),
+                loop = self.client_commander._loop
+            )
+            logger.info(
+                '%s, concurrency %5d: %10.1f requests/sec',
+                self.CONNECTION_CLS.__name__, concurrency, rate
+            )
+
+
+@unittest.skipUnless(RUN_BENCHMARKS,
+                     'Set HYPERGOLIX_BENCHMARKS to run benchmarks.')
+class TCPThroughputBench(WSThroughputBench):
+    ''' Identical to WSThroughputBench, but over length-prefixed TCP,
+    for direct comparison.
+    '''
+    CONNECTION_CLS = TCPConnection
+    PORT = 9321
+
+
+class TCPConnectionTest(unittest.TestCase):
+    ''' Test TCP connection setup.
+    '''
+    
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+    
+    def tearDown(self):
+        self.loop.close()
+    
+    def test_tls_server_requires_context(self):
+        with self.assertRaises(ValueError):
+            self.loop.run_until_complete(
+                TCPConnection.serve_forever(
+                    TestParrot(),
+                    host = 'localhost',
+                    port = 9322,
+                    tls = True
+                )
+            )
+
+
 def fileno(file_or_fd):
     fd = getattr(file_or_fd, 'fileno', lambda: file_or_fd)()
     if not isinstance(fd, int):
@@ -34,6 +34,8 @@ hypergolix: A python Golix client.
 '''
 
 import unittest
+import asyncio
+import threading
 import concurrent.futures
 
 from loopa import NoopLoop
@@ -68,6 +70,15 @@ from _fixtures.identities import TEST_AGENT2
 from _fixtures.ghidutils import make_random_ghid
 
 
+class _DynamicGAO(GAOCore.__fixture__):
+    ''' A fixture GAO that always pulls as dynamic.
+    '''
+    
+    async def _pull(self):
+        await super()._pull()
+        self._dynamic = True
+
+
 # ###############################################
 # Testing
 # ###############################################
@@ -196,6 +207,31 @@ class GolcoreTest(unittest.TestCase):
             coro = self.golcore.make_debinding(target=dynamic2.ghid_dynamic),
             loop = self.nooploop._loop
         )
+    
+    def test_local_identity(self):
+        ''' Each thread should get its own copy of the identity, and a
+        new one whenever the identity changes.
+        '''
+        copies = []
+        
+        def grab():
+            copies.append(self.golcore._local_identity())
+        
+        grab()
+        grab()
+        worker = threading.Thread(target=grab)
+        worker.start()
+        worker.join()
+        
+        self.assertIs(copies[0], copies[1])
+        self.assertIsNot(copies[0], copies[2])
+        self.assertIsNot(copies[0], TEST_AGENT1)
+        for copy in copies:
+            self.assertEqual(copy.ghid, TEST_AGENT1.ghid)
+        
+        self.golcore.bootstrap(Account.__fixture__(TEST_AGENT2))
+        grab()
+        self.assertEqual(copies[3].ghid, TEST_AGENT2.ghid)
 
         
 class GhidproxyTest(unittest.TestCase):
@@ -311,6 +347,105 @@ class GhidproxyTest(unittest.TestCase):
             ),
             cont2_2.ghid
         )
+    
+    def test_cache(self):
+        ''' Make sure resolutions are cached, and that abandoning a
+        binding along the way invalidates them.
+        '''
+        from _fixtures.remote_exchanges import cont1_1
+        geoc1_1 = _GeocLite(cont1_1.ghid, cont1_1.author)
+        from _fixtures.remote_exchanges import dyn1_1a
+        gobd1_a = _GobdLite.from_golix(dyn1_1a)
+        
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(geoc1_1, cont1_1.packed),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(gobd1_a, dyn1_1a.packed),
+            loop = self.nooploop._loop
+        )
+        
+        self.assertEqual(
+            await_coroutine_threadsafe(
+                coro = self.ghidproxy.resolve(dyn1_1a.ghid_dynamic),
+                loop = self.nooploop._loop
+            ),
+            cont1_1.ghid
+        )
+        self.assertIn(dyn1_1a.ghid_dynamic, self.ghidproxy._resolved)
+        self.assertIn(dyn1_1a.ghid_dynamic, self.ghidproxy._dependents)
+        
+        # Now the librarian shouldn't be needed at all.
+        summarize = self.librarian.summarize
+        
+        async def fail(ghid):
+            raise AssertionError('Resolution was not cached.')
+        
+        self.librarian.summarize = fail
+        try:
+            self.assertEqual(
+                await_coroutine_threadsafe(
+                    coro = self.ghidproxy.resolve(dyn1_1a.ghid_dynamic),
+                    loop = self.nooploop._loop
+                ),
+                cont1_1.ghid
+            )
+        finally:
+            self.librarian.summarize = summarize
+        
+        await_coroutine_threadsafe(
+            coro = self.librarian.abandon(gobd1_a),
+            loop = self.nooploop._loop
+        )
+        self.assertNotIn(dyn1_1a.ghid_dynamic, self.ghidproxy._resolved)
+        self.assertNotIn(dyn1_1a.ghid_dynamic, self.ghidproxy._dependents)
+        
+        # Missing bindings resolve to themselves, but aren't cached.
+        self.assertEqual(
+            await_coroutine_threadsafe(
+                coro = self.ghidproxy.resolve(dyn1_1a.ghid_dynamic),
+                loop = self.nooploop._loop
+            ),
+            dyn1_1a.ghid_dynamic
+        )
+        self.assertNotIn(dyn1_1a.ghid_dynamic, self.ghidproxy._resolved)
+    
+    def test_cache_size(self):
+        ''' Make sure the cache is bounded, and that evicted resolutions
+        don't leave their chains behind.
+        '''
+        from _fixtures.remote_exchanges import cont1_1
+        geoc1_1 = _GeocLite(cont1_1.ghid, cont1_1.author)
+        from _fixtures.remote_exchanges import dyn1_1a
+        gobd1_a = _GobdLite.from_golix(dyn1_1a)
+        from _fixtures.remote_exchanges import cont2_1
+        geoc2_1 = _GeocLite(cont2_1.ghid, cont2_1.author)
+        from _fixtures.remote_exchanges import dyn2_1a
+        gobd2_a = _GobdLite.from_golix(dyn2_1a)
+        
+        ghidproxy = GhidProxier(cache_size=1)
+        ghidproxy.assemble(self.librarian)
+        
+        for obj, packed in ((geoc1_1, cont1_1.packed),
+                            (gobd1_a, dyn1_1a.packed),
+                            (geoc2_1, cont2_1.packed),
+                            (gobd2_a, dyn2_1a.packed)):
+            await_coroutine_threadsafe(
+                coro = self.librarian.store(obj, packed),
+                loop = self.nooploop._loop
+            )
+        
+        for ghid in (dyn1_1a.ghid_dynamic, dyn2_1a.ghid_dynamic):
+            await_coroutine_threadsafe(
+                coro = ghidproxy.resolve(ghid),
+                loop = self.nooploop._loop
+            )
+        
+        self.assertEqual(list(ghidproxy._resolved), [dyn2_1a.ghid_dynamic])
+        self.assertEqual(list(ghidproxy._chains), [dyn2_1a.ghid_dynamic])
+        self.assertNotIn(dyn1_1a.ghid_dynamic, ghidproxy._dependents)
+        self.assertIn(dyn2_1a.ghid_dynamic, ghidproxy._dependents)
 
         
 class OracleTest(unittest.TestCase):
@@ -397,6 +532,102 @@ class OracleTest(unittest.TestCase):
         )
         self.assertTrue(obj is obj2)
         
+    def test_cold_load(self):
+        ''' Make sure cold loads subscribe and pull concurrently, and
+        record their latency.
+        '''
+        events = []
+        
+        async def contains(ghid):
+            return True
+        
+        async def attempt_pull(ghid, quiet=False):
+            events.append('pull start')
+            await asyncio.sleep(.05)
+            events.append('pull end')
+        
+        async def register(ghid):
+            events.append('register start')
+            await asyncio.sleep(.05)
+            events.append('register end')
+        
+        self.librarian.contains = contains
+        self.salmonator.attempt_pull = attempt_pull
+        self.salmonator.register = register
+        
+        ghid = make_random_ghid()
+        await_coroutine_threadsafe(
+            coro = self.oracle.get_object(
+                gaoclass = GAOCore.__fixture__,
+                ghid = ghid
+            ),
+            loop = self.nooploop._loop
+        )
+        
+        self.assertLess(
+            events.index('register start'),
+            events.index('pull end')
+        )
+        self.assertLess(
+            events.index('pull start'),
+            events.index('register end')
+        )
+        
+        self.assertEqual(self.oracle.cold_load_latency.count, 1)
+        for tracker in (self.oracle.cold_pull_latency,
+                        self.oracle.cold_subscribe_latency,
+                        self.oracle.cold_prefetch_latency,
+                        self.oracle.cold_unpack_latency):
+            self.assertEqual(tracker.count, 1)
+            self.assertLessEqual(tracker.last,
+                                 self.oracle.cold_load_latency.last)
+        
+        # Warm loads shouldn't count.
+        await_coroutine_threadsafe(
+            coro = self.oracle.get_object(
+                gaoclass = GAOCore.__fixture__,
+                ghid = ghid
+            ),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(self.oracle.cold_load_latency.count, 1)
+    
+    def test_cold_load_repull(self):
+        ''' Make sure cold loads only pull again afterwards if the
+        subscription had to wait for the first pull.
+        '''
+        pulls = []
+        known = None
+        
+        async def contains(ghid):
+            return known
+        
+        async def attempt_pull(ghid, quiet=False):
+            pulls.append(ghid)
+        
+        async def register(ghid):
+            pass
+        
+        self.librarian.contains = contains
+        self.salmonator.attempt_pull = attempt_pull
+        self.salmonator.register = register
+        
+        for known, expected in ((True, 1), (False, 2)):
+            del pulls[:]
+            await_coroutine_threadsafe(
+                coro = self.oracle.get_object(
+                    gaoclass = _DynamicGAO,
+                    ghid = make_random_ghid()
+                ),
+                loop = self.nooploop._loop
+            )
+            # Give any background pull a chance to run.
+            await_coroutine_threadsafe(
+                coro = asyncio.sleep(.01),
+                loop = self.nooploop._loop
+            )
+            self.assertEqual(len(pulls), expected)
+
 
 if __name__ == "__main__":
     from hypergolix import logutils
@@ -36,6 +36,7 @@ hypergolix: A python Golix client.
 import unittest
 import random
 import logging
+import os
 
 from loopa import TaskCommander
 from loopa.utils import await_coroutine_threadsafe
@@ -74,6 +75,7 @@ from hypergolix.exceptions import IPCError
 
 from hypergolix.ipc import IPCServerProtocol
 from hypergolix.ipc import IPCClientProtocol
+from hypergolix.ipc import shared_memory
 
 
 # ###############################################
@@ -628,6 +630,99 @@ class WSIPCTest(unittest.TestCase):
         self.assertIn(ghid, self.hgxlink1.deleted)
 
 
+class SerializerTest(unittest.TestCase):
+    ''' Test object definition serialization, inline and through
+    shared memory.
+    '''
+    
+    def _roundtrip(self, sender, receiver, state):
+        ghid = make_random_ghid()
+        author = make_random_ghid()
+        api_id = ApiID(bytes([random.randint(0, 255) for i in range(0, 64)]))
+        
+        packed = sender._pack_object_def(None, ghid, author, state, False,
+                                         api_id, False, True, None)
+        unpacked = receiver._unpack_object_def(None, packed)
+        self.assertEqual(
+            unpacked,
+            (ghid, author, state, False, api_id, False, True, None)
+        )
+        return packed
+    
+    def test_inline(self):
+        sender = IPCClientProtocol()
+        receiver = IPCServerProtocol()
+        state = bytes([random.randint(0, 255) for i in range(0, 25)])
+        
+        packed = self._roundtrip(sender, receiver, state)
+        self.assertEqual(packed[0:1], b'\x00')
+        self.assertEqual(sender.shm_transfers, 0)
+    
+    @unittest.skipUnless(shared_memory is not None and os.name == 'posix',
+                         'Shared memory IPC unavailable')
+    def test_shm(self):
+        sender = IPCClientProtocol(shm_threshold=1024)
+        receiver = IPCServerProtocol()
+        
+        # Below the threshold, states are still sent inline.
+        small = bytes([random.randint(0, 255) for i in range(0, 25)])
+        packed = self._roundtrip(sender, receiver, small)
+        self.assertEqual(packed[0:1], b'\x00')
+        
+        large = os.urandom(2 ** 20)
+        packed = self._roundtrip(sender, receiver, large)
+        self.assertEqual(packed[0:1], b'\x01')
+        self.assertLess(len(packed), 1024)
+        self.assertEqual(sender.shm_transfers, 1)
+        
+        # The sender keeps ownership until the segment is released, and
+        # only the connection it was sent over can release it.
+        name = str(packed[208:], 'utf-8')
+        self.assertIn(name, sender._shm_exports)
+        self.assertFalse(sender._release_shm(name, object()))
+        self._roundtrip(sender, receiver, large)
+        
+        self.assertTrue(sender._release_shm(name))
+        self.assertNotIn(name, sender._shm_exports)
+        with self.assertRaises(IPCError):
+            receiver._unpack_object_def(None, packed)
+    
+    @unittest.skipUnless(shared_memory is not None and os.name == 'posix',
+                         'Shared memory IPC unavailable')
+    def test_shm_reaping(self):
+        ''' Segments that are never released are unlinked once they
+        expire.
+        '''
+        sender = IPCClientProtocol(shm_threshold=1024, shm_ttl=0)
+        receiver = IPCServerProtocol()
+        
+        packed = self._roundtrip(sender, receiver, os.urandom(2 ** 12))
+        sender._reap_shm()
+        self.assertEqual(sender._shm_exports, {})
+        with self.assertRaises(IPCError):
+            receiver._unpack_object_def(None, packed)
+    
+    @unittest.skipUnless(shared_memory is not None and os.name == 'posix',
+                         'Shared memory IPC unavailable')
+    def test_shm_foreign(self):
+        ''' Receivers must refuse to open segments that aren't ours.
+        '''
+        receiver = IPCServerProtocol()
+        foreign = shared_memory.SharedMemory(create=True, size=16)
+        
+        try:
+            handle = (16).to_bytes(8, 'big') + foreign.name.encode('utf-8')
+            with self.assertRaises(IPCError):
+                receiver._import_state(None, handle)
+            
+            # It must still be there.
+            shared_memory.SharedMemory(name=foreign.name).close()
+        
+        finally:
+            foreign.close()
+            foreign.unlink()
+
+
 if __name__ == "__main__":
     from hypergolix import logutils
     logutils.autoconfig(loglevel='debug')
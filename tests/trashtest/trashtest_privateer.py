@@ -322,6 +322,46 @@ class PrivateerTest(unittest.TestCase):
         self.assertIn(ghid3, self.privateer)
         self.assertEqual(self.privateer.get(ghid3), secret3)
         
+    def test_ratchet_cache(self):
+        ''' Make sure ratchets are cached, but only reused for the same
+        source secret, and forgotten on abandon.
+        '''
+        master = self.privateer.new_secret()
+        proxy = make_random_ghid()
+        ghid1 = make_random_ghid()
+        ghid2 = make_random_ghid()
+        secret1 = self.privateer.new_secret()
+        self.privateer.stage(ghid1, secret1)
+        
+        secret2 = self.privateer.ratchet_chain(proxy, ghid1)
+        self.assertEqual(self.privateer.ratchet_misses, 1)
+        self.assertEqual(self.privateer.ratchet_chain(proxy, ghid1), secret2)
+        self.assertEqual(self.privateer.ratchet_hits, 1)
+        
+        # Same proxy and salt, but a different source secret
+        secret2m = self.privateer.ratchet_chain(proxy, ghid1, master)
+        self.assertNotEqual(secret2, secret2m)
+        self.assertEqual(self.privateer.ratchet_misses, 2)
+        
+        # Priming without the golcore's event loop shouldn't do anything, but
+        # also shouldn't break.
+        self.privateer.stage(ghid2, secret2)
+        self.privateer.prime_ratchet(proxy, ghid2)
+        
+        self.privateer.abandon(ghid1)
+        self.assertEqual(len(self.privateer._ratchet_cache), 0)
+        self.assertEqual(self.privateer._ratchets_by_salt, {})
+        self.assertEqual(self.privateer._ratchets_by_output, {})
+        
+        # And make sure it can be disabled entirely.
+        privateer = Privateer(ratchet_cache=None)
+        privateer.assemble(self.golcore)
+        privateer.bootstrap(self.account)
+        privateer.stage(ghid1, secret1)
+        self.assertEqual(privateer.ratchet_chain(proxy, ghid1), secret2)
+        self.assertEqual(privateer.ratchet_chain(proxy, ghid1), secret2)
+        self.assertEqual(privateer.ratchet_hits, 0)
+
 
 if __name__ == "__main__":
     from hypergolix import logutils
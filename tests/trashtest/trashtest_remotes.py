@@ -35,10 +35,12 @@ hypergolix: A python Golix client.
 
 import unittest
 import threading
+import asyncio
 import pathlib
 import logging
 # Just used for fixture
 import random
+import weakref
 
 from loopa.utils import await_coroutine_threadsafe
 from loopa import TaskCommander
@@ -47,6 +49,7 @@ from loopa import NoopLoop
 # These are normal imports
 from hypergolix.remotes import RemotePersistenceProtocol
 from hypergolix.remotes import Salmonator
+from hypergolix.remotes import _PeerStats
 
 from hypergolix.comms import BasicServer
 from hypergolix.comms import WSConnection
@@ -57,6 +60,8 @@ from hypergolix.utils import Aengel
 
 from golix._getlow import GIDC
 from hypergolix.persistence import _GidcLite
+from hypergolix.persistence import _GeocLite
+from hypergolix.persistence import _GobdLite
 from hypergolix.persistence import PersistenceCore
 from hypergolix.librarian import LibrarianCore
 from hypergolix.postal import PostalCore
@@ -65,6 +70,7 @@ from hypergolix.core import GolixCore
 
 from hypergolix.exceptions import RemoteNak
 from hypergolix.exceptions import StillBoundWarning
+from hypergolix.exceptions import UnavailableUpstream
 
 # These are abnormal imports
 from golix import Ghid
@@ -88,9 +94,13 @@ from _fixtures.identities import TEST_READER3
 
 from _fixtures.remote_exchanges import gidc1
 from _fixtures.remote_exchanges import gidc2
+from _fixtures.remote_exchanges import cont1_1
+from _fixtures.remote_exchanges import dyn1_1a
 
 gidclite1 = _GidcLite.from_golix(GIDC.unpack(gidc1))
 gidclite2 = _GidcLite.from_golix(GIDC.unpack(gidc2))
+geoclite1_1 = _GeocLite.from_golix(cont1_1)
+gobdlite1_1a = _GobdLite.from_golix(dyn1_1a)
 
 logger = logging.getLogger(__name__)
 
@@ -503,15 +513,33 @@ class SalmonatorTestStaged(unittest.TestCase):
         
         conn = _ConnectionBase.__fixture__()
         remote = Reffable()
+        remote._conn_desc = 'remote'
         
-        # Just tell it to upload both gidcs.
-        self.salmonator._deferred.append(remote, gidc1)
-        self.salmonator._deferred.append(remote, gidc2)
+        # Just tell it to upload both gidcs, which need to be available
+        # locally for that to work.
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(gidclite1, gidc1),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(gidclite2, gidc2),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.librarian.outbox_append('remote', gidclite1.ghid),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.librarian.outbox_append('remote', gidclite2.ghid),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(self.salmonator.outbox_depth, 2)
         
         await_coroutine_threadsafe(
             coro = self.salmonator.restore_connection(remote, conn),
             loop = self.nooploop._loop
         )
+        self.assertEqual(self.salmonator.outbox_depth, 0)
         
         self.assertTrue(
             await_coroutine_threadsafe(
@@ -525,6 +553,258 @@ class SalmonatorTestStaged(unittest.TestCase):
                 loop = self.nooploop._loop
             )
         )
+    
+    
+    def test_resync(self):
+        ''' Test resync cursors only return updates newer than the
+        client's counter, bindings before targets.
+        '''
+        await_coroutine_threadsafe(
+            coro = self.librarian_remote.store(gobdlite1_1a, dyn1_1a.packed),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.librarian_remote.store(geoclite1_1, cont1_1.packed),
+            loop = self.nooploop._loop
+        )
+        conn = _ConnectionBase.__fixture__()
+        
+        # Unknown locally: we should get the frame and its target, in order.
+        payloads = await_coroutine_threadsafe(
+            coro = self.remote_protocol.resync(
+                conn,
+                [(gobdlite1_1a.ghid, -1)]
+            ),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(payloads, [dyn1_1a.packed, cont1_1.packed])
+        
+        # Up to date locally: nothing to send.
+        payloads = await_coroutine_threadsafe(
+            coro = self.remote_protocol.resync(
+                conn,
+                [(gobdlite1_1a.ghid, gobdlite1_1a.counter)]
+            ),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(payloads, [])
+        
+        # Unknown at the remote: nothing to send.
+        payloads = await_coroutine_threadsafe(
+            coro = self.remote_protocol.resync(
+                conn,
+                [(make_random_ghid(), -1)]
+            ),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(payloads, [])
+    
+    def test_pull_coalescing(self):
+        ''' Concurrent pulls for the same ghid should only hit the
+        remote once.
+        '''
+        remote = Reffable()
+        remote.calls = 0
+        
+        async def get(ghid):
+            remote.calls += 1
+            await asyncio.sleep(.05)
+            return gidc1
+        
+        remote.get = get
+        remote.has_connection = True
+        self.salmonator._upstream_remotes.add(remote)
+        
+        async def pull_several():
+            await asyncio.gather(
+                self.salmonator.pull(gidclite1.ghid),
+                self.salmonator.pull(gidclite1.ghid),
+                self.salmonator.pull(gidclite1.ghid)
+            )
+        
+        await_coroutine_threadsafe(
+            coro = pull_several(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(remote.calls, 1)
+        self.assertEqual(self.salmonator.pulls_coalesced, 2)
+        self.assertFalse(self.salmonator._pulls_in_flight)
+    
+    def test_pull_negative_cache(self):
+        ''' Pulls for a ghid that was just unavailable everywhere should
+        fail without hitting the remote again.
+        '''
+        remote = Reffable()
+        remote.calls = 0
+        
+        async def get(ghid):
+            remote.calls += 1
+            raise RemoteNak()
+        
+        remote.get = get
+        remote.has_connection = True
+        remote._conn_desc = 'fixture'
+        self.salmonator._upstream_remotes.add(remote)
+        
+        for __ in range(2):
+            with self.assertRaises(UnavailableUpstream):
+                await_coroutine_threadsafe(
+                    coro = self.salmonator.pull(gidclite1.ghid),
+                    loop = self.nooploop._loop
+                )
+        
+        self.assertEqual(remote.calls, 1)
+        self.assertEqual(self.salmonator.pulls_negative_cached, 1)
+    
+    
+    def test_pull_hedging(self):
+        ''' Slow remotes should be hedged against, and subsequently
+        demoted.
+        '''
+        self.salmonator._hedge_default = .05
+        
+        slow = Reffable()
+        slow.calls = 0
+        fast = Reffable()
+        fast.calls = 0
+        
+        async def slow_get(ghid):
+            slow.calls += 1
+            await asyncio.sleep(5)
+            return gidc1
+        
+        async def fast_get(ghid):
+            fast.calls += 1
+            return gidc1
+        
+        slow.get = slow_get
+        slow.has_connection = True
+        slow._conn_desc = 'slow'
+        fast.get = fast_get
+        fast.has_connection = True
+        fast._conn_desc = 'fast'
+        self.salmonator._upstream_remotes.add(slow)
+        self.salmonator._upstream_remotes.add(fast)
+        # Make sure the slow remote gets asked first.
+        self.salmonator._get_remote_stats(fast).record_success(.01)
+        
+        await_coroutine_threadsafe(
+            coro = self.salmonator.pull(gidclite1.ghid),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(slow.calls, 1)
+        self.assertEqual(fast.calls, 1)
+        
+        # Now the fast remote should be preferred.
+        self.assertEqual(self.salmonator._rank_remotes(), [fast, slow])
+        
+    def test_replicate(self):
+        ''' Replication should go to every peer, except the one the
+        object came from.
+        '''
+        origin = _ConnectionBase.__fixture__()
+        peer1 = Reffable()
+        peer1._connection = None
+        peer2 = Reffable()
+        peer2._connection = None
+        
+        stats1 = _PeerStats()
+        stats1.peer_id = bytes(16)
+        stats2 = _PeerStats()
+        stats2.peer_id = bytes(15) + b'\x01'
+        self.salmonator._downstream_remotes.update((peer1, peer2))
+        self.salmonator._peer_stats[peer1] = stats1
+        self.salmonator._peer_stats[peer2] = stats2
+        self.salmonator.add_peer_origin(origin, bytes(16))
+        
+        self.salmonator.replicate(gidclite1, skip_conn=weakref.ref(origin))
+        self.assertEqual(stats1.pending, 0)
+        self.assertEqual(stats2.pending, 1)
+        
+        self.salmonator.replicate(gidclite2)
+        self.assertEqual(stats1.pending, 1)
+        self.assertEqual(stats2.pending, 2)
+        
+        # Dynamic bindings are queued once, by their dynamic ghid.
+        self.salmonator.replicate(gobdlite1_1a)
+        self.salmonator.replicate(gobdlite1_1a)
+        self.assertEqual(stats1.pending, 2)
+        self.assertEqual(stats1.backlog[-1][0], gobdlite1_1a.ghid)
+    
+    def test_pinned_requests(self):
+        ''' Everything that touches our subscriptions at the remote has
+        to use the primary connection, and so do publishes, or the
+        remote would echo them back to us.
+        '''
+        for request_name in ('publish', 'subscribe', 'unsubscribe', 'resync',
+                             'request_bundling', 'query_subscriptions',
+                             'disconnect'):
+            self.assertIn(request_name, Salmonator._PINNED_REQUESTS)
+        
+        self.assertNotIn('get', Salmonator._PINNED_REQUESTS)
+    
+    def test_pump_superseded(self):
+        ''' Anything gone from the librarian by the time the pump gets
+        to it was superseded, and shouldn't count as a failure.
+        '''
+        conn = _ConnectionBase.__fixture__()
+        peer = Reffable()
+        peer._conn_desc = 'peer'
+        stats = _PeerStats()
+        stats.enqueue(gobdlite1_1a.ghid)
+        
+        async def pump():
+            stats.wakeup = asyncio.Event()
+            task = asyncio.ensure_future(
+                self.salmonator._pump_peer(peer, conn, stats)
+            )
+            for __ in range(100):
+                if not stats.pending:
+                    break
+                await asyncio.sleep(.01)
+            task.cancel()
+        
+        await_coroutine_threadsafe(
+            coro = pump(),
+            loop = self.nooploop._loop
+        )
+        self.assertEqual(stats.pending, 0)
+        self.assertEqual(stats.superseded, 1)
+        self.assertEqual(stats.failed, 0)
+    
+    def test_antientropy(self):
+        ''' Anti-entropy should push only what the peer is missing.
+        '''
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(gidclite1, gidc1),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.librarian.store(gidclite2, gidc2),
+            loop = self.nooploop._loop
+        )
+        await_coroutine_threadsafe(
+            coro = self.librarian_remote.store(gidclite1, gidc1),
+            loop = self.nooploop._loop
+        )
+        
+        conn = _ConnectionBase.__fixture__()
+        peer = Reffable()
+        peer._conn_desc = 'peer'
+        stats = _PeerStats()
+        
+        await_coroutine_threadsafe(
+            coro = self.salmonator._antientropy(peer, conn, stats),
+            loop = self.nooploop._loop
+        )
+        
+        self.assertEqual(stats.caught_up, 1)
+        self.assertTrue(
+            await_coroutine_threadsafe(
+                coro = self.librarian_remote.contains(gidclite2.ghid),
+                loop = self.nooploop._loop
+            )
+        )
         
 
 if __name__ == "__main__":